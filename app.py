@@ -3,7 +3,7 @@ AI 활용 경기 토론 수업 지원 도구 (간단 개발 버전)
 초등학교 6학년 대상 경기 토론 수업 모형 기반의 토론 학습 도우미
 
 실행에 필요한 라이브러리:
-- streamlit==1.32.0
+- streamlit==1.37.0
 - google-generativeai==0.3.2
 
 이 라이브러리들은 requirements.txt 파일에 명시되어 있습니다.
@@ -12,12 +12,36 @@ AI 활용 경기 토론 수업 지원 도구 (간단 개발 버전)
 API 키 설정 방법:
 1. 로컬 실행 시: `.streamlit/secrets.toml` 파일에 `GEMINI_API_KEY = "YOUR_API_KEY_HERE"` 형식으로 저장
 2. Streamlit Cloud 배포 시: Streamlit Cloud의 'Settings' > 'Secrets' 메뉴에서 설정
+3. 오프라인 시험 시: GEMINI_PROVIDER = "fake" (환경 변수도 가능)로 두면 API 키 없이 가짜 응답 사용
 """
 
 import streamlit as st
-import google.generativeai as genai
+import streamlit.components.v1 as components
+from streamlit import runtime
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+import os
+import queue
 import traceback
-import re # Add re import
+import uuid
+import hmac
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from response_cache import ResponseCache, normalize_input
+from batch_feedback import BatchFormatError, BatchJob, DONE, FAILED, PENDING, RUNNING, parse_opinion_table
+from disk_cache import SqliteResponseCache
+from fake_provider import FakeModelPool
+from singleflight import SingleFlight
+from gemini_service import GeminiService, ModelPool
+from inflight import InflightGuard, SupersededError, make_inputs_key
+from prefetch import Prefetcher
+from rate_limiter import QueueTimeout, RateLimiter
+from readiness import ReadinessServer
+from resilience import CircuitBreaker, CircuitOpenError, GenerationCancelled, GenerationTimeout, RetryPolicy
+from structured_output import FormatError, TopicStream, output_format, parse_response, render_response, render_topic
+from stylesheet import Stylesheet
+from telemetry import MetricsFileWriter, Telemetry
+from topic_library import TopicLibrary
 
 # ============================
 # 페이지 설정 
@@ -31,386 +55,35 @@ st.set_page_config(
 )
 
 # 앱 스타일 설정 - 6학년 학생에게 친근하고 생동감 있는 디자인
-st.markdown("""
-<style>
-    @import url('https://fonts.googleapis.com/css2?family=Jua&family=Gaegu:wght@400;700&display=swap');
-    
-    /* 기본 스타일 */
-    .main {
-        background: linear-gradient(135deg, #fff9f9 0%, #fff5f2 100%);
-    }
-    .block-container {
-        padding-top: 1rem;
-        padding-bottom: 2rem;
-    }
-    .stApp {
-        font-family: 'Gaegu', cursive;
-    }
-    
-    /* 애니메이션 정의 */
-    @keyframes float {
-        0% { transform: translateY(0px); }
-        50% { transform: translateY(-10px); }
-        100% { transform: translateY(0px); }
-    }
-    
-    @keyframes pulse {
-        0% { transform: scale(1); }
-        50% { transform: scale(1.05); }
-        100% { transform: scale(1); }
-    }
-    
-    @keyframes rainbow {
-        0% { color: #ffb7c5; }
-        14% { color: #ffc1cc; }
-        28% { color: #ffd1dc; }
-        42% { color: #ffe0e6; }
-        56% { color: #fff0f5; }
-        70% { color: #fff5f8; }
-        84% { color: #ffeff5; }
-        100% { color: #ffb7c5; }
-    }
-    
-    /* 헤더 스타일 */
-    h1 {
-        font-family: 'Jua', sans-serif;
-        color: #66545e;
-        font-size: 2.2rem;
-        padding: 0.8rem;
-        background: linear-gradient(to right, #ffe0e6, #ffd1dc);
-        border-radius: 15px;
-        margin-bottom: 0.5rem;
-        text-shadow: 2px 2px 4px rgba(255, 183, 197, 0.2);
-        border-left: 8px solid #ffb7c5;
-    }
-    
-    .header-box {
-        background: linear-gradient(135deg, #ffb7c5, #ffd1dc);
-        padding: 20px;
-        border-radius: 15px;
-        margin-bottom: 30px;
-        box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1);
-        color: #66545e;
-        animation: float 6s ease-in-out infinite;
-    }
-    
-    .header-box h1, .header-box p, .header-box span, .header-box div {
-        color: #66545e !important;
-        margin: 0;
-    }
-    
-    .header-box .subtitle {
-        color: #66545e !important;
-        font-size: 1.2em;
-        margin-top: 10px;
-    }
-    
-    .header-box:hover {
-        box-shadow: 0 6px 20px rgba(255, 183, 197, 0.15);
-        transform: translateY(-3px);
-    }
-    
-    .subtitle {
-        font-size: 1.2rem;
-        font-weight: 700;
-        margin-top: 0.5rem;
-        padding: 0.5rem 1rem;
-        background: linear-gradient(120deg, #ffb7c5, #ffd1dc);
-        color: #66545e;
-        border-radius: 50px;
-        display: inline-block;
-        box-shadow: 0 4px 8px rgba(255, 183, 197, 0.2);
-    }
-    
-    /* 섹션 헤더 */
-    h2 {
-        font-family: 'Jua', sans-serif;
-        font-size: 1.6rem;
-        padding: 0.8rem 1rem;
-        margin-top: 2rem;
-        margin-bottom: 1rem;
-        color: #66545e;
-        background: linear-gradient(to right, #ffd1dc, #ffe0e6);
-        border-radius: 12px;
-        box-shadow: 0 4px 10px rgba(255, 183, 197, 0.3);
-    }
-    
-    h3 {
-        font-size: 1.3rem;
-        color: #66545e;
-        margin-top: 1.5rem;
-        border-bottom: 3px dashed #ffb7c5;
-        padding-bottom: 5px;
-        display: inline-block;
-    }
-    
-    p, li {
-        font-size: 1.1rem;
-        line-height: 1.5;
-        color: #66545e;
-    }
-    
-    /* 버튼 스타일 */
-    .stButton>button {
-        font-family: 'Jua', sans-serif;
-        background: linear-gradient(to right, #ffb7c5, #ffd1dc);
-        color: white !important;
-        border-radius: 50px;
-        font-weight: bold;
-        border: none;
-        padding: 0.6rem 1.2rem;
-        transition: all 0.3s ease;
-        box-shadow: 0 4px 6px rgba(0,0,0,0.1);
-        width: 100%;
-        margin-top: 8px;
-        text-align: center;
-    }
-    
-    .stButton>button:hover {
-        background: linear-gradient(to right, #ffd1dc, #ffb7c5);
-        transform: translateY(-3px) scale(1.02);
-        box-shadow: 0 6px 12px rgba(0,0,0,0.15);
-    }
-    
-    .stButton>button p {
-        color: white !important;
-        margin: 0;
-    }
-    
-    /* 결과 상자 스타일 수정 - 세로 길이 조정 */
-    .stTextArea>div>div>textarea {
-        max-height: 300px !important;
-        min-height: 150px !important;
-        border-radius: 12px;
-        border: 1px solid #ffd1dc;
-    }
-    
-    /* 텍스트 크기 조화 */
-    .big-emoji {
-        font-size: 2.5rem;
-        margin-bottom: 0.5rem;
-        text-align: center;
-    }
-    
-    /* 확장 패널 */
-    .stExpander {
-        border-radius: 12px;
-        border: 2px solid #ffe0e6;
-        overflow: hidden;
-        transition: all 0.3s ease;
-        box-shadow: 0 2px 5px rgba(0,0,0,0.05);
-        margin-bottom: 1rem;
-    }
-    
-    .stExpander:hover {
-        border-color: #ffb7c5;
-        box-shadow: 0 5px 15px rgba(255, 183, 197, 0.15);
-        transform: translateY(-2px);
-    }
-    
-    /* 입력 필드 */
-    .stTextInput>div>div>input, .stTextArea>div>div>textarea {
-        font-family: 'Gaegu', cursive;
-        font-size: 1.1rem;
-        border-radius: 12px;
-        border: 2px solid #ffe0e6;
-    }
-    
-    .step-card-1, .step-card-2, .step-card-3 {
-        background-color: rgba(255, 255, 255, 0.8);
-        border-radius: 12px;
-        padding: 1rem;
-        margin-bottom: 1rem;
-        box-shadow: 0 4px 6px rgba(0, 0, 0, 0.05);
-        transition: all 0.3s ease;
-    }
-    
-    .step-card-1 h3, .step-card-2 h3, .step-card-3 h3 {
-        font-size: 1.2rem;
-        margin-top: 0;
-    }
-    
-    .step-card-1 p, .step-card-2 p, .step-card-3 p, 
-    .step-card-1 li, .step-card-2 li, .step-card-3 li {
-        font-size: 1rem;
-    }
-    
-    /* 탭 스타일 */
-    .stTabs [data-baseweb="tab-list"] {
-        gap: 0.5rem;
-        background-color: #fff5f2;
-        padding: 0.8rem;
-        border-radius: 50px;
-        margin-bottom: 1.5rem;
-        box-shadow: 0 4px 12px rgba(255, 183, 197, 0.2);
-        border: 2px solid rgba(255, 183, 197, 0.3);
-    }
-    
-    .stTabs [data-baseweb="tab"] {
-        background-color: transparent !important;
-        border-radius: 50px !important;
-        padding: 0.6rem 1.2rem !important;
-        font-family: 'Jua', sans-serif;
-        color: #66545e !important;
-        font-size: 1.4rem !important;  /* 글자 크기 증가 */
-        font-weight: bold !important;  /* 볼드 처리 */
-        border: none !important;
-        transition: all 0.3s ease !important;  /* 부드러운 전환 효과 */
-        letter-spacing: 0.05em !important;  /* 자간 추가 */
-        text-shadow: 0 1px 1px rgba(255, 183, 197, 0.2) !important;  /* 텍스트 그림자 추가 */
-    }
-    
-    .stTabs [data-baseweb="tab"]:hover {
-        background-color: rgba(255, 183, 197, 0.3) !important;  /* 호버 시 배경색 변경 */
-        transform: translateY(-2px) !important;  /* 호버 시 약간 위로 올라가는 효과 */
-        box-shadow: 0 4px 8px rgba(255, 183, 197, 0.2) !important;  /* 호버 시 그림자 효과 */
-    }
-    
-    .stTabs [data-baseweb="tab"][aria-selected="true"] {
-        background-color: #ffb7c5 !important;
-        color: white !important;
-        box-shadow: 0 4px 8px rgba(255, 183, 197, 0.4) !important;
-        transform: translateY(-2px) !important;
-        text-shadow: 0 1px 2px rgba(0,0,0,0.1) !important;
-    }
-    
-    .stTabs [data-baseweb="tab-panel"] {
-        padding: 1rem;
-        background-color: white;
-        border-radius: 12px;
-        box-shadow: 0 2px 8px rgba(0,0,0,0.05);
-        border: 1px solid #ffe0e6;
-    }
-    
-    [data-testid="stHeader"] {
-        background-color: transparent;
-    }
-    
-    /* 토론 꿀팁 박스 */
-    .tip-box {
-        background: linear-gradient(135deg, #fff5f2 0%, #ffe0e6 100%);
-        border-radius: 15px;
-        padding: 15px;
-        margin: 1rem 0;
-        border-left: 5px solid #ffb7c5;
-    }
-    
-    /* 성공 메시지 */
-    .success-box {
-        background: linear-gradient(135deg, #f0f8ff 0%, #e6f7ff 100%);
-        border-radius: 12px;
-        padding: 15px;
-        margin: 1rem 0;
-        border-left: 5px solid #a5d8ff;
-    }
-    
-    /* 경고 메시지 */
-    .warning-box {
-        background: linear-gradient(135deg, #fff9f0 0%, #fff4e6 100%);
-        border-radius: 12px;
-        padding: 15px;
-        margin: 1rem 0;
-        border-left: 5px solid #ffd8a8;
-    }
-    
-    /* 무지개 애니메이션 텍스트 */
-    .rainbow-text {
-        font-weight: bold;
-        animation: rainbow 8s linear infinite;
-    }
-    
-    /* 주제 추천 결과 컨테이너 스타일 */
-    .recommendation-result {
-        background-color: white;
-        border-radius: 12px;
-        padding: 1.5rem;
-        margin-top: 1rem;
-        margin-bottom: 1.5rem;
-        border: 2px solid #ffb7c5;
-        box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1);
-    }
-    
-    /* 결과 표시 영역 - 새로운 스타일 */
-    .result-display {
-        background-color: white;
-        border-radius: 12px;
-        padding: 1.5rem; 
-        margin-bottom: 1.5rem;
-        border: 2px solid #ffb7c5; 
-        box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1);
-        font-size: 1rem;
-        line-height: 1.6;
-    }
-    
-    /* 결과 헤더 스타일 */
-    .result-header {
-        color: #66545e; 
-        border-bottom: 2px dashed #ffb7c5; 
-        padding-bottom: 0.5rem;
-        margin-top: 20px;
-        margin-bottom: 10px;
-    }
-    
-    /* 사이드바 스타일 */
-    .sidebar .sidebar-content {
-        background: linear-gradient(135deg, #fff9f9 0%, #fff5f2 100%);
-        border-radius: 15px;
-        padding: 15px;
-        margin-bottom: 1rem;
-    }
-    
-    /* 탭 컨테이너 스타일 */
-    .tab-container {
-        margin-bottom: 2rem;
-    }
-    
-    /* 입력 필드 컨테이너 */
-    .input-container {
-        margin-bottom: 1rem;
-        display: flex;
-        flex-direction: column;
-        gap: 0.5rem;
-    }
-    
-    /* 버튼 정렬 컨테이너 */
-    .button-container-right {
-        display: flex;
-        justify-content: flex-end;
-        margin-top: 1rem;
-    }
-    
-    .button-container-center {
-        display: flex;
-        justify-content: center;
-        margin-top: 1rem;
-    }
-    
-    /* 카드 컨테이너 */
-    .card-container {
-        background-color: white;
-        border-radius: 12px;
-        padding: 1.5rem;
-        margin-bottom: 1.5rem;
-        box-shadow: 0 2px 8px rgba(0,0,0,0.05);
-        border: 1px solid #ffe0e6;
-    }
-    
-    /* 특수 구분선 */
-    .divider {
-        border-bottom: 2px dashed #ffb7c5;
-        margin: 1.5rem 0;
-    }
-    
-    /* 강조 텍스트 */
-    .highlight-text {
-        background-color: #fff5f2;
-        padding: 0.2rem 0.5rem;
-        border-radius: 4px;
-        font-weight: bold;
-        color: #66545e;
-    }
-</style>
-""", unsafe_allow_html=True)
+# CSS는 static/styles.css에 모아 두고 세션마다 한 번만 주입 (다시 실행될 때마다 CSS를 보내지 않음)
+STYLESHEET_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static", "styles.css")
+
+@st.cache_resource
+def get_stylesheet():
+    """압축하고 내용 해시를 붙인 스타일시트를 프로세스당 한 번만 만드는 함수"""
+    return Stylesheet.load(STYLESHEET_PATH)
+
+def inject_stylesheet():
+    """
+    이 세션에 아직 주입하지 않은(또는 내용이 바뀐) 스타일시트만 주입하는 함수
+    주입된 <style>은 페이지 <head>에 남으므로, 주입을 보낸 실행이 끝까지 간 다음 실행부터는 아무것도 보내지 않습니다.
+    """
+    stylesheet = get_stylesheet()
+    if st.session_state.get("stylesheet_digest") == stylesheet.digest:
+        return
+    components.html(stylesheet.injection_html(), height=0)
+    # 브라우저가 iframe을 실행하기 전에 버튼 클릭 등으로 이 실행이 끊기면 <style>이 들어가지 않으므로,
+    # 여기서는 보내기만 하고 주입했다는 기록은 실행이 끝까지 간 뒤에 남김 (confirm_stylesheet)
+    st.session_state.stylesheet_pending = stylesheet.digest
+
+def confirm_stylesheet():
+    """이번 실행에서 보낸 스타일시트를 주입한 것으로 기록하는 함수 (화면 실행의 맨 끝에서 호출)"""
+    pending = st.session_state.pop("stylesheet_pending", None)
+    if pending is not None:
+        st.session_state.stylesheet_digest = pending
+
+inject_stylesheet()
+
 
 # ============================
 # 사이드바 추가
@@ -469,16 +142,42 @@ with st.sidebar:
         - 모든 학생이 최소 한 번씩 의견을 말할 수 있도록 해주세요.
         """)
         # ============================
-# API 키 설정 및 초기화 부분
+# 설정 읽기 및 API 키 확인 부분
 # ============================
+def get_setting(name, default=None):
+    """
+    환경 변수에 있으면 환경 변수를, 없으면 Streamlit secrets 값을 돌려주는 함수
+    (부하 시험처럼 secrets.toml 없이 환경 변수만으로 실행하는 경우도 지원)
+
+    매개변수:
+    - name (str): 설정 이름 (예: "GEMINI_RPM_LIMIT")
+    - default: 어디에도 없을 때 돌려줄 값
+
+    반환값:
+    - 설정 값 (환경 변수에서 읽으면 문자열)
+    """
+    if name in os.environ:
+        return os.environ[name]
+    # secrets.toml이 없으면 기본값 사용 (st.secrets.get()은 파일이 없으면 화면에 오류를 띄움)
+    if not st.secrets.load_if_toml_exists():
+        return default
+    return st.secrets.get(name, default)
+
+# Gemini 제공자 (환경 변수 또는 Streamlit secrets의 GEMINI_PROVIDER)
+# - "gemini": 실제 Gemini API
+# - "fake": 네트워크 없이 템플릿 형식의 가짜 응답을 돌려주는 fake_provider.FakeModelPool
+#   (캐시, 재시도, 속도 제한, 스트리밍을 오프라인으로 시험할 때 사용. API 키가 필요 없음)
+GEMINI_PROVIDER = str(get_setting("GEMINI_PROVIDER", "gemini")).lower()
+
+# 여기서는 API 키가 있는지만 확인합니다.
+# google.generativeai를 가져오고 genai.configure()로 구성하는 일은 무거우므로(gRPC, protobuf 포함)
+# 화면을 그리는 동안 백그라운드에서 한 번만 실행합니다 (get_gemini_service()의 ModelPool 참고).
 try:
-    api_key_loaded = False
-    # Streamlit Secrets에서 API 키 로드
-    if "GEMINI_API_KEY" in st.secrets:
-        GEMINI_API_KEY = st.secrets["GEMINI_API_KEY"]
-        genai.configure(api_key=GEMINI_API_KEY)  # Gemini API 구성
-        api_key_loaded = True
-    else:
+    GEMINI_API_KEY = get_setting("GEMINI_API_KEY")
+    if GEMINI_PROVIDER == "fake":
+        # 가짜 제공자는 API 키 없이 동작
+        pass
+    elif not GEMINI_API_KEY:
         # API 키가 설정되지 않은 경우 오류 메시지 표시 및 앱 중지
         st.error("오류: Gemini API 키가 Streamlit secrets에 설정되지 않았습니다. 좌측 메뉴의 'Settings' > 'Secrets'에서 키를 설정해주세요.")
         st.stop()  # API 키 없으면 앱 중지
@@ -577,127 +276,1068 @@ FEEDBACK_PROMPT_TEMPLATE = """
 # 피드백 생성 시작:
 """
 
+# 4. 짧은(compact) 템플릿
+# - 위 세 템플릿과 같은 역할·입력·출력 형식을 쓰되, 출처 표기("Source 31")와 첨부 문서 예시 언급,
+#   모델의 답에 영향을 주지 않는 설명 문장을 뺀 변형 (학생마다 보내는 입력 토큰과 첫 글자 지연을 줄임)
+# - 출력 형식의 제목·항목 이름([ ] 앞부분)은 글자 하나까지 같아야 함 (화면의 주제 추출이 이 형식에 기대고 있음)
+COMPACT_RECOMMEND_TOPIC_PROMPT_TEMPLATE = """
+# 역할: 경기 토론 수업 모형 전문가 (초등학교 6학년 대상)
+# 목표: 관심사에 맞춰 '다름과 마주하기' 단계에 알맞은 토론 주제 3가지를 추천한다. 찬반 양측이 균형 있게 논거를 펼칠 수 있고 사회적 관련성이 있어야 한다.
+# 출력 형식:
+## 주제 [번호]: [주제명]
+### 간단한 배경 정보: [주제가 왜 중요하고 논쟁적인지 초등학생 눈높이에서 1-2문장 설명]
+### 핵심 쟁점: [토론에서 다루어야 할 주요 질문이나 논쟁점 2-3가지 (예: ~하면 어떤 점이 좋을까?, ~하면 어떤 문제가 생길까?)]
+
+# 입력 정보:
+학년: 초등학교 6학년
+관심사: {interest_input}
+
+# 지침:
+- 6학년이 이해하기 쉬운 구체적인 용어를 쓴다. ('학교 스마트폰 금지', '종이책 vs 디지털 기기' 수준의 주제)
+- 특정 견해를 주입하지 않도록 중립적으로 쓴다.
+
+# 추천 주제 생성 시작:
+"""
+
+COMPACT_ARGUMENT_IDEAS_PROMPT_TEMPLATE = """
+# 역할: 경기 토론 수업 모형 토론 코치 (초등학교 6학년 대상)
+# 목표: 토론 주제에 대해 '다름을 이해하기' 단계를 준비하는 학생에게 찬성·반대 논거 아이디어를 각각 3가지씩 제시한다.
+# 출력 형식:
+## [{topic_input}] 토론을 위한 논거 아이디어
+
+### 찬성 측 논거 아이디어 (이렇게 생각해 볼 수 있어요):
+1. [찬성 논거 1 - 학생들이 이해하기 쉬운 구체적인 이유 포함]
+2. [찬성 논거 2 - 학생들이 이해하기 쉬운 구체적인 이유 포함]
+3. [찬성 논거 3 - 학생들이 이해하기 쉬운 구체적인 이유 포함]
+
+### 반대 측 논거 아이디어 (이렇게 생각해 볼 수 있어요):
+1. [반대 논거 1 - 학생들이 이해하기 쉬운 구체적인 이유 포함]
+2. [반대 논거 2 - 학생들이 이해하기 쉬운 구체적인 이유 포함]
+3. [반대 논거 3 - 학생들이 이해하기 쉬운 구체적인 이유 포함]
+
+# 입력 정보:
+토론 주제: {topic_input}
+
+# 지침:
+- 6학년 수준에 맞게 쉽고 구체적으로, 각 논거에 간단하고 분명한 이유를 붙인다.
+- 질문과 반박으로 이어질 수 있는 핵심 주장을 담고, 중립적인 표현을 쓴다.
+
+# 논거 아이디어 생성 시작:
+"""
+
+COMPACT_FEEDBACK_PROMPT_TEMPLATE = """
+# 역할: 경기 토론 수업 모형 피드백 조력자 (초등학교 6학년 대상)
+# 목표: 학생의 의견을 분석하고 '다름을 이해하기'와 '다름과 공존하기'를 지향하는 건설적인 피드백을 준다.
+# 출력 형식:
+### 학생 의견 분석 및 피드백
+
+* **주제 관련성:** [입력된 내용이 토론 주제와 얼마나 관련 있는지 간단히 평가 (예: 주제와 직접적으로 관련 있어요, 주제와 조금 관련 있어요, 주제와 관련성을 찾기 어려워요)]
+* **입장 구분:** [찬성, 반대, 중립 중 어느 입장에 더 가까운지 또는 명확한 입장이 드러나는지 평가 (예: 찬성 입장에 가까워 보여요, 반대 입장이 명확하게 드러나요, 여러 입장을 함께 고려하고 있어요)]
+* **더 생각해 볼 점 (건설적 피드백):** [학생의 논거를 발전시키기 위한 구체적인 제안 1가지. '다름과 공존하기'를 염두에 둔 질문 형태나 근거 보강, 명확화 제안 등]
+
+# 입력 정보:
+토론 주제: {topic_input}
+학생 입력 내용: {student_argument_input}
+
+# 지침:
+- 긍정적이고 격려하는 어조로 쓰고, 특정 입장을 정답으로 여기거나 강요하지 않는다.
+- '더 생각해 볼 점'은 근거·예시 추가, 다른 관점 상상하기, 핵심을 한 문장으로 말하기, 이유 자세히 말하기 중 하나를 질문 형태로 제안한다.
+
+# 피드백 생성 시작:
+"""
+
+# 5. 형식 정리 프롬프트 템플릿
+# - 응답이 출력 형식에 맞지 않아 기록으로 읽지 못했을 때, 처음부터 다시 만들지 않고 형식만 고쳐 달라고 하는 프롬프트
+# - 역할·지침 없이 출력 형식과 원래 응답만 보내고, 더 가벼운 모델(FORMAT_REPAIR_MODEL)을 씀
+FORMAT_REPAIR_PROMPT_TEMPLATE = """
+# 역할: 글 형식 정리 도우미
+# 목표: 아래 원래 글의 내용은 바꾸지 말고, 출력 형식의 제목과 항목 이름에 글자 하나까지 맞춰 다시 쓴다. [ ] 부분에 원래 글의 내용을 넣고, 다른 말은 덧붙이지 않는다.
+# 출력 형식:
+{output_format}
+
+# 원래 글:
+{response}
+
+# 형식 정리 시작:
+"""
+
+# 6. 찬반 논거 절반 프롬프트 템플릿 (ARGUMENT_MODE = "split"에서 사용)
+# - 찬성과 반대 논거를 따로 요청하는 더 짧은 프롬프트. {side}에 "찬성" 또는 "반대"가 들어감
+# - 두 응답을 합치면 ARGUMENT_IDEAS_PROMPT_TEMPLATE의 출력 형식과 같아짐 (merge_argument_halves 참고)
+# - 출처 표기를 뺀 짧은 변형: COMPACT_ARGUMENT_SIDE_PROMPT_TEMPLATE
+ARGUMENT_SIDE_PROMPT_TEMPLATE = """
+# 역할: 경기 토론 수업 모형 토론 코치 (초등학교 6학년 대상)
+# 목표: 토론 주제에 대해 '다름을 이해하기'(Source 18) 단계를 준비하는 학생에게 {side} 측 논거 아이디어 3가지를 제시한다. 반대편 논거는 쓰지 않는다.
+# 출력 형식:
+### {side} 측 논거 아이디어 (이렇게 생각해 볼 수 있어요):
+1. [{side} 논거 1 - 학생들이 이해하기 쉬운 구체적인 이유 포함]
+2. [{side} 논거 2 - 학생들이 이해하기 쉬운 구체적인 이유 포함]
+3. [{side} 논거 3 - 학생들이 이해하기 쉬운 구체적인 이유 포함]
+
+# 입력 정보:
+토론 주제: {topic_input}
+
+# 지침:
+- 6학년 수준(Source 22, 23)에 맞게 쉽고 구체적으로, 각 논거에 간단하고 분명한 이유를 붙인다.
+- 질문과 반박(Source 18, 19)으로 이어질 수 있는 핵심 주장을 담고, 중립적인 표현(Source 27)을 쓴다.
+
+# {side} 측 논거 생성 시작:
+"""
+
+COMPACT_ARGUMENT_SIDE_PROMPT_TEMPLATE = """
+# 역할: 경기 토론 수업 모형 토론 코치 (초등학교 6학년 대상)
+# 목표: 토론 주제에 대해 '다름을 이해하기' 단계를 준비하는 학생에게 {side} 측 논거 아이디어 3가지를 제시한다. 반대편 논거는 쓰지 않는다.
+# 출력 형식:
+### {side} 측 논거 아이디어 (이렇게 생각해 볼 수 있어요):
+1. [{side} 논거 1 - 학생들이 이해하기 쉬운 구체적인 이유 포함]
+2. [{side} 논거 2 - 학생들이 이해하기 쉬운 구체적인 이유 포함]
+3. [{side} 논거 3 - 학생들이 이해하기 쉬운 구체적인 이유 포함]
+
+# 입력 정보:
+토론 주제: {topic_input}
+
+# 지침:
+- 6학년 수준에 맞게 쉽고 구체적으로, 각 논거에 간단하고 분명한 이유를 붙인다.
+- 질문과 반박으로 이어질 수 있는 핵심 주장을 담고, 중립적인 표현을 쓴다.
+
+# {side} 측 논거 생성 시작:
+"""
+
+# 7. 주제 하나 바꾸기 프롬프트 템플릿
+# - 추천받은 세 주제 중 하나가 마음에 들지 않을 때, 세 주제를 모두 다시 만들지 않고 한 가지만 새로 요청하는 프롬프트
+# - 출력 형식은 주제 추천과 같고(주제 [1] 하나만), 지금까지 보여 준 주제는 {excluded_topics}로 넣어 제외함
+# - 출처 표기를 뺀 짧은 변형: COMPACT_REPLACE_TOPIC_PROMPT_TEMPLATE
+REPLACE_TOPIC_PROMPT_TEMPLATE = """
+# 역할: 경기 토론 수업 모형 전문가 (초등학교 6학년 대상)
+# 목표: 주어진 관심사에 맞춰 '다름과 마주하기' 단계에 알맞은 토론 주제를 딱 1가지만 새로 추천한다. 이미 보여 준 주제와 같거나 비슷한 주제는 제외한다. 찬성과 반대 양측이 균형 있게 논거를 펼칠 수 있어야 한다(Source 31).
+# 출력 형식:
+## 주제 [1]: [주제명]
+### 간단한 배경 정보: [주제가 왜 중요하고 논쟁적인지 초등학생 눈높이에서 1-2문장 설명]
+### 핵심 쟁점: [토론에서 다루어야 할 주요 질문이나 논쟁점 2-3가지 (예: ~하면 어떤 점이 좋을까?, ~하면 어떤 문제가 생길까?)]
+
+# 입력 정보:
+학년: 초등학교 6학년
+관심사: {interest_input}
+이미 보여 준 주제 (제외):
+{excluded_topics}
+
+# 지침:
+- 주제는 한 가지만 쓰고 다른 말은 덧붙이지 않는다.
+- 6학년이 이해하기 쉬운 구체적인 용어(Source 22, 23)를 쓰고, 특정 견해를 주입하지 않도록 중립적으로 쓴다(Source 5).
+
+# 바꿀 주제 생성 시작:
+"""
+
+COMPACT_REPLACE_TOPIC_PROMPT_TEMPLATE = """
+# 역할: 경기 토론 수업 모형 전문가 (초등학교 6학년 대상)
+# 목표: 관심사에 맞는 '다름과 마주하기' 단계 토론 주제를 딱 1가지만 새로 추천한다. 이미 보여 준 주제와 같거나 비슷한 주제는 빼고, 찬반 양측이 균형 있게 논거를 펼칠 수 있어야 한다.
+# 출력 형식:
+## 주제 [1]: [주제명]
+### 간단한 배경 정보: [주제가 왜 중요하고 논쟁적인지 초등학생 눈높이에서 1-2문장 설명]
+### 핵심 쟁점: [토론에서 다루어야 할 주요 질문이나 논쟁점 2-3가지 (예: ~하면 어떤 점이 좋을까?, ~하면 어떤 문제가 생길까?)]
+
+# 입력 정보:
+학년: 초등학교 6학년
+관심사: {interest_input}
+이미 보여 준 주제 (제외):
+{excluded_topics}
+
+# 지침:
+- 주제는 한 가지만 쓰고 다른 말은 덧붙이지 않는다.
+- 6학년이 이해하기 쉬운 구체적인 용어로, 특정 견해를 주입하지 않도록 중립적으로 쓴다.
+
+# 바꿀 주제 생성 시작:
+"""
+
+# 프롬프트 변형 (환경 변수 또는 Streamlit secrets의 PROMPT_VARIANT)
+# - "full": 원래 템플릿 (기본값)
+# - "compact": 짧은 템플릿 (템플릿별 토큰 수 비교: python tools/prompt_tokens.py)
+# 프롬프트가 달라지므로 변형마다 응답 캐시가 따로 쌓입니다.
+PROMPT_VARIANTS = {
+    "full": (RECOMMEND_TOPIC_PROMPT_TEMPLATE, ARGUMENT_IDEAS_PROMPT_TEMPLATE, FEEDBACK_PROMPT_TEMPLATE,
+             ARGUMENT_SIDE_PROMPT_TEMPLATE, REPLACE_TOPIC_PROMPT_TEMPLATE),
+    "compact": (COMPACT_RECOMMEND_TOPIC_PROMPT_TEMPLATE, COMPACT_ARGUMENT_IDEAS_PROMPT_TEMPLATE,
+                COMPACT_FEEDBACK_PROMPT_TEMPLATE, COMPACT_ARGUMENT_SIDE_PROMPT_TEMPLATE,
+                COMPACT_REPLACE_TOPIC_PROMPT_TEMPLATE),
+}
+PROMPT_VARIANT = str(get_setting("PROMPT_VARIANT", "full")).lower()
+if PROMPT_VARIANT not in PROMPT_VARIANTS:
+    PROMPT_VARIANT = "full"
+(RECOMMEND_TOPIC_PROMPT_TEMPLATE, ARGUMENT_IDEAS_PROMPT_TEMPLATE, FEEDBACK_PROMPT_TEMPLATE,
+ ARGUMENT_SIDE_PROMPT_TEMPLATE, REPLACE_TOPIC_PROMPT_TEMPLATE) = PROMPT_VARIANTS[PROMPT_VARIANT]
+
+# 기본 Gemini 모델명
+DEFAULT_MODEL = "gemini-2.0-flash"
+
+# 템플릿 이름 (캐시 TTL, 통계 구분에 사용)
+TEMPLATE_RECOMMEND_TOPIC = "recommend_topic"
+TEMPLATE_ARGUMENT_IDEAS = "argument_ideas"
+TEMPLATE_FEEDBACK = "feedback"
+TEMPLATE_FORMAT_REPAIR = "format_repair"
+TEMPLATE_ARGUMENT_SIDE = "argument_side"
+TEMPLATE_REPLACE_TOPIC = "replace_topic"
+
+# 템플릿 이름 → 프롬프트 템플릿 (형식 정리 요청에 원래 출력 형식을 넣을 때 사용)
+PROMPT_TEMPLATES = {
+    TEMPLATE_RECOMMEND_TOPIC: RECOMMEND_TOPIC_PROMPT_TEMPLATE,
+    TEMPLATE_ARGUMENT_IDEAS: ARGUMENT_IDEAS_PROMPT_TEMPLATE,
+    TEMPLATE_FEEDBACK: FEEDBACK_PROMPT_TEMPLATE,
+    TEMPLATE_REPLACE_TOPIC: REPLACE_TOPIC_PROMPT_TEMPLATE,
+}
+# 형식 정리에 쓰는 모델 (내용을 새로 만들지 않으므로 더 싸고 빠른 모델로 충분)
+FORMAT_REPAIR_MODEL = get_setting("FORMAT_REPAIR_MODEL", "gemini-2.0-flash-lite")
+
+# 템플릿별 응답 캐시 유지 시간(초)
+# - 주제 추천과 논거 아이디어는 수업 시간 내내 재사용, 피드백은 같은 글을 다시 보낼 때만 재사용
+CACHE_TTL_BY_TEMPLATE = {
+    TEMPLATE_RECOMMEND_TOPIC: 6 * 60 * 60,
+    TEMPLATE_ARGUMENT_IDEAS: 6 * 60 * 60,
+    TEMPLATE_FEEDBACK: 30 * 60,
+    TEMPLATE_FORMAT_REPAIR: 6 * 60 * 60,
+    TEMPLATE_ARGUMENT_SIDE: 6 * 60 * 60,
+    TEMPLATE_REPLACE_TOPIC: 6 * 60 * 60,
+}
+# 응답 캐시 메모리 상한 (바이트)
+CACHE_MAX_BYTES = 32 * 1024 * 1024
+# 여러 프로세스가 함께 쓰고 재시작 후에도 남는 SQLite 디스크 캐시
+# (Streamlit secrets의 DISK_CACHE_PATH로 위치 변경, 빈 문자열이면 사용하지 않음)
+DISK_CACHE_PATH = get_setting(
+    "DISK_CACHE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "responses.sqlite3"),
+)
+DISK_CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+# Gemini 분당 요청/토큰 한도 (요금제에 맞게 Streamlit secrets의 GEMINI_RPM_LIMIT, GEMINI_TPM_LIMIT로 조정)
+GEMINI_RPM_LIMIT = int(get_setting("GEMINI_RPM_LIMIT", 15))
+GEMINI_TPM_LIMIT = int(get_setting("GEMINI_TPM_LIMIT", 1_000_000))
+# 속도 제한 대기열에서 기다릴 최대 시간(초)
+RATE_LIMIT_MAX_WAIT = 120
+# 템플릿별 예상 출력 토큰 수 (분당 토큰 한도 예약량 계산용)
+EXPECTED_OUTPUT_TOKENS = {
+    TEMPLATE_RECOMMEND_TOPIC: 700,
+    TEMPLATE_ARGUMENT_IDEAS: 800,
+    TEMPLATE_FEEDBACK: 500,
+    TEMPLATE_FORMAT_REPAIR: 800,
+    TEMPLATE_ARGUMENT_SIDE: 400,
+    TEMPLATE_REPLACE_TOPIC: 250,
+}
+
+# 템플릿별 한 번의 생성 제한 시간(초) - 넘기면 포기하고 다시 시도
+GENERATION_DEADLINE_BY_TEMPLATE = {
+    TEMPLATE_RECOMMEND_TOPIC: 45,
+    TEMPLATE_ARGUMENT_IDEAS: 45,
+    TEMPLATE_FEEDBACK: 30,
+    TEMPLATE_FORMAT_REPAIR: 30,
+    TEMPLATE_ARGUMENT_SIDE: 30,
+    TEMPLATE_REPLACE_TOPIC: 30,
+}
+# 일시적인 오류(429, 503 등) 재시도: 첫 시도 포함 최대 횟수와 대기 시간(초)
+RETRY_MAX_ATTEMPTS = 3
+RETRY_BASE_DELAY = 1.0
+RETRY_MAX_DELAY = 20.0
+# 회로 차단기: 연속 실패 횟수와 호출을 멈추는 시간(초)
+BREAKER_FAILURE_THRESHOLD = 5
+BREAKER_RESET_SECONDS = 30
+
+# 버튼 중복 클릭 방지기 설정
+# - 동시에 실행할 생성 작업 수 (넘는 작업은 스레드가 빌 때까지 기다림)
+INFLIGHT_MAX_WORKERS = int(get_setting("INFLIGHT_MAX_WORKERS", 32))
+# - 화면 실행이 생성 작업을 기다릴 최대 시간(초): 시도마다의 대기열 대기와 생성 제한 시간, 시도 사이의 재시도 대기를
+#   모두 더한 값. 이보다 오래 걸리면 작업이 멈춘 것으로 보고 학생에게 다시 누르도록 안내
+INFLIGHT_TIMEOUT_BY_TEMPLATE = {
+    template: RETRY_MAX_ATTEMPTS * (RATE_LIMIT_MAX_WAIT + deadline) + (RETRY_MAX_ATTEMPTS - 1) * RETRY_MAX_DELAY
+    for template, deadline in GENERATION_DEADLINE_BY_TEMPLATE.items()
+}
+# - ARGUMENT_MODE = "split"에서 찬성·반대 절반을 만드는 스레드 수 (작업 하나가 두 개씩 씀)
+ARGUMENT_HALF_MAX_WORKERS = 2 * INFLIGHT_MAX_WORKERS
+
+# 추천 주제의 논거 아이디어 미리 생성 설정
+# - 최근 1분 요청 수가 분당 한도의 이 비율을 넘으면 미리 생성을 건너뜀 (학생의 직접 요청을 우선)
+PREFETCH_QUOTA_SHARE = 0.5
+# - 프로세스 전체에서 동시에 실행할 미리 생성 작업 수
+PREFETCH_MAX_WORKERS = 2
+
+# 미리 만들어 둔 주제 추천/논거 아이디어 라이브러리 (비슷한 입력은 API 호출 없이 바로 답함)
+TOPIC_LIBRARY_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "topic_library.json")
+# 라이브러리 답을 쓸 만큼 비슷하다고 볼 최소 점수 (0~1, 글자 2개 단위 겹침 정도)
+TOPIC_LIBRARY_MIN_SCORE = 0.75
+
+# 찬반 논거 아이디어 생성 방식 (환경 변수 또는 Streamlit secrets의 ARGUMENT_MODE)
+# - "single": 찬성 3가지와 반대 3가지를 한 번의 요청으로 차례로 생성 (기본값)
+# - "split": 찬성과 반대를 두 개의 작은 요청으로 동시에 생성해 합침. 기다리는 시간은 대략 긴 쪽 절반만큼이지만
+#   요청 수가 두 배가 되어 분당 요청 한도를 더 씀 (비교: python tools/bench_journeys.py --argument-mode split)
+ARGUMENT_MODE = str(get_setting("ARGUMENT_MODE", "single")).lower()
+if ARGUMENT_MODE not in ("single", "split"):
+    ARGUMENT_MODE = "single"
+ARGUMENT_SIDES = ("찬성", "반대")
+
+# 스트리밍 모드: 생성되는 글자를 기다리지 않고 바로바로 화면에 표시
+# (Streamlit secrets에 STREAM_RESPONSES = false 로 끌 수 있음)
+STREAM_RESPONSES = str(get_setting("STREAM_RESPONSES", True)).lower() not in ("false", "0", "no")
+
+# 준비 상태 확인 서버 포트 (Streamlit secrets의 READINESS_PORT, 없으면 띄우지 않음)
+# 예: READINESS_PORT = 8502 → http://<호스트>:8502/ready 가 준비되면 200, 준비 중이면 503
+READINESS_PORT = get_setting("READINESS_PORT")
+
+# 화면 구성 방식 (Streamlit secrets의 NAVIGATION_MODE)
+# - "tabs": 다섯 기능을 탭으로 보여 줌. 탭은 화면에서만 숨겨질 뿐, 다시 실행될 때마다 모든 탭의 코드가 실행됨
+# - "sections": 고른 기능(섹션)의 코드만 실행. 주소의 ?section=feedback 처럼 특정 기능으로 바로 연결 가능
+NAVIGATION_MODE = get_setting("NAVIGATION_MODE", "tabs")
+
+# Gemini 호출 계측 (운영자 화면과 지표 파일)
+# - OPERATOR_PASSWORD: 운영자 화면(주소 뒤에 ?page=operator) 비밀번호. 없으면 운영자 화면을 열지 않음
+# - METRICS_FILE_PATH: 지표를 텍스트 형식(Prometheus textfile)으로 써 둘 파일 경로. 없으면 쓰지 않음
+OPERATOR_PASSWORD = get_setting("OPERATOR_PASSWORD")
+METRICS_FILE_PATH = get_setting("METRICS_FILE_PATH")
+# 지표 파일을 다시 쓰는 간격(초)과 히스토그램이 보여 줄 최근 기간(초)
+METRICS_FILE_INTERVAL = 15
+TELEMETRY_WINDOW_SECONDS = 10 * 60
+
+# 선생님용 일괄 피드백 (주소 뒤에 ?page=batch)
+# - TEACHER_PASSWORD: 일괄 피드백 화면 비밀번호. 없으면 화면을 열지 않음 (학생이 할당량을 한꺼번에 쓰지 않도록)
+# - BATCH_MAX_WORKERS: 동시에 만들 피드백 수 (실제 요청은 모두 공용 속도 제한기를 거침)
+TEACHER_PASSWORD = get_setting("TEACHER_PASSWORD")
+BATCH_MAX_WORKERS = int(get_setting("BATCH_MAX_WORKERS", 4))
+# 한 번에 올릴 수 있는 최대 의견 수와 진행 상황을 다시 그리는 간격(초)
+BATCH_MAX_ROWS = 60
+BATCH_REFRESH_SECONDS = 1.0
+
+# 가짜 제공자(GEMINI_PROVIDER = "fake") 설정 - 환경 변수 또는 Streamlit secrets
+# - FAKE_LATENCY: 첫 조각까지의 지연 분포 ("fixed:1.0", "uniform:0.5:2", "lognormal:중앙값:시그마")
+# - FAKE_CHUNK_DELAY: 스트리밍 조각 사이 지연(초)
+# - FAKE_PREFILL_MS_PER_1K: 프롬프트 1000토큰마다 첫 조각 전에 더 기다릴 시간(ms)
+# - FAKE_ERROR_RATE_429 / FAKE_ERROR_RATE_503: 오류를 낼 확률 (0~1)
+# - FAKE_HANG_RATE / FAKE_HANG_SECONDS: 응답이 멈출 확률과 멈추는 시간(초)
+# - FAKE_QUOTA_RPM: 가짜 서버 쪽 분당 요청 할당량 (0이면 없음, 넘으면 429)
+# - FAKE_SEED: 난수 시드 (같은 시드면 같은 순서로 오류·지연이 나옴)
+FAKE_PROVIDER_SETTINGS = {
+    "latency": str(get_setting("FAKE_LATENCY", "fixed:0")),
+    "chunk_delay": float(get_setting("FAKE_CHUNK_DELAY", 0.0)),
+    "error_rate_429": float(get_setting("FAKE_ERROR_RATE_429", 0.0)),
+    "error_rate_503": float(get_setting("FAKE_ERROR_RATE_503", 0.0)),
+    "hang_rate": float(get_setting("FAKE_HANG_RATE", 0.0)),
+    "hang_seconds": float(get_setting("FAKE_HANG_SECONDS", 120.0)),
+    "quota_rpm": int(get_setting("FAKE_QUOTA_RPM", 0)),
+    "seed": get_setting("FAKE_SEED"),
+    "prefill_per_token": float(get_setting("FAKE_PREFILL_MS_PER_1K", 0.0)) / 1000 / 1000,
+}
+
 # ============================
 # 유틸리티 함수 정의 부분
 # ============================
 
+# 모든 세션이 공유하는 Gemini 호출 서비스 (프로세스당 하나)
+@st.cache_resource
+def get_gemini_service():
+    """
+    응답 캐시, 동시 요청 합치기, 모델 풀, 속도 제한기, 재시도/회로 차단기를 포함한 Gemini 호출 서비스를 만드는 함수
+    st.cache_resource로 감싸서 같은 프로세스의 모든 세션이 하나의 캐시, 진행 중 요청 목록, 클라이언트를 공유합니다.
+    """
+    cache = ResponseCache(max_bytes=CACHE_MAX_BYTES, ttl_by_template=CACHE_TTL_BY_TEMPLATE)
+    disk_cache = None
+    if DISK_CACHE_PATH:
+        try:
+            disk_cache = SqliteResponseCache(DISK_CACHE_PATH, max_bytes=DISK_CACHE_MAX_BYTES)
+        except Exception:
+            # 디스크 캐시를 쓸 수 없어도 메모리 캐시만으로 동작
+            traceback.print_exc()
+    # 모델명마다 미리 만들어 둔 클라이언트를 모든 세션이 재사용
+    # (라이브러리 가져오기와 구성은 백그라운드 스레드에서 진행되어 첫 화면을 막지 않음)
+    # 가짜 제공자도 같은 모양이라 캐시, 속도 제한, 재시도는 실제와 똑같이 거침
+    if GEMINI_PROVIDER == "fake":
+        models = FakeModelPool(**FAKE_PROVIDER_SETTINGS)
+    else:
+        models = ModelPool(api_key=GEMINI_API_KEY)
+    models.warm_async([DEFAULT_MODEL])
+    # 모든 실제 API 요청이 거쳐 가는 분당 요청/토큰 제한 (세션별로 공평하게 차례를 줌)
+    limiter = RateLimiter(GEMINI_RPM_LIMIT, GEMINI_TPM_LIMIT)
+    # 일시적인 오류는 백오프 후 재시도하고, 계속 실패하면 잠시 호출을 멈춤
+    retry_policy = RetryPolicy(RETRY_MAX_ATTEMPTS, RETRY_BASE_DELAY, RETRY_MAX_DELAY)
+    breaker = CircuitBreaker(BREAKER_FAILURE_THRESHOLD, BREAKER_RESET_SECONDS)
+    # 호출마다 결과, 대기·지연 시간, 토큰 수를 최근 구간 히스토그램으로 모음 (운영자 화면과 지표 파일용)
+    telemetry = Telemetry(window_seconds=TELEMETRY_WINDOW_SECONDS,
+                          limits={"rpm": GEMINI_RPM_LIMIT, "tpm": GEMINI_TPM_LIMIT})
+    if METRICS_FILE_PATH:
+        # 지표 텍스트를 주기적으로 파일에 써 둠 (node_exporter의 textfile 수집기 등이 읽어 감)
+        MetricsFileWriter(METRICS_FILE_PATH, telemetry.render_text, interval=METRICS_FILE_INTERVAL).start()
+    return GeminiService(cache, SingleFlight(), models, limiter, retry_policy, breaker,
+                         output_tokens_by_template=EXPECTED_OUTPUT_TOKENS,
+                         queue_timeout=RATE_LIMIT_MAX_WAIT,
+                         deadline_by_template=GENERATION_DEADLINE_BY_TEMPLATE,
+                         disk_cache=disk_cache, telemetry=telemetry)
+
+# 준비 상태 확인 서버 (프로세스당 하나, READINESS_PORT가 있을 때만)
+@st.cache_resource
+def start_readiness_server():
+    """
+    GET /ready로 준비 상태를 알려 주는 HTTP 서버를 띄우는 함수
+    Gemini 클라이언트 준비가 끝나면 200, 아직이면 503을 돌려줍니다.
+
+    반환값:
+    - ReadinessServer: 실행 중인 서버 또는 설정이 없거나 포트를 열 수 없으면 None
+    """
+    if not READINESS_PORT:
+        return None
+    service = get_gemini_service()
+    try:
+        return ReadinessServer(int(READINESS_PORT), check=service.models.stats).start()
+    except OSError:
+        # 같은 포트를 다른 프로세스가 쓰고 있어도 앱은 계속 동작
+        traceback.print_exc()
+        return None
+
+# 로컬 주제 라이브러리 (프로세스당 한 번만 불러와 색인)
+@st.cache_resource
+def get_topic_library():
+    """data/topic_library.json을 불러와 글자 n-그램 색인을 만드는 함수"""
+    return TopicLibrary.load(TOPIC_LIBRARY_PATH, min_score=TOPIC_LIBRARY_MIN_SCORE)
+
+# 버튼 중복 클릭 방지기 (프로세스당 하나)
+@st.cache_resource
+def get_inflight_guard():
+    """
+    세션·동작마다 진행 중인 생성 작업을 기억하는 객체를 만드는 함수
+    같은 입력으로 버튼을 다시 누르면 새로 요청하지 않고 진행 중인 생성에 이어 붙습니다.
+    """
+    return InflightGuard(telemetry=get_gemini_service().telemetry, max_workers=INFLIGHT_MAX_WORKERS)
+
+# 찬성·반대 절반 생성 스레드 풀 (프로세스당 하나)
+@st.cache_resource
+def get_argument_half_executor():
+    """ARGUMENT_MODE = "split"에서 찬성·반대 절반을 동시에 만드는 제한된 스레드 풀을 만드는 함수"""
+    return ThreadPoolExecutor(max_workers=ARGUMENT_HALF_MAX_WORKERS, thread_name_prefix="argument-half")
+
+# 추천 주제 논거 아이디어 미리 생성기 (프로세스당 하나)
+@st.cache_resource
+def get_prefetcher():
+    """
+    모든 세션이 공유하는 미리 생성 스레드 풀을 만드는 함수
+    속도 제한 대기열에 기다리는 요청이 있거나, 최근 요청 수가 분당 한도의
+    PREFETCH_QUOTA_SHARE를 넘으면 작업을 건너뜁니다.
+    """
+    service = get_gemini_service()
+    quota_budget = GEMINI_RPM_LIMIT * PREFETCH_QUOTA_SHARE
+    return Prefetcher(
+        max_workers=PREFETCH_MAX_WORKERS,
+        quota_ok=lambda: (service.limiter.queue_length() == 0
+                          and service.recent_request_count() < quota_budget),
+    )
+
+# 화면의 일부만 다시 실행하는 fragment 데코레이터
+# (Streamlit 1.37+의 st.fragment, 1.33~1.36의 st.experimental_fragment)
+# 지원하지 않는 버전에서는 평범한 함수로 동작해 예전처럼 화면 전체가 다시 실행됩니다.
+fragment = getattr(st, "fragment", None) or getattr(st, "experimental_fragment", None) or (lambda func: func)
+
+def polling_fragment(seconds):
+    """
+    seconds초마다 스스로 다시 실행되는 fragment 데코레이터를 만드는 함수
+    (fragment를 지원하지 않는 버전에서는 평범한 함수 - 새로 고침 버튼으로 확인)
+    """
+    if fragment is getattr(st, "fragment", None) or fragment is getattr(st, "experimental_fragment", None):
+        return fragment(run_every=seconds)
+    return lambda func: func
+
+def get_session_id():
+    """현재 브라우저 세션을 구분하는 ID를 반환하는 함수"""
+    if "session_id" not in st.session_state:
+        st.session_state.session_id = uuid.uuid4().hex
+    return st.session_state.session_id
+
+def session_alive_check():
+    """
+    지금 브라우저 세션이 아직 연결되어 있는지 알려 주는 함수를 만드는 함수
+    탭을 닫거나 새로 고치면 False를 돌려주므로, 그 세션을 위해 진행 중인 생성을 멈출 때 씁니다.
+
+    반환값:
+    - callable: 세션이 살아 있으면 True를 돌려주는 함수 (세션 상태를 알 수 없으면 None)
+    """
+    ctx = get_script_run_ctx()
+    if ctx is None or not runtime.exists():
+        return None
+    instance = runtime.get_instance()
+    session_id = ctx.session_id
+    if not instance.is_active_session(session_id):
+        # 런타임이 모르는 세션(테스트 실행 등)은 끝났다고 판단할 수 없음
+        return None
+    return lambda: instance.is_active_session(session_id)
+
+def keep_section_inputs():
+    """
+    섹션 모드에서 보이지 않는 섹션의 입력값이 지워지지 않도록 붙잡아 두는 함수
+    Streamlit은 이번 실행에서 그려지지 않은 위젯의 값을 지우므로, 실행마다 값을 다시 저장해 둡니다.
+    """
+    for key in SECTION_INPUT_KEYS:
+        if key in st.session_state:
+            st.session_state[key] = st.session_state[key]
+
+def selected_section():
+    """
+    섹션 모드에서 지금 보여 줄 섹션 ID를 고르는 함수 (주소의 ?section= 값과 동기화)
+
+    반환값:
+    - str: SECTIONS에 있는 섹션 ID
+    """
+    labels = {section_id: label.strip("*") for section_id, label, _render in SECTIONS}
+    section_ids = {label: section_id for section_id, label in labels.items()}
+    if "nav_section" not in st.session_state:
+        # 처음 들어올 때만 주소의 섹션을 따름 (이후에는 화면에서 고른 섹션이 우선)
+        linked = st.query_params.get("section")
+        st.session_state.nav_section = labels.get(linked, next(iter(section_ids)))
+    label = st.radio("기능 선택", list(section_ids), key="nav_section", horizontal=True,
+                     label_visibility="collapsed")
+    section_id = section_ids[label]
+    if st.query_params.get("section") != section_id:
+        st.query_params["section"] = section_id
+    return section_id
+
+def structure_response(template, response, from_library=False, **inputs):
+    """
+    응답을 스키마의 기록(structured_output의 Topic, ArgumentIdeas, Feedback)으로 읽는 함수
+    새 응답을 받았을 때 한 번만 실행하고, 결과는 세션 상태에 저장해 화면을 그릴 때 씁니다.
+    형식이 어긋나면 처음부터 다시 만들지 않고, 가벼운 모델에 형식만 고쳐 달라는 요청을 한 번 보냅니다.
+
+    매개변수:
+    - template (str): 응답을 만든 템플릿 이름
+    - response (str): 응답
+    - from_library (bool): 주제 라이브러리의 답인지 (형식이 검증된 답이라 형식 검사 지표와 형식 정리를 건너뜀)
+    - inputs: 프롬프트에 넣었던 값 (예: topic_input="...")
+
+    반환값:
+    - 기록 또는 읽지 못했으면 None (그때는 원래 응답을 그대로 보여 줌)
+    """
+    context = {"topic": inputs["topic_input"]} if template == TEMPLATE_ARGUMENT_IDEAS else {}
+    try:
+        records = parse_response(template, response, **context)
+    except FormatError:
+        records = None
+    if from_library:
+        return records
+    service = get_gemini_service()
+    if records is not None:
+        service.telemetry.record_parse(template, "ok")
+        return records
+    prompt = FORMAT_REPAIR_PROMPT_TEMPLATE.format(
+        output_format=output_format(PROMPT_TEMPLATES[template]).format(**inputs),
+        response=response,
+    )
+    try:
+        with st.spinner("답의 모양을 정리하고 있어요... ✏️"):
+            repaired = service.generate(prompt, model=FORMAT_REPAIR_MODEL, template=TEMPLATE_FORMAT_REPAIR,
+                                        owner=get_session_id())
+        records = parse_response(template, repaired, **context)
+    except FormatError:
+        service.telemetry.record_parse(template, "failed")
+        return None
+    except Exception:
+        # 형식 정리 요청이 실패해도 원래 응답은 그대로 보여 줄 수 있음
+        traceback.print_exc()
+        service.telemetry.record_parse(template, "failed")
+        return None
+    service.telemetry.record_parse(template, "repaired")
+    return records
+
+def prefetch_argument_ideas(topics):
+    """
+    추천받은 주제들의 논거 아이디어를 백그라운드에서 미리 생성하는 함수
+    결과는 응답 캐시에 저장되므로, 학생이 3번 탭에서 주제를 고르면 바로 결과를 볼 수 있습니다.
+
+    매개변수:
+    - topics (tuple): 추천 주제 기록(Topic)들
+    """
+    service = get_gemini_service()
+    library = get_topic_library()
+    session_id = get_session_id()
+    jobs = [
+        partial(service.generate, prompt, template=template, owner=session_id)
+        for topic_title in (topic.title for topic in topics)
+        # 라이브러리에 있는 주제는 API 없이 바로 답할 수 있으므로 건너뜀
+        if library.find_arguments(topic_title, record=False) is None
+        # 나눠 생성하는 방식이면 찬성·반대 절반을 따로 미리 생성 (절반마다 따로 캐시됨)
+        for prompt, template in argument_idea_prompts(topic_title)
+    ]
+    get_prefetcher().submit(session_id, jobs)
+
+# 프롬프트에 넣기 전에 정규화하는 짧은 입력 (학생 의견 등 나머지 입력은 글자 그대로 넣음)
+SHORT_INPUT_FIELDS = ("interest_input", "topic_input", "side")
+
+def fill_prompt(template, **inputs):
+    """
+    템플릿에 입력값을 채워 프롬프트를 만드는 함수
+    관심사·주제 같은 짧은 입력은 공백과 유니코드 표기를 통일해 같은 주제가 같은 프롬프트(같은 캐시 키)가 되게 하고,
+    학생이 쓴 의견은 문장부호 하나까지 피드백 대상이므로 그대로 넣습니다.
+
+    매개변수:
+    - template (str): 프롬프트 템플릿
+    - inputs: 템플릿의 자리표시자 값
+
+    반환값:
+    - str: 완성된 프롬프트
+    """
+    return template.format(**{name: normalize_input(value) if name in SHORT_INPUT_FIELDS else value
+                              for name, value in inputs.items()})
+
+def argument_idea_prompts(topic):
+    """
+    주제의 논거 아이디어를 만들 프롬프트 목록을 만드는 함수 (ARGUMENT_MODE에 따라 한 개 또는 찬성·반대 두 개)
+
+    반환값:
+    - list: (프롬프트, 템플릿 이름) 목록
+    """
+    if ARGUMENT_MODE == "split":
+        return [(fill_prompt(ARGUMENT_SIDE_PROMPT_TEMPLATE, topic_input=topic, side=side), TEMPLATE_ARGUMENT_SIDE)
+                for side in ARGUMENT_SIDES]
+    return [(fill_prompt(ARGUMENT_IDEAS_PROMPT_TEMPLATE, topic_input=topic), TEMPLATE_ARGUMENT_IDEAS)]
+
+def merge_argument_halves(topic, halves):
+    """찬성·반대 절반 응답을 한 번에 만든 응답과 같은 "## [주제] 토론을 위한 논거 아이디어" 모양으로 합칩니다."""
+    return f"## [{topic}] 토론을 위한 논거 아이디어\n\n" + "\n\n".join(half.strip() for half in halves if half)
+
 # Gemini API 호출 함수
-def get_gemini_response(prompt, model="gemini-2.0-flash"):
+def get_gemini_response(prompt, model=DEFAULT_MODEL, template=None, placeholder=None, on_chunk=None, action=None):
     """
     Gemini API를 호출하여 응답을 받아오는 함수
+    같은 프롬프트에 대한 응답이 캐시에 있으면 API를 호출하지 않고 바로 반환합니다.
+    생성은 화면 실행과 떨어진 스레드에서 진행되므로, 버튼을 여러 번 눌러 화면이 다시 실행되어도 끊기지 않고
+    다시 실행된 화면이 같은 생성에 이어 붙어 결과를 받습니다.
     
     매개변수:
     - prompt (str): API에 전송할 프롬프트 텍스트
     - model (str): 사용할 Gemini 모델명 (기본값: 'gemini-2.0-flash')
+    - template (str): 프롬프트를 만든 템플릿 이름 (예: TEMPLATE_FEEDBACK)
+    - placeholder (st.empty): 응답을 표시할 자리. 스트리밍 모드에서는 생성되는 글자를 이 자리에 바로바로 표시
+    - on_chunk (callable): 스트리밍 모드에서 표시한 조각을 함께 받을 함수 (예: 완성된 주제를 바로 읽는 TopicStream)
+    - action (str): 중복 클릭을 가려낼 동작 이름 (기본값: template).
+      같은 세션에서 같은 동작을 같은 입력으로 생성하는 중이면 새로 요청하지 않고 그 생성에 이어 붙음
     
     반환값:
     - str: API 응답 텍스트 또는 오류 발생 시 None
     """
+    service = get_gemini_service()
+    owner = get_session_id()
+    stream = placeholder is not None and STREAM_RESPONSES
+
+    def generate(task):
+        # 생성 스레드에서 실행: 조각과 대기 순번은 사건으로 남기고, 화면 갱신은 아래 show()가 맡음
+        # (입력이 바뀌거나 세션이 끝나면 대기열에서 빠지거나 받던 응답을 멈춤)
+        return service.generate(
+            prompt, model=model, template=template,
+            on_chunk=(lambda piece: task.publish(("chunk", piece))) if stream else None,
+            owner=owner, on_wait=lambda position, eta: task.publish(("wait", (position, eta))),
+            cancelled=task.cancelled,
+        )
+
+    streamed = []
+
+    def show(events):
+        # 지금까지 받은 글자를 커서와 함께 표시 (이어 붙은 경우 처음 조각부터 한 번에 받음)
+        if placeholder is None:
+            return
+        pieces = [value for kind, value in events if kind == "chunk"]
+        waits = [value for kind, value in events if kind == "wait"]
+        if waits and not streamed and not pieces:
+            show_queue_position(placeholder, *waits[-1])
+        if pieces:
+            streamed.extend(pieces)
+            placeholder.markdown("".join(streamed) + " ▌")
+            if on_chunk is not None:
+                for piece in pieces:
+                    on_chunk(piece)
+
     try:
-        # Gemini 모델 초기화
-        model = genai.GenerativeModel(model)
-        # 컨텐츠 생성 요청
-        response = model.generate_content(prompt)
-        # 응답 텍스트 반환
-        return response.text
+        # 캐시 확인 후 필요할 때만 컨텐츠 생성 요청 (같은 입력으로 진행 중인 생성이 있으면 이어 붙음)
+        task, _attached = get_inflight_guard().submit(owner, action or template, make_inputs_key(model, prompt),
+                                                      generate, alive=session_alive_check(),
+                                                      timeout=INFLIGHT_TIMEOUT_BY_TEMPLATE.get(template))
+        response = task.follow(show)
+        if placeholder is not None and response:
+            # 완성된 전체 응답으로 교체 (캐시 적중 시에는 여기서 처음 표시됨)
+            placeholder.markdown(response)
+        return response
     except Exception as e:
-        # 오류 발생 시 화면에 오류 메시지 표시
-        st.error(f"API 호출 중 오류 발생: {str(e)}")
-        # 디버깅을 위한 상세 오류 로그 출력
-        traceback.print_exc()  # 개발 중에는 전체 오류 로그 확인용
-        # 오류 시 None 반환
+        report_generation_error(e, placeholder)
         return None
 
-# ============================
-# 앱 UI 구성 부분
-# ============================
+def get_split_argument_ideas(topic, placeholder=None):
+    """
+    찬성·반대 논거를 두 개의 작은 요청으로 동시에 만들어 합치는 함수 (ARGUMENT_MODE = "split")
+    두 요청은 각각 캐시·동시 요청 합치기·속도 제한을 거치고, 스트리밍 모드에서는 두 절반을 받는 대로
+    한 자리에 합친 모양으로 보여 줍니다. 화면 갱신은 이 함수를 부른 스레드에서만 합니다.
+    한 번에 만드는 방식과 같은 동작 이름으로 중복 클릭을 가려내므로, 다시 누르면 진행 중인 생성에 이어 붙습니다.
 
-# 앱 타이틀 및 설명 - 핑크색 배경 추가
-with st.container():
-    # 스타일 추가
-    st.markdown("""
-    <style>
-    /* 전체 컨테이너 스타일 */
-    .main-header {
-        background-color: #ffcdd2;
-        padding: 1.5rem;
-        border-radius: 10px;
-        margin-bottom: 1.5rem;
-        text-align: center;
-    }
-    
-    /* 서브타이틀 스타일 */
-    .subtitle {
-        font-weight: bold;
-        font-size: 1.4rem;
-        margin: 1rem 0;
-        text-align: center;
-    }
-    
-    /* 숫자 원형 스타일 */
-    .number-circle {
-        background-color: #ffcdd2;
-        color: white;
-        border-radius: 50%;
-        width: 60px;
-        height: 60px;
-        display: flex;
-        justify-content: center;
-        align-items: center;
-        font-size: 30px;
-        font-weight: bold;
-        margin: 0 auto;
-    }
-    
-    /* 섹션 제목 스타일 */
-    .section-title {
-        font-weight: bold;
-        color: #333333;
-        margin-top: 1rem;
-        font-size: 1.2rem;
-    }
-    
-    /* 단계별 설명 컨테이너 */
-    .step-container {
-        background-color: #f8f8f8;
-        padding: 1rem;
-        border-radius: 10px;
-        margin-bottom: 1rem;
-    }
-    
-    /* 푸터 스타일 */
-    .footer {
-        text-align: center;
-        padding: 1rem;
-        margin-top: 2rem;
-        border-top: 2px solid #ffe0e6;
-        background-color: #fff5f2;
-        border-radius: 0 0 10px 10px;
-    }
-    
-    .footer-content {
-        display: flex;
-        align-items: center;
-        justify-content: center;
-        gap: 10px;
-    }
-    
-    .footer-heart {
-        color: #ff6b81;
-        font-size: 1.2em;
-        animation: heartbeat 1.5s infinite;
-    }
-    
-    @keyframes heartbeat {
-        0% { transform: scale(1); }
-        15% { transform: scale(1.15); }
-        30% { transform: scale(1); }
-        45% { transform: scale(1.15); }
-        60% { transform: scale(1); }
-    }
-    </style>
-    
-    <div class="main-header">
+    매개변수:
+    - topic (str): 토론 주제
+    - placeholder (st.empty): 응답을 표시할 자리
+
+    반환값:
+    - str: 합친 응답 (한 번에 만든 응답과 같은 출력 형식) 또는 실패 시 None
+    """
+    service = get_gemini_service()
+    executor = get_argument_half_executor()
+    owner = get_session_id()
+    stream = placeholder is not None and STREAM_RESPONSES
+    prompts = argument_idea_prompts(topic)
+
+    def generate(task):
+        # 생성 스레드에서 실행: 두 절반을 공용 스레드 풀에서 동시에 만들고, 조각은 (절반 번호, 종류, 값) 사건으로 남김
+        finished = queue.Queue()
+
+        def run_half(index, prompt, template):
+            try:
+                text = service.generate(
+                    prompt, template=template, owner=owner,
+                    on_chunk=(lambda piece: task.publish((index, "chunk", piece))) if stream else None,
+                    on_wait=lambda position, eta: task.publish((index, "wait", (position, eta))),
+                    cancelled=task.cancelled,
+                )
+                finished.put((index, text, None))
+            except Exception as e:
+                finished.put((index, None, e))
+
+        for index, (prompt, template) in enumerate(prompts):
+            executor.submit(run_half, index, prompt, template)
+        halves = [None] * len(prompts)
+        for _ in prompts:
+            index, text, error = finished.get()
+            if error is not None:
+                # 한쪽이 실패하면 바로 알림 (다른 쪽은 끝까지 만들어져 캐시에 남음)
+                raise error
+            halves[index] = text or ""
+        return halves
+
+    streamed = [[] for _ in prompts]
+
+    def show(events):
+        if placeholder is None:
+            return
+        changed = False
+        for index, kind, value in events:
+            if kind == "wait" and not any(streamed):
+                show_queue_position(placeholder, *value)
+            elif kind == "chunk":
+                streamed[index].append(value)
+                changed = True
+        if changed:
+            placeholder.markdown(merge_argument_halves(topic, ["".join(s) for s in streamed]) + " ▌")
+
+    try:
+        task, _attached = get_inflight_guard().submit(owner, TEMPLATE_ARGUMENT_IDEAS,
+                                                      make_inputs_key(ARGUMENT_MODE, topic), generate,
+                                                      alive=session_alive_check(),
+                                                      timeout=INFLIGHT_TIMEOUT_BY_TEMPLATE[TEMPLATE_ARGUMENT_IDEAS])
+        halves = task.follow(show)
+    except Exception as e:
+        report_generation_error(e, placeholder)
+        return None
+    if not all(halves):
+        # 한쪽 절반이 빈 응답이면 합쳐도 형식이 깨지므로 버리고 다시 누르도록 안내
+        if placeholder is not None:
+            placeholder.empty()
+        missing = "·".join(side for side, half in zip(ARGUMENT_SIDES, halves) if not half)
+        st.warning(f"{missing} 측 논거를 받지 못했어요. 한 번 더 눌러 볼까요? 🙏")
+        return None
+    response = merge_argument_halves(topic, halves)
+    if placeholder is not None:
+        placeholder.markdown(response)
+    return response
+
+def show_queue_position(placeholder, position, eta):
+    """속도 제한 대기열에서 기다리는 동안 순번과 예상 시간을 표시합니다."""
+    placeholder.info(f"친구들이 한꺼번에 질문하고 있어요. 내 차례: {position}번째 · "
+                     f"약 {eta:.0f}초 남았어요 ⏳")
+
+def report_generation_error(error, placeholder=None):
+    """
+    응답 생성 실패를 학생에게 알리는 함수
+    생성 도중 실패했다면 일부만 표시된 응답은 지우고, 오류 종류에 맞는 친근한 안내를 보여 줍니다.
+    """
+    if placeholder is not None:
+        placeholder.empty()
+    if isinstance(error, (SupersededError, GenerationCancelled)):
+        # 같은 버튼을 다른 입력으로 다시 눌러 이 요청의 답은 버리거나 생성을 멈춘 경우
+        st.info("입력이 바뀌어서 이전 요청의 답은 쓰지 않았어요. 버튼을 다시 눌러 주세요! 🔁")
+    elif isinstance(error, QueueTimeout):
+        # 대기열에서 너무 오래 기다린 경우 친근한 안내
+        st.warning("지금 친구들이 한꺼번에 질문하고 있어서 차례가 오지 않았어요. 잠시 후 다시 눌러 주세요! 🙏")
+    elif isinstance(error, CircuitOpenError):
+        # 서버 상태가 좋지 않아 호출을 잠시 멈춘 경우
+        st.warning(f"토론부기가 잠깐 쉬고 있어요. {BREAKER_RESET_SECONDS}초쯤 뒤에 다시 눌러 주세요! 🦉💤")
+    elif isinstance(error, GenerationTimeout):
+        # 여러 번 시도해도 제한 시간 안에 답을 받지 못한 경우
+        st.warning("답을 만드는 데 너무 오래 걸렸어요. 잠시 후 다시 눌러 주세요! ⏰")
+    else:
+        # 오류 발생 시 화면에 오류 메시지 표시
+        st.error(f"API 호출 중 오류 발생: {str(error)}")
+        # 디버깅을 위한 상세 오류 로그 출력 (개발 중에는 전체 오류 로그 확인용)
+        traceback.print_exception(type(error), error, error.__traceback__)
+
+# 프로세스의 첫 실행에서 Gemini 클라이언트 준비를 백그라운드로 시작하고 준비 상태 서버를 띄움
+# (둘 다 st.cache_resource라서 이후 실행에서는 바로 반환됨)
+get_gemini_service()
+start_readiness_server()
+
+# ============================
+# 운영자 화면 (?page=operator)
+# ============================
+def require_password(page, label, setting_name, password_setting):
+    """
+    비밀번호로 보호하는 화면의 로그인 부분 (한 번 맞히면 세션 동안 유지)
+
+    매개변수:
+    - page (str): 화면 이름 (세션 상태와 위젯 키의 앞부분, 예: "operator")
+    - label (str): 화면에 보일 이름 (예: "운영자")
+    - setting_name (str): 비밀번호 설정 이름 (꺼져 있을 때 안내에 사용)
+    - password_setting (str): 설정된 비밀번호 (없으면 화면을 열지 않음)
+
+    반환값:
+    - bool: 로그인되어 화면을 그려도 되면 True
+    """
+    if not password_setting:
+        st.error(f"{label} 화면이 꺼져 있어요. Streamlit secrets(또는 환경 변수)에 {setting_name}를 설정해 주세요.")
+        return False
+    if st.session_state.get(f"{page}_authenticated"):
+        return True
+    password = st.text_input(f"{label} 비밀번호", type="password", key=f"{page}_password_input")
+    if st.button("들어가기", key=f"{page}_login_button"):
+        # 비밀번호 비교 시간으로 내용을 짐작할 수 없도록 hmac.compare_digest 사용
+        if hmac.compare_digest(password.encode("utf-8"), str(password_setting).encode("utf-8")):
+            st.session_state[f"{page}_authenticated"] = True
+            st.rerun()
+        st.error("비밀번호가 맞지 않아요.")
+    return False
+
+def render_operator_page():
+    """
+    수업 중 할당량 사용량과 꼬리 지연을 보는 운영자 화면 (OPERATOR_PASSWORD로 보호)
+    학생 화면 대신 이 화면만 그리고 실행을 멈춥니다.
+    """
+    st.subheader("🛠️ 운영자 화면: Gemini 호출 지표")
+    if not require_password("operator", "운영자", "OPERATOR_PASSWORD", OPERATOR_PASSWORD):
+        return
+
+    service = get_gemini_service()
+    telemetry = service.telemetry
+    st.button("🔄 새로 고침", key="operator_refresh_button")
+
+    # 할당량 사용량 (최근 1분, 재시도 포함 실제 요청 기준)
+    burn = telemetry.quota_burn()
+    col1, col2, col3 = st.columns(3)
+    col1.metric("최근 1분 요청", f"{burn['requests']} / {burn['rpm_limit']}")
+    col2.metric("최근 1분 토큰(추정)", f"{burn['tokens']:,} / {burn['tpm_limit']:,}")
+    col3.metric("속도 제한 대기열", f"{service.limiter.queue_length()}명")
+
+    # 템플릿·모델별 요약 (분위수는 최근 TELEMETRY_WINDOW_SECONDS초)
+    def ms(seconds):
+        return None if seconds is None else round(seconds * 1000)
+
+    rows = []
+    for row in telemetry.snapshot():
+        rows.append({
+            "템플릿": row["template"],
+            "모델": row["model"],
+            "호출": row["calls"],
+            "캐시 적중": row["outcomes"].get("cache_hit", 0) + row["outcomes"].get("disk_hit", 0),
+            "합쳐짐": row["outcomes"].get("coalesced", 0),
+            "실제 호출": row["outcomes"].get("upstream", 0),
+            "보내지 못함": row["outcomes"].get("rejected", 0) + row["outcomes"].get("cancelled", 0),
+            "재시도": row["retries"],
+            "오류": ", ".join(f"{name} {count}" for name, count in row["errors"].items()) or "-",
+            "지연 p50(ms)": ms(row["latency_seconds_p50"]),
+            "지연 p95(ms)": ms(row["latency_seconds_p95"]),
+            "지연 p99(ms)": ms(row["latency_seconds_p99"]),
+            "첫 글자 p95(ms)": ms(row["first_token_seconds_p95"]),
+            "대기 p95(ms)": ms(row["queue_wait_seconds_p95"]),
+            "입력 토큰 p50": row["prompt_tokens_p50"] and round(row["prompt_tokens_p50"]),
+            "출력 토큰 p50": row["output_tokens_p50"] and round(row["output_tokens_p50"]),
+        })
+    if rows:
+        st.dataframe(rows, use_container_width=True, hide_index=True)
+    else:
+        st.info("아직 기록된 호출이 없어요.")
+    st.caption(f"분위수는 최근 {TELEMETRY_WINDOW_SECONDS // 60}분, 횟수는 프로세스 시작 후 누적입니다.")
+
+    # 버튼 요청 처리 (연달아 누른 중복 요청을 진행 중인 생성에 이어 붙인 횟수, 입력이 바뀌어 버리거나 멈춘 생성 수)
+    submission_stats = telemetry.submission_stats()
+    if submission_stats:
+        st.caption("버튼 요청 처리: " + " · ".join(
+            f"{action} 새 생성 {stats['started']} / 중복 이어 받음 {stats['attached']} / 버림 {stats['stale']} / "
+            f"멈춤 {stats['cancelled']}"
+            for action, stats in submission_stats.items()
+        ))
+
+    # 생성 취소 (입력이 바뀌었거나 탭을 닫아 필요 없어진 생성을 멈춰 아낀 생성 시간, 최근 평균 생성 시간으로 추정)
+    cancel_stats = telemetry.cancel_stats()
+    if cancel_stats:
+        st.caption("멈춘 생성: " + " · ".join(
+            f"{template} 요청 전 {stats['queued']} / 받는 도중 {stats['streaming']} / "
+            f"기다리지만 않음 {stats['abandoned']} "
+            f"(아낀 생성 시간 약 {stats['saved_seconds']:.1f}초)"
+            for template, stats in cancel_stats.items()
+        ))
+
+    # 응답 형식 검사 (형식이 어긋나 형식 정리 요청을 보냈거나, 그래도 읽지 못한 비율)
+    parse_stats = telemetry.parse_stats()
+    if parse_stats:
+        st.caption("응답 형식 검사: " + " · ".join(
+            f"{template} 정상 {stats['ok']} / 고침 {stats['repaired']} / 실패 {stats['failed']} "
+            f"(어긋남 {stats['failure_rate']:.0%})"
+            for template, stats in parse_stats.items()
+        ))
+
+    with st.expander("지표 텍스트 (수집기 형식)"):
+        st.code(telemetry.render_text(), language="text")
+        if METRICS_FILE_PATH:
+            st.caption(f"{METRICS_FILE_INTERVAL}초마다 {METRICS_FILE_PATH}에 씁니다.")
+
+# ============================
+# 선생님용 일괄 피드백 화면 (?page=batch)
+# ============================
+# 줄 상태 → 화면에 보일 이름
+BATCH_STATUS_LABELS = {PENDING: "⏳ 대기", RUNNING: "✍️ 작성 중", DONE: "✅ 완료", FAILED: "⚠️ 실패"}
+
+def describe_batch_error(error):
+    """일괄 피드백 줄의 오류를 선생님이 읽을 수 있는 글로 바꾸는 함수"""
+    if isinstance(error, QueueTimeout):
+        return "호출이 많아 차례가 오지 않았어요"
+    if isinstance(error, CircuitOpenError):
+        return f"서버 상태가 좋지 않아 잠시 멈췄어요 ({BREAKER_RESET_SECONDS}초 뒤 다시 시도)"
+    if isinstance(error, GenerationTimeout):
+        return "답을 만드는 데 너무 오래 걸렸어요"
+    return str(error)
+
+def start_batch_job(job):
+    """
+    일괄 피드백 작업의 대기·실패 줄을 백그라운드에서 실행하는 함수
+    모든 줄이 학생 요청과 같은 서비스(캐시, 속도 제한, 재시도)를 거치되, 속도 제한기에서는
+    이 작업 전체가 한 명처럼 차례를 받으므로 수업 중인 학생들의 요청을 밀어내지 않습니다.
+    """
+    service = get_gemini_service()
+    owner = f"batch-{get_session_id()}"
+
+    def generate(row, on_chunk):
+        prompt = fill_prompt(FEEDBACK_PROMPT_TEMPLATE, topic_input=row["topic"],
+                             student_argument_input=row["opinion"])
+        return service.generate(prompt, model=DEFAULT_MODEL, template=TEMPLATE_FEEDBACK,
+                                on_chunk=on_chunk, owner=owner)
+
+    return job.start(generate)
+
+def render_batch_progress():
+    """일괄 피드백 진행 상황 (줄마다 상태, 받은 글자 수, 걸린 시간)"""
+    job = st.session_state.get("batch_job")
+    if job is None:
+        return
+    snapshot = job.snapshot()
+    counts = snapshot["counts"]
+    total = len(snapshot["rows"])
+    finished = counts[DONE] + counts[FAILED]
+    st.progress(finished / total, text=f"{finished} / {total}줄 끝남 · 완료 {counts[DONE]} · "
+                                       f"실패 {counts[FAILED]} · 작성 중 {counts[RUNNING]}")
+    if finished and snapshot["sequential"]:
+        st.caption(f"걸린 시간 {snapshot['elapsed']:.1f}초 (한 줄씩 기다렸다면 약 {snapshot['sequential']:.1f}초)")
+    st.dataframe([
+        {
+            "줄": row["line"],
+            "학생": row["student"],
+            "주제": row["topic"],
+            "상태": BATCH_STATUS_LABELS[row["status"]],
+            "받은 글자": row["chars"],
+            "걸린 시간(초)": None if row["seconds"] is None else round(row["seconds"], 1),
+            "오류": describe_batch_error(row["error"]) if row["error"] is not None else "",
+        }
+        for row in snapshot["rows"]
+    ], use_container_width=True, hide_index=True)
+
+@polling_fragment(BATCH_REFRESH_SECONDS)
+def render_batch_progress_live():
+    """실행 중인 일괄 피드백의 진행 상황 (BATCH_REFRESH_SECONDS초마다 이 부분만 다시 그림)"""
+    render_batch_progress()
+    job = st.session_state.get("batch_job")
+    if job is not None and not job.is_running():
+        # 끝났으면 화면 전체를 다시 그려 다운로드·다시 하기 버튼을 보여 줌
+        st.rerun()
+
+def render_batch_page():
+    """
+    반 전체 의견(CSV/TSV)을 올려 피드백을 한꺼번에 만드는 선생님 화면 (TEACHER_PASSWORD로 보호)
+    학생 화면 대신 이 화면만 그리고 실행을 멈춥니다.
+    """
+    st.subheader("🧑‍🏫 선생님용 일괄 피드백")
+    if not require_password("batch", "선생님", "TEACHER_PASSWORD", TEACHER_PASSWORD):
+        return
+    st.markdown(
+        "학생, 주제, 의견 세 칸으로 된 CSV 또는 TSV 파일을 올려 주세요. "
+        "첫 줄에 `학생, 주제, 의견` 머리글이 있으면 열 순서는 상관없어요. "
+        f"한 번에 {BATCH_MAX_ROWS}줄까지, {BATCH_MAX_WORKERS}개씩 동시에 만들어요."
+    )
+    uploaded = st.file_uploader("의견 파일", type=["csv", "tsv", "txt"], key="batch_file")
+    default_topic = st.text_input("주제 (파일에 주제 칸이 없거나 비어 있을 때 사용)", key="batch_default_topic")
+
+    job = st.session_state.get("batch_job")
+    running = job is not None and job.is_running()
+    if uploaded is not None:
+        try:
+            rows, delimiter = parse_opinion_table(uploaded.getvalue(), default_topic=default_topic,
+                                                  max_rows=BATCH_MAX_ROWS)
+        except BatchFormatError as e:
+            st.error(str(e))
+        else:
+            st.caption(f"{uploaded.name}: 의견 {len(rows)}줄")
+            if st.button("피드백 만들기 시작 ✨", key="batch_start_button", disabled=running):
+                job = BatchJob(rows, max_workers=BATCH_MAX_WORKERS)
+                st.session_state.batch_job = job
+                st.session_state.batch_delimiter = delimiter
+                st.session_state.batch_file_name = uploaded.name
+                start_batch_job(job)
+                running = True
+
+    if job is None:
+        return
+    if running:
+        render_batch_progress_live()
+        return
+    render_batch_progress()
+
+    snapshot = job.snapshot()
+    if snapshot["counts"][FAILED]:
+        # 실패한 줄만 다시 실행 (이미 완료한 줄은 그대로 둠)
+        if st.button(f"실패한 {snapshot['counts'][FAILED]}줄 다시 하기 🔁", key="batch_retry_button"):
+            start_batch_job(job)
+            st.rerun()
+    delimiter = st.session_state.get("batch_delimiter", ",")
+    base_name = os.path.splitext(st.session_state.get("batch_file_name", "의견"))[0]
+    extension = "tsv" if delimiter == "\t" else "csv"
+    # 엑셀에서 한글이 깨지지 않도록 BOM을 붙인 UTF-8로 저장
+    st.download_button(
+        "결과 파일 받기 📥",
+        data=job.to_table(delimiter, describe_error=describe_batch_error).encode("utf-8-sig"),
+        file_name=f"{base_name}_피드백.{extension}",
+        mime="text/tab-separated-values" if extension == "tsv" else "text/csv",
+        key="batch_download_button",
+    )
+    done_rows = [row for row in snapshot["rows"] if row["status"] == DONE]
+    if done_rows:
+        labels = [f"{row['line']}. {row['student']}" for row in done_rows]
+        chosen = st.selectbox("학생별 피드백 보기", labels, key="batch_view_select")
+        st.markdown(done_rows[labels.index(chosen)]["feedback"])
+
+if st.query_params.get("page") == "operator":
+    render_operator_page()
+    confirm_stylesheet()
+    st.stop()
+if st.query_params.get("page") == "batch":
+    render_batch_page()
+    confirm_stylesheet()
+    st.stop()
+
+# ============================
+# 앱 UI 구성 부분
+# ============================
+
+# 앱 타이틀 및 설명 - 핑크색 배경 추가
+with st.container():
+    # 제목 영역 (스타일은 static/styles.css)
+    st.markdown("""
+    <div class="main-header">
         <h1 style="margin: 0; font-size: 1.8rem; text-align: center;">
             <span style="margin-right: 10px;">🦉</span>토론부기 - 지혜로운 토론 친구
         </h1>
@@ -706,203 +1346,14 @@ with st.container():
     """, unsafe_allow_html=True)
 
 # 안내 메시지 
-st.info("아래 탭을 선택하여 각 기능을 사용해보세요! ✨")
-
-# 탭 메뉴로 기능 분리
-tab1, tab2, tab3, tab4, tab5 = st.tabs([
-    "**📚 경기 토론 수업 모형**", 
-    "**🔍 토론 주제 추천**", 
-    "**💡 찬반 논거 아이디어**", 
-    "**📝 의견 피드백 받기**",
-    "**🤝 토론 마무리하기**"
-])
+st.info("아래 메뉴를 선택하여 각 기능을 사용해보세요! ✨" if NAVIGATION_MODE == "sections"
+        else "아래 탭을 선택하여 각 기능을 사용해보세요! ✨")
 
 # ============================
 # 1. 경기 토론 수업 모형 안내 기능
 # ============================
-with tab1:
-    # 커스텀 CSS 스타일
-    st.markdown("""
-    <style>
-        @import url('https://fonts.googleapis.com/css2?family=Noto+Sans+KR:wght@300;400;500;700&display=swap');
-        
-        * {
-            font-family: 'Noto Sans KR', sans-serif;
-        }
-        
-        .main {
-            background: linear-gradient(135deg, #fff9f9 0%, #fff5f2 100%);
-        }
-        
-        h1, h2, h3, h4, h5, h6 {
-            color: #66545e;
-            line-height: 1.4;
-            margin-bottom: 0.8rem;
-        }
-        
-        /* 헤더 스타일 */
-        .header {
-            background: linear-gradient(135deg, #ffb7c5, #ffd1dc);
-            padding: 20px;
-            border-radius: 15px;
-            margin-bottom: 20px;
-            text-align: center;
-            box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1);
-        }
-        
-        .header h1 {
-            color: #66545e;
-            margin: 0;
-            padding: 10px 0;
-            font-size: 2.2em;
-        }
-        
-        .header p {
-            color: #66545e;
-            margin: 0;
-            font-size: 1.2em;
-        }
-        
-        /* 카드 스타일 */
-        .card {
-            background-color: white;
-            border-radius: 12px;
-            padding: 20px;
-            margin-bottom: 20px;
-            box-shadow: 0 2px 5px rgba(0, 0, 0, 0.05);
-        }
-        
-        /* 원칙 카드 스타일 */
-        .principle-card {
-            background-color: #fff5f2;
-            border-radius: 10px;
-            padding: 15px;
-            margin-bottom: 10px;
-            box-shadow: 0 2px 5px rgba(0, 0, 0, 0.05);
-            border-left: 5px solid #ffb7c5;
-        }
-        
-        /* 단계 카드 스타일 */
-        .step-card {
-            background-color: #fff5f2;
-            border-radius: 12px;
-            padding: 20px;
-            margin-bottom: 15px;
-            box-shadow: 0 2px 5px rgba(0, 0, 0, 0.05);
-            border-left: 5px solid #ffd1dc;
-        }
-        
-        .step-number {
-            background-color: #ffb7c5;
-            color: white;
-            width: 40px;
-            height: 40px;
-            border-radius: 50%;
-            display: flex;
-            align-items: center;
-            justify-content: center;
-            font-weight: bold;
-            font-size: 1.2em;
-            margin-right: 15px;
-            float: left;
-        }
-        
-        .step-content {
-            margin-left: 55px;
-        }
-        
-        /* 목표 카드 스타일 */
-        .goal-card {
-            background-color: white;
-            border-radius: 10px;
-            padding: 15px;
-            text-align: center;
-            box-shadow: 0 2px 5px rgba(0,0,0,0.05);
-            height: 100%;
-            border: 1px solid #ffe0e6;
-        }
-        
-        .goal-icon {
-            background-color: #ffd1dc;
-            width: 60px;
-            height: 60px;
-            border-radius: 50%;
-            display: flex;
-            align-items: center;
-            justify-content: center;
-            margin: 0 auto 10px auto;
-        }
-        
-        /* 예시 박스 스타일 */
-        .example-box {
-            background-color: white;
-            border-radius: 8px;
-            padding: 15px;
-            margin-top: 10px;
-            border: 1px solid #ffe0e6;
-        }
-        
-        /* 특징 스타일 */
-        .feature-box {
-            background-color: #ffeef2;
-            border-radius: 12px;
-            padding: 15px;
-            margin-bottom: 20px;
-            text-align: center;
-        }
-        
-        /* 둥근 원 네임택 */
-        .circle-tag {
-            display: inline-block;
-            background-color: #ffb7c5;
-            color: white;
-            width: 25px;
-            height: 25px;
-            border-radius: 50%;
-            text-align: center;
-            line-height: 25px;
-            margin-right: 10px;
-        }
-        
-        /* 목록 스타일 */
-        ul.custom-list {
-            list-style-type: none;
-            padding-left: 0;
-        }
-        
-        ul.custom-list li {
-            position: relative;
-            padding-left: 25px;
-            margin-bottom: 8px;
-        }
-        
-        ul.custom-list li:before {
-            content: "•";
-            position: absolute;
-            left: 0;
-            color: #ffb7c5;
-            font-weight: bold;
-            font-size: 1.5em;
-        }
-        
-        /* 푸터 스타일 */
-        .footer {
-            text-align: center;
-            padding: 20px;
-            color: #66545e;
-            font-size: 0.8em;
-            margin-top: 50px;
-        }
-        
-        /* 섹션 타이틀 이모지 스타일 */
-        .section-emoji {
-            font-size: 1.2em;
-            margin-right: 0.5rem;
-            vertical-align: middle;
-        }
-    </style>
-    """, unsafe_allow_html=True)
-
+def render_guide_section():
+    """경기 토론 수업 모형 안내 (입력 없는 안내 화면)"""
     # SVG 아이콘 함수
     def get_svg_icon(icon_name):
         icons = {
@@ -1159,24 +1610,85 @@ with tab1:
 # ============================
 # 2. 토론 주제 추천 기능
 # ============================
-with tab2:
-    st.markdown('<div class="card-container">', unsafe_allow_html=True)
-    st.header("🔍 토론 주제 추천받기")
+def use_recommended_topic(button_key, topic_title):
+    """
+    추천을 받는 도중 나타나는 '사용하기' 버튼의 콜백: 3번 탭 입력 칸에 주제를 채움
+    3번 탭도 새 주제를 보여 주도록 다음 실행에서 화면 전체를 다시 실행하게 하고,
+    섹션 모드라면 논거 아이디어 섹션으로 옮겨 갑니다.
+    """
+    # 중간에 멈춘 실행에서 그려진 버튼은 눌리지 않았는데도 콜백이 불릴 수 있으므로 실제로 눌렸는지 확인
+    if not st.session_state.get(button_key):
+        return
+    st.session_state.argument_topic_input = topic_title
+    st.session_state.topic_chosen_while_streaming = True
+    if NAVIGATION_MODE == "sections":
+        st.session_state.nav_section = next(label.strip("*") for section_id, label, _render in SECTIONS
+                                            if section_id == "arguments")
+
+def save_topic_recommendations(topics, interest, raw=None, partial=False):
+    """
+    추천 주제 기록을 세션 상태에 저장하는 함수 (3번 탭의 주제 버튼이 다시 읽지 않고 그대로 씀)
 
-    # 토론 주제 예시 설명
-    with st.expander("토론 주제란?", expanded=False):
-        st.markdown("""
-        <div style="background-color: #fff5f2; border-radius: 12px; padding: 1rem; border-left: 5px solid #ffd1dc;">
-        친구들이 관심을 가질 만한 다양한 주제를 추천해 줄 거야! 예를 들면:
-        
-        - **학교 스마트폰 사용** - 학교에서 스마트폰을 사용하는 것이 좋을까요? 
-        - **로봇 반려동물** - 진짜 동물 대신 로봇 반려동물을 키우는 것이 좋을까요?
-        - **학교 유니폼** - 학생들이 교복(유니폼)을 입어야 할까요?
-        
-        이런 주제들에 대해 친구들과 함께 다양한 생각을 나눌 수 있어요! 😊
-        </div>
-        """, unsafe_allow_html=True)
+    매개변수:
+    - topics (tuple): Topic 기록들 (읽지 못했으면 None)
+    - interest (str): 추천을 받은 관심사
+    - raw (str): 기록으로 읽지 못했을 때 그대로 보여 줄 원래 응답
+    - partial (bool): 스트리밍 도중이라 아직 모든 주제를 받지 못했는지
+    """
+    # 같은 관심사로 지금까지 보여 준 주제명 (주제 하나 바꾸기에서 다시 나오지 않도록 제외함)
+    shown = []
+    if st.session_state.get("topic_recommendations_interest") == interest:
+        shown = st.session_state.get("topic_recommendations_shown", [])
+    st.session_state.topic_recommendations_shown = shown + [topic.title for topic in topics or ()
+                                                            if topic.title not in shown]
+    st.session_state.topic_recommendations = topics
+    st.session_state.topic_recommendations_raw = None if topics else raw
+    st.session_state.topic_recommendations_interest = interest
+    st.session_state.topic_recommendations_partial = partial
+
+def replace_recommended_topic(index, placeholder):
+    """
+    추천 주제 하나만 새 주제로 바꾸는 함수 ('다른 주제로 바꾸기' 버튼)
+    세 주제를 모두 다시 만들지 않고, 지금까지 보여 준 주제를 뺀 주제 한 가지만 요청해 그 자리에 끼워 넣습니다.
 
+    매개변수:
+    - index (int): 바꿀 주제의 순서 (0부터)
+    - placeholder (st.empty): 바꿀 주제가 표시된 자리 (새 주제를 생성되는 대로 보여 줌)
+
+    반환값:
+    - bool: 주제를 바꿨는지
+    """
+    topics = st.session_state.topic_recommendations
+    interest = st.session_state.get("topic_recommendations_interest", "")
+    excluded = "\n".join(f"- {normalize_input(title)}"
+                         for title in st.session_state.get("topic_recommendations_shown", []))
+    prompt = fill_prompt(REPLACE_TOPIC_PROMPT_TEMPLATE, interest_input=interest, excluded_topics=excluded)
+    response = get_gemini_response(prompt, template=TEMPLATE_REPLACE_TOPIC, placeholder=placeholder)
+    if not response:
+        # 오류 안내는 get_gemini_response가 이미 보여 줌
+        placeholder.markdown(render_topic(topics[index], index + 1))
+        return False
+    replacement = structure_response(TEMPLATE_REPLACE_TOPIC, response, interest_input=interest,
+                                     excluded_topics=excluded)
+    if not replacement:
+        placeholder.markdown(render_topic(topics[index], index + 1))
+        st.warning("새 주제를 제대로 읽지 못했어요. 한 번 더 눌러 볼까요? 🙏")
+        return False
+    save_topic_recommendations(topics[:index] + replacement + topics[index + 1:], interest,
+                               partial=st.session_state.get("topic_recommendations_partial", False))
+    # 새 주제의 논거 아이디어도 다른 주제들처럼 미리 준비
+    prefetch_argument_ideas(replacement)
+    return True
+
+@fragment
+def recommend_form():
+    """
+    관심사 입력과 주제 추천 결과 (입력하거나 버튼을 눌러도 이 부분만 다시 실행)
+    새 추천을 받으면 3번 탭의 주제 버튼도 바뀌어야 하므로 화면 전체를 한 번 다시 실행합니다.
+    스트리밍 중에는 주제 하나가 완성될 때마다 '사용하기' 버튼을 바로 보여 주므로,
+    학생은 세 주제를 모두 기다리지 않고 첫 주제부터 골라 다음 단계로 넘어갈 수 있습니다.
+    받은 주제 중 하나가 마음에 들지 않으면 '다른 주제로 바꾸기'로 그 주제만 새로 받습니다.
+    """
     # 사용자 관심사 입력 필드 (고유 키 부여)
     st.markdown('<div class="input-container">', unsafe_allow_html=True)
     st.markdown('<label style="font-weight: bold; margin-bottom: 0.5rem; display: block;">어떤 것에 관심이 있니? (예: 게임, 환경, 학교, 미래 기술 등)</label>', unsafe_allow_html=True)
@@ -1191,6 +1703,11 @@ with tab2:
     with col2:
         button_clicked = st.button("주제 추천 받기 🚀", key="topic_recommend_button", use_container_width=True)
     
+    # 추천을 받는 도중 주제를 골랐다면 3번 탭의 입력 칸도 바뀌도록 화면 전체를 다시 실행
+    # (입력 위젯을 모두 그린 뒤에 다시 실행해야 입력값이 그대로 남음)
+    if st.session_state.pop("topic_chosen_while_streaming", False):
+        st.rerun()
+
     # 결과 컨테이너 미리 생성
     result_container = st.container()
     
@@ -1200,73 +1717,115 @@ with tab2:
             # 입력값이 없을 경우 친근한 메시지
             st.warning("관심 있는 것을 알려주면 재미있는 토론 주제를 찾아줄게요! 😊")
         else:
-            # 로딩 상태 표시하며 API 호출
-            with st.spinner("토론 주제를 찾고 있어요... 조금만 기다려 주세요! 🔍"):
-                # 입력값을 프롬프트에 포맷팅
-                prompt = RECOMMEND_TOPIC_PROMPT_TEMPLATE.format(interest_input=topic_interest)
-                # API 호출하여 응답 받기
-                response = get_gemini_response(prompt)
+            # 입력값을 프롬프트에 포맷팅
+            prompt = fill_prompt(RECOMMEND_TOPIC_PROMPT_TEMPLATE, interest_input=topic_interest)
+            
+            # 결과를 컨테이너에 표시 (더 넓은 크기로)
+            with result_container:
+                st.subheader(f"'{topic_interest}'에 관한 토론 주제 추천 📋")
+                # 첫 글자가 도착할 때까지 안내 메시지를 보여주고, 이후 생성되는 내용으로 교체
+                response_placeholder = st.empty()
+                response_placeholder.info("토론 주제를 찾고 있어요... 조금만 기다려 주세요! 🔍")
+                # 자주 나오는 관심사는 라이브러리에서 바로 답하고, 없을 때만 API 호출
+                response = get_topic_library().find_recommendations(topic_interest)
+                from_library = bool(response)
+                # 스트리밍 중 완성된 주제를 읽는 도구와, 그 주제들의 '사용하기' 버튼을 놓을 자리
+                topic_stream = TopicStream()
+                ready_topics = st.container()
+
+                def show_ready_topics(piece):
+                    added = topic_stream.feed(piece)
+                    if not added:
+                        return
+                    # 학생이 버튼을 눌러 이 실행이 멈춰도 그때까지 완성된 주제는 3번 탭에 남도록 바로 저장
+                    save_topic_recommendations(topic_stream.topics, topic_interest, partial=True)
+                    # 완성된 주제의 논거 아이디어는 나머지 주제를 기다리지 않고 바로 미리 생성
+                    prefetch_argument_ideas(topic_stream.topics)
+                    first = len(topic_stream.topics) - len(added)
+                    with ready_topics:
+                        for i, topic in enumerate(added, first):
+                            button_key = f"streamed_topic_{i}"
+                            st.button(f"➡️ '{topic.title}' 사용하기", key=button_key,
+                                      on_click=use_recommended_topic, args=(button_key, topic.title))
+
+                if response:
+                    response_placeholder.markdown(response)
+                else:
+                    # API 호출하여 응답 받기 (스트리밍 모드에서는 생성되는 대로 표시하고 완성된 주제를 바로 읽음)
+                    response = get_gemini_response(prompt, template=TEMPLATE_RECOMMEND_TOPIC,
+                                                   placeholder=response_placeholder, on_chunk=show_ready_topics)
                 
                 if response:
-                    # 응답 결과를 세션 상태에 저장 (다른 기능에서도 참조 가능)
-                    st.session_state.topic_recommendations = response
-                    
-                    # 결과를 컨테이너에 표시 (더 넓은 크기로)
-                    with result_container:
-                        st.subheader(f"'{topic_interest}'에 관한 토론 주제 추천 📋")
-                        
-                        # Streamlit의 기본 컴포넌트로 결과 표시
-                        st.markdown(response)
-                        
-                        st.success("이 주제들 중에 마음에 드는 것이 있다면, '찬반 논거 아이디어 보기' 탭을 선택해 보세요! 👇")
+                    # 응답 전체를 주제 기록으로 읽어 저장 (읽지 못했을 때만 원래 응답을 그대로 보여 주기 위해 보관)
+                    topics = structure_response(TEMPLATE_RECOMMEND_TOPIC, response, from_library=from_library,
+                                                interest_input=topic_interest)
+                    save_topic_recommendations(topics, topic_interest, raw=response)
+                    # 다음 단계에서 고를 가능성이 높은 주제들의 논거 아이디어를 미리 준비
+                    # (스트리밍 중에 이미 예약한 주제는 응답 캐시나 동시 요청 합치기로 한 번만 생성됨)
+                    if topics:
+                        prefetch_argument_ideas(topics)
+                    # 3번 탭의 주제 버튼이 새 추천을 보도록 화면 전체를 다시 실행 (결과는 아래에서 다시 그림)
+                    st.rerun()
                 else:
-                    with result_container:
-                        st.error("앗! 주제를 찾는데 문제가 생겼어요. 다른 관심사를 입력해 볼까요?")
-    
+                    st.error("앗! 주제를 찾는데 문제가 생겼어요. 다른 관심사를 입력해 볼까요?")
+    elif st.session_state.get("topic_recommendations") or st.session_state.get("topic_recommendations_raw"):
+        # 마지막으로 받은 추천을 계속 보여 줌 (다른 부분이 다시 실행되어도 사라지지 않음)
+        with result_container:
+            st.subheader(f"'{st.session_state.get('topic_recommendations_interest', '')}'에 관한 토론 주제 추천 📋")
+            topics = st.session_state.get("topic_recommendations")
+            if not topics:
+                st.markdown(st.session_state.topic_recommendations_raw)
+            for i, topic in enumerate(topics or ()):
+                # 주제마다 따로 그려서 마음에 들지 않는 주제 하나만 바꿀 수 있게 함
+                topic_placeholder = st.empty()
+                topic_placeholder.markdown(render_topic(topic, i + 1))
+                if st.button("🔄 다른 주제로 바꾸기", key=f"replace_topic_{i}"):
+                    topic_placeholder.info("다른 주제를 찾고 있어요... 🔍")
+                    if replace_recommended_topic(i, topic_placeholder):
+                        # 3번 탭의 주제 버튼도 새 주제를 보도록 화면 전체를 다시 실행
+                        st.rerun()
+            if st.session_state.get("topic_recommendations_partial"):
+                st.caption("추천을 끝까지 받기 전에 멈춰서 여기까지만 받았어요. 주제를 더 보려면 '주제 추천 받기'를 다시 눌러 주세요.")
+            st.success("이 주제들 중에 마음에 드는 것이 있다면, '찬반 논거 아이디어 보기' 탭을 선택해 보세요! 👇")
+
     st.markdown('</div>', unsafe_allow_html=True) # input-container 닫기
-    st.markdown('</div>', unsafe_allow_html=True) # card-container 닫기
 
-# ============================
-# 3. 찬반 논거 아이디어 보기 기능
-# ============================
-with tab3:
+def render_recommend_section():
+    """관심사를 받아 토론 주제를 추천하는 화면"""
     st.markdown('<div class="card-container">', unsafe_allow_html=True)
-    st.header("💡 찬반 논거 아이디어 보기")
+    st.header("🔍 토론 주제 추천받기")
 
-    # 논거 아이디어란 무엇인지 설명
-    with st.expander("논거 아이디어가 뭐예요?", expanded=False):
+    # 토론 주제 예시 설명
+    with st.expander("토론 주제란?", expanded=False):
         st.markdown("""
-        <div style="background-color: #ffeef2; border-radius: 12px; padding: 1rem; border-left: 5px solid #ffd1dc;">
-        <strong>논거 아이디어</strong>는 토론에서 자신의 주장을 뒷받침하는 근거나 이유를 말해요! 
-        
-        예를 들어 '학교에서 스마트폰 사용 허용'이라는 주제를 토론한다면:
-        
-        <strong>찬성 의견의 논거</strong>로는:
-        <ul>
-        <li>"긴급 상황에서 부모님께 연락할 수 있어요"</li>
-        <li>"인터넷 검색으로 수업 중 모르는 내용을 바로 찾아볼 수 있어요"</li>
-        </ul>
+        <div style="background-color: #fff5f2; border-radius: 12px; padding: 1rem; border-left: 5px solid #ffd1dc;">
+        친구들이 관심을 가질 만한 다양한 주제를 추천해 줄 거야! 예를 들면:
         
-        <strong>반대 의견의 논거</strong>로는:
-        <ul>
-        <li>"게임이나 SNS에 집중하느라 수업에 집중하기 어려워요"</li>
-        <li>"친구들과 직접 대화하는 시간이 줄어들 수 있어요"</li>
-        </ul>
+        - **학교 스마트폰 사용** - 학교에서 스마트폰을 사용하는 것이 좋을까요? 
+        - **로봇 반려동물** - 진짜 동물 대신 로봇 반려동물을 키우는 것이 좋을까요?
+        - **학교 유니폼** - 학생들이 교복(유니폼)을 입어야 할까요?
         
-        이런 식으로 자신의 주장을 뒷받침하는 여러 이유들을 <strong>논거</strong>라고 해요! 😊
+        이런 주제들에 대해 친구들과 함께 다양한 생각을 나눌 수 있어요! 😊
         </div>
         """, unsafe_allow_html=True)
 
-    # 세션 상태 초기화 (버튼 클릭 추적용)
-    if 'selected_topic_for_tab3' not in st.session_state:
-        st.session_state.selected_topic_for_tab3 = None
+    recommend_form()
+    st.markdown('</div>', unsafe_allow_html=True) # card-container 닫기
 
+# ============================
+# 3. 찬반 논거 아이디어 보기 기능
+# ============================
+@fragment
+def arguments_form():
+    """
+    추천 주제 버튼, 주제 입력과 논거 아이디어 결과 (이 부분만 다시 실행)
+    새 아이디어를 받으면 4번 탭이 주제를 이어받도록 화면 전체를 한 번 다시 실행합니다.
+    """
     # 이전 단계에서 추천받은 주제가 있다면 버튼과 함께 표시
     recommended_topics = []
-    if 'topic_recommendations' in st.session_state and st.session_state.topic_recommendations:
-        raw_recommendations = st.session_state.topic_recommendations
-        # 정규 표현식을 사용하여 "## 주제 [번호]: [주제명]" 형식 추출
-        recommended_topics = re.findall(r"## 주제 \[\d+\]: (.*?)\n", raw_recommendations)
+    if st.session_state.get("topic_recommendations"):
+        # 추천을 받을 때 읽어 둔 주제 기록에서 주제명만 꺼냄
+        recommended_topics = [topic.title for topic in st.session_state.topic_recommendations]
         
         if recommended_topics:
             with st.expander("추천받은 주제를 사용하시겠어요?", expanded=True):
@@ -1278,19 +1837,15 @@ with tab3:
                         # 각 주제에 대한 버튼 생성
                         button_key = f"use_topic_{i}"
                         if st.button(f"➡️ '{topic_title}' 사용하기", key=button_key, use_container_width=True):
-                            # 버튼 클릭 시 해당 주제를 세션 상태에 저장하고 입력 필드 업데이트 준비
-                            st.session_state.selected_topic_for_tab3 = topic_title
-                            # Streamlit이 재실행되면서 아래 text_input의 value가 업데이트됨
-                            st.rerun() # 입력 필드 값을 즉시 업데이트하기 위해 rerun
+                            # 버튼 클릭 시 아래 입력 필드에 해당 주제를 바로 채움 (입력 필드가 그려지기 전이라 가능)
+                            st.session_state.argument_topic_input = topic_title
 
     # 토론 주제 입력 필드 (고유 키 부여) - 버튼 클릭 시 업데이트됨
     st.markdown('<div class="input-container">', unsafe_allow_html=True)
     st.markdown('<label style="font-weight: bold; margin-bottom: 0.5rem; display: block;">📋 어떤 주제에 대한 논거 아이디어가 필요하니?</label>', unsafe_allow_html=True)
     
-    # 버튼 클릭으로 선택된 주제가 있으면 해당 주제를 기본값으로 사용
-    argument_topic_value = st.session_state.selected_topic_for_tab3 if st.session_state.selected_topic_for_tab3 else ""
+    # 위의 주제 버튼을 누르면 그 주제가 채워짐
     argument_topic = st.text_input("",
-                            value=argument_topic_value, # 선택된 주제를 값으로 설정
                             key="argument_topic_input",
                             placeholder="토론하고 싶은 주제를 입력하거나 위에서 선택하세요!")
     
@@ -1304,9 +1859,6 @@ with tab3:
     
     # 버튼 클릭 시 처리
     if button_clicked:
-        # 버튼 클릭 시 선택된 주제 상태 초기화 (다음에 직접 입력 가능하도록)
-        st.session_state.selected_topic_for_tab3 = None 
-        
         # 입력 필드에서 최종 주제 가져오기
         current_argument_topic = st.session_state.argument_topic_input # text_input의 현재 값 사용
         
@@ -1314,63 +1866,92 @@ with tab3:
             # 입력값이 없을 경우 경고 메시지
             st.warning("토론하고 싶은 주제를 알려주면 찬성/반대 의견을 제시해 줄게요! 🙂")
         else:
-            # 로딩 상태 표시하며 API 호출
-            with st.spinner("찬성과 반대 의견을 생각하고 있어요... 잠시만요! 🧠"):
-                # 입력값을 프롬프트에 포맷팅
-                prompt = ARGUMENT_IDEAS_PROMPT_TEMPLATE.format(topic_input=current_argument_topic)
-                # API 호출하여 응답 받기
-                response = get_gemini_response(prompt)
+            # 자주 나오는 주제는 라이브러리에서 바로 답하고, 없을 때만 API 호출
+            # (라이브러리는 글자가 조금 다른 입력도 찾아 주므로, 찾았으면 라이브러리의 주제를 이 토론의 주제로 씀)
+            library_match = get_topic_library().match_arguments(current_argument_topic)
+            from_library = library_match is not None
+            if from_library:
+                current_argument_topic, response = library_match
+            # 입력값을 프롬프트에 포맷팅
+            prompt = fill_prompt(ARGUMENT_IDEAS_PROMPT_TEMPLATE, topic_input=current_argument_topic)
+            
+            # 결과를 컨테이너에 표시 (더 넓은 크기로)
+            with result_container:
+                st.subheader(f"'{current_argument_topic}'에 대한 찬반 논거 아이디어 ⚖️")
+                # 첫 글자가 도착할 때까지 안내 메시지를 보여주고, 이후 생성되는 내용으로 교체
+                response_placeholder = st.empty()
+                response_placeholder.info("찬성과 반대 의견을 생각하고 있어요... 잠시만요! 🧠")
+                if from_library:
+                    response_placeholder.markdown(response)
+                elif ARGUMENT_MODE == "split":
+                    # 찬성·반대를 두 요청으로 동시에 만들어 합침 (스트리밍 모드에서는 두 절반을 받는 대로 표시)
+                    response = get_split_argument_ideas(current_argument_topic, placeholder=response_placeholder)
+                else:
+                    # API 호출하여 응답 받기 (스트리밍 모드에서는 생성되는 대로 표시)
+                    response = get_gemini_response(prompt, template=TEMPLATE_ARGUMENT_IDEAS,
+                                                   placeholder=response_placeholder)
                 
                 if response:
-                    # 응답 결과를 세션 상태에 저장
-                    st.session_state.argument_response = response
+                    # 응답을 논거 기록으로 읽어 세션 상태에 저장 (읽지 못했을 때만 원래 응답을 보관)
+                    ideas = structure_response(TEMPLATE_ARGUMENT_IDEAS, response, from_library=from_library,
+                                               topic_input=current_argument_topic)
+                    st.session_state.argument_response = ideas
+                    st.session_state.argument_response_raw = None if ideas else response
                     # 사용된 주제를 세션 상태에 저장 (Tab 4에서 사용)
                     st.session_state.argument_topic = current_argument_topic 
-                    
-                    # 결과를 컨테이너에 표시 (더 넓은 크기로)
-                    with result_container:
-                        st.subheader(f"'{current_argument_topic}'에 대한 찬반 논거 아이디어 ⚖️")
-                        
-                        # Streamlit의 기본 컴포넌트로 결과 표시
-                        st.markdown(response)
-                        
-                        st.success("이제 이 아이디어들을 바탕으로 나만의 의견을 만들어 보세요! '의견 피드백 받기' 탭으로 이동해 의견을 확인받을 수 있어요 👇")
+                    # 4번 탭이 이 주제를 이어받도록 화면 전체를 다시 실행 (결과는 아래에서 다시 그림)
+                    st.rerun()
                 else:
-                    with result_container:
-                        st.error("아이디어를 찾는데 문제가 생겼어요. 다른 주제로 시도해볼까요?")
-    
+                    st.error("아이디어를 찾는데 문제가 생겼어요. 다른 주제로 시도해볼까요?")
+    elif st.session_state.get("argument_response") or st.session_state.get("argument_response_raw"):
+        # 마지막으로 받은 논거 아이디어를 계속 보여 줌
+        with result_container:
+            st.subheader(f"'{st.session_state.get('argument_topic', '')}'에 대한 찬반 논거 아이디어 ⚖️")
+            ideas = st.session_state.get("argument_response")
+            st.markdown(render_response(TEMPLATE_ARGUMENT_IDEAS, ideas) if ideas
+                        else st.session_state.argument_response_raw)
+            st.success("이제 이 아이디어들을 바탕으로 나만의 의견을 만들어 보세요! '의견 피드백 받기' 탭으로 이동해 의견을 확인받을 수 있어요 👇")
+
     st.markdown('</div>', unsafe_allow_html=True) # input-container 닫기
-    st.markdown('</div>', unsafe_allow_html=True) # card-container 닫기
 
-# ============================
-# 4. 간단 피드백 받기 기능
-# ============================
-with tab4:
+def render_arguments_section():
+    """토론 주제의 찬반 논거 아이디어를 보여 주는 화면"""
     st.markdown('<div class="card-container">', unsafe_allow_html=True)
-    st.header("📝 내 의견 피드백 받기")
+    st.header("💡 찬반 논거 아이디어 보기")
 
-    # 피드백이란 무엇인지 설명
-    with st.expander("피드백은 어떻게 받을 수 있나요?", expanded=False):
+    # 논거 아이디어란 무엇인지 설명
+    with st.expander("논거 아이디어가 뭐예요?", expanded=False):
         st.markdown("""
-        <div style="background-color: #fff9f9; border-radius: 12px; padding: 1rem; border-left: 5px solid #ffe0e6;">
-        내가 생각한 의견을 더 잘 표현할 수 있도록 도움을 받는 기능이에요!
+        <div style="background-color: #ffeef2; border-radius: 12px; padding: 1rem; border-left: 5px solid #ffd1dc;">
+        <strong>논거 아이디어</strong>는 토론에서 자신의 주장을 뒷받침하는 근거나 이유를 말해요! 
         
-        <ol>
-        <li>토론하고 싶은 주제를 입력해요 (예: 학교 스마트폰 사용)</li>
-        <li>그 주제에 대한 내 생각을 자유롭게 적어요</li>
-        <li>'피드백 받기' 버튼을 누르면:
-           <ul>
-           <li>내 의견이 찬성인지 반대인지 알려줘요</li>
-           <li>내 생각을 더 탄탄하게 만들 수 있는 조언을 받을 수 있어요</li>
-           <li>다른 친구들은 어떻게 생각할지도 생각해볼 수 있어요</li>
-           </ul>
-        </li>
-        </ol>
+        예를 들어 '학교에서 스마트폰 사용 허용'이라는 주제를 토론한다면:
         
-        💡 <strong>도움말</strong>: 솔직하게 내 생각을 쓰면 더 도움이 되는 피드백을 받을 수 있어요!
+        <strong>찬성 의견의 논거</strong>로는:
+        <ul>
+        <li>"긴급 상황에서 부모님께 연락할 수 있어요"</li>
+        <li>"인터넷 검색으로 수업 중 모르는 내용을 바로 찾아볼 수 있어요"</li>
+        </ul>
+        
+        <strong>반대 의견의 논거</strong>로는:
+        <ul>
+        <li>"게임이나 SNS에 집중하느라 수업에 집중하기 어려워요"</li>
+        <li>"친구들과 직접 대화하는 시간이 줄어들 수 있어요"</li>
+        </ul>
+        
+        이런 식으로 자신의 주장을 뒷받침하는 여러 이유들을 <strong>논거</strong>라고 해요! 😊
         </div>
         """, unsafe_allow_html=True)
 
+    arguments_form()
+    st.markdown('</div>', unsafe_allow_html=True) # card-container 닫기
+
+# ============================
+# 4. 간단 피드백 받기 기능
+# ============================
+@fragment
+def feedback_form():
+    """주제·의견 입력과 피드백 결과 (입력하거나 버튼을 눌러도 이 부분만 다시 실행)"""
     # 이전 단계에서 사용한 주제가 있다면 가져오기
     previous_topic = st.session_state.get('argument_topic', "") # .get()으로 안전하게 접근
 
@@ -1378,11 +1959,13 @@ with tab4:
     if previous_topic:
         st.info(f"앞에서 '{previous_topic}' 주제에 대해 논거 아이디어를 살펴봤네요! 이 주제로 계속할까요?")
 
-    # 토론 주제 입력 필드 (고유 키 부여) - 이전 주제 자동 완성
+    # 토론 주제 입력 필드 (고유 키 부여) - 이전 단계 주제가 바뀔 때마다 자동 완성
+    if st.session_state.get("feedback_topic_source") != previous_topic:
+        st.session_state.feedback_topic_input = previous_topic
+        st.session_state.feedback_topic_source = previous_topic
     st.markdown('<div class="input-container">', unsafe_allow_html=True)
     st.markdown('<label style="font-weight: bold; margin-bottom: 0.5rem; display: block;">📌 어떤 주제에 대한 의견인가요?</label>', unsafe_allow_html=True)
     feedback_topic = st.text_input("", 
-                             value=previous_topic, # 이전 단계 주제를 기본값으로 설정
                              key="feedback_topic_input",
                              placeholder="토론 주제를 입력해 주세요 (예: 학교 스마트폰 사용, 로봇 반려동물)")
     st.markdown('</div>', unsafe_allow_html=True)
@@ -1402,28 +1985,64 @@ with tab4:
             # 필수 입력값이 없을 경우 경고 메시지
             st.warning("토론 주제와 내 의견을 모두 입력해야 피드백을 받을 수 있어요! 🙂")
         else:
-            # 로딩 상태 표시하며 API 호출
-            with st.spinner("의견을 분석하고 있어요... 금방 피드백을 알려드릴게요! 🔍"):
-                # 입력값을 프롬프트에 포맷팅
-                prompt = FEEDBACK_PROMPT_TEMPLATE.format(
-                    topic_input=feedback_topic,
-                    student_argument_input=feedback_argument
-                )
-                # API 호출하여 응답 받기
-                response = get_gemini_response(prompt)
+            # 입력값을 프롬프트에 포맷팅
+            prompt = fill_prompt(
+                FEEDBACK_PROMPT_TEMPLATE,
+                topic_input=feedback_topic,
+                student_argument_input=feedback_argument
+            )
+            
+            # 결과를 확장 패널에 표시 (기본 확장 상태)
+            with st.expander("내 의견에 대한 피드백 📋", expanded=True):
+                # 첫 글자가 도착할 때까지 안내 메시지를 보여주고, 이후 생성되는 내용으로 교체
+                response_placeholder = st.empty()
+                response_placeholder.info("의견을 분석하고 있어요... 금방 피드백을 알려드릴게요! 🔍")
+                # API 호출하여 응답 받기 (스트리밍 모드에서는 생성되는 대로 표시)
+                response = get_gemini_response(prompt, template=TEMPLATE_FEEDBACK,
+                                               placeholder=response_placeholder)
                 
                 if response:
-                    # 응답 결과를 세션 상태에 저장
-                    st.session_state.feedback_result = response
-                    # 결과를 확장 패널에 표시 (기본 확장 상태)
-                    with st.expander("내 의견에 대한 피드백 📋", expanded=True):
-                        st.markdown(response)
-                        st.balloons()  # 축하 효과 추가
-                        st.success("피드백을 받았어요! 이제 이 내용을 바탕으로 의견을 더 발전시켜 보세요. 토론할 때 큰 도움이 될 거예요! 👍")
+                    # 응답을 피드백 기록으로 읽어 세션 상태에 저장하고, 읽었으면 정리된 모양으로 다시 보여 줌
+                    feedback = structure_response(TEMPLATE_FEEDBACK, response, topic_input=feedback_topic,
+                                                  student_argument_input=feedback_argument)
+                    st.session_state.feedback_result = feedback
+                    if feedback:
+                        response_placeholder.markdown(render_response(TEMPLATE_FEEDBACK, feedback))
+                    st.balloons()  # 축하 효과 추가
+                    st.success("피드백을 받았어요! 이제 이 내용을 바탕으로 의견을 더 발전시켜 보세요. 토론할 때 큰 도움이 될 거예요! 👍")
                 else:
                     st.error("피드백을 생성하는데 문제가 생겼어요. 다시 시도해 볼까요?")
     st.markdown('</div>', unsafe_allow_html=True)
 
+def render_feedback_section():
+    """학생 의견에 피드백을 주는 화면"""
+    st.markdown('<div class="card-container">', unsafe_allow_html=True)
+    st.header("📝 내 의견 피드백 받기")
+
+    # 피드백이란 무엇인지 설명
+    with st.expander("피드백은 어떻게 받을 수 있나요?", expanded=False):
+        st.markdown("""
+        <div style="background-color: #fff9f9; border-radius: 12px; padding: 1rem; border-left: 5px solid #ffe0e6;">
+        내가 생각한 의견을 더 잘 표현할 수 있도록 도움을 받는 기능이에요!
+        
+        <ol>
+        <li>토론하고 싶은 주제를 입력해요 (예: 학교 스마트폰 사용)</li>
+        <li>그 주제에 대한 내 생각을 자유롭게 적어요</li>
+        <li>'피드백 받기' 버튼을 누르면:
+           <ul>
+           <li>내 의견이 찬성인지 반대인지 알려줘요</li>
+           <li>내 생각을 더 탄탄하게 만들 수 있는 조언을 받을 수 있어요</li>
+           <li>다른 친구들은 어떻게 생각할지도 생각해볼 수 있어요</li>
+           </ul>
+        </li>
+        </ol>
+        
+        💡 <strong>도움말</strong>: 솔직하게 내 생각을 쓰면 더 도움이 되는 피드백을 받을 수 있어요!
+        </div>
+        """, unsafe_allow_html=True)
+
+    feedback_form()
+
     # 예시 의견 보여주기
     with st.expander("의견 작성이 어렵다면? 예시를 참고해 보세요!", expanded=False):
         st.subheader("📱 예시 1: 학교 스마트폰 사용에 대한 의견")
@@ -1439,124 +2058,9 @@ with tab4:
 # ============================
 # 5. 토론 마무리 활동 도구
 # ============================
-with tab5:
-    # 마무리 활동 TIP
-    st.header("🤝 토론 마무리하기")
-    
-    # 토론 마무리 활동 소개 (중앙 정렬)
-    st.markdown("<h3 style='text-align:center'>😀 토론 마무리 활동 TIP! 이렇게 해보세요!</h3>", unsafe_allow_html=True)
-    st.markdown("<p style='text-align:center'>토론이 끝난 후에 친구들과 함께 할 수 있는, 생각을 정리하고 나누는 활동이에요.</p>", unsafe_allow_html=True)
-    
-    # 구분선 추가
-    st.divider()
-    
-    # 팁 1
-    st.markdown("""
-    <div style="display: flex; align-items: flex-start; margin-bottom: 1rem; background-color: #f8f8f8; padding: 1rem; border-radius: 10px;">
-        <div style="background-color: #ffcdd2; color: white; border-radius: 50%; width: 40px; height: 40px; display: flex; justify-content: center; align-items: center; font-weight: bold; font-size: 20px; margin-right: 15px;">1</div>
-        <div style="flex: 1;">
-            <h3 style="margin-top: 0; color: #333333;">📝 요약하기</h3>
-            <div style="background-color: #e6f2ff; padding: 0.5rem; border-radius: 5px; margin-bottom: 0.5rem;">
-                <p style="margin: 0; color: #333333;">토론에서 나온 중요한 생각들을 정리해 봐요.</p>
-            </div>
-            <ul style="margin-top: 0.5rem; padding-left: 1.5rem;">
-                <li>찬성/반대 입장에서 나온 주요 의견들을 간단히 정리해 봅니다.</li>
-                <li>가장 설득력 있었던 의견은 무엇인지 생각해 봅니다.</li>
-            </ul>
-        </div>
-    </div>
-    """, unsafe_allow_html=True)
-    
-    # 구분선 추가
-    st.divider()
-    
-    # 팁 2
-    st.markdown("""
-    <div style="display: flex; align-items: flex-start; margin-bottom: 1rem; background-color: #f8f8f8; padding: 1rem; border-radius: 10px;">
-        <div style="background-color: #ffcdd2; color: white; border-radius: 50%; width: 40px; height: 40px; display: flex; justify-content: center; align-items: center; font-weight: bold; font-size: 20px; margin-right: 15px;">2</div>
-        <div style="flex: 1;">
-            <h3 style="margin-top: 0; color: #333333;">💭 공감하기</h3>
-            <div style="background-color: #e6f2ff; padding: 0.5rem; border-radius: 5px; margin-bottom: 0.5rem;">
-                <p style="margin: 0; color: #333333;">내 생각과 다른 의견에서도 배울 점을 찾아봐요.</p>
-            </div>
-            <ul style="margin-top: 0.5rem; padding-left: 1.5rem;">
-                <li>나와 다른 생각을 들었을 때 어떤 느낌이 들었는지 나눠 봅니다.</li>
-                <li>다른 친구의 의견 중 '좋은 점'을 찾아 이야기해 봅니다.</li>
-            </ul>
-        </div>
-    </div>
-    """, unsafe_allow_html=True)
-    
-    # 구분선 추가
-    st.divider()
-    
-    # 팁 3
-    st.markdown("""
-    <div style="display: flex; align-items: flex-start; margin-bottom: 1rem; background-color: #f8f8f8; padding: 1rem; border-radius: 10px;">
-        <div style="background-color: #ffcdd2; color: white; border-radius: 50%; width: 40px; height: 40px; display: flex; justify-content: center; align-items: center; font-weight: bold; font-size: 20px; margin-right: 15px;">3</div>
-        <div style="flex: 1;">
-            <h3 style="margin-top: 0; color: #333333;">❓ 질문하기</h3>
-            <div style="background-color: #e6f2ff; padding: 0.5rem; border-radius: 5px; margin-bottom: 0.5rem;">
-                <p style="margin: 0; color: #333333;">"왜 그렇게 생각해요?", "예시를 들어줄래요?"</p>
-            </div>
-            <ul style="margin-top: 0.5rem; padding-left: 1.5rem;">
-                <li>더 알고 싶은 내용이 있다면 질문을 통해 대화를 이어갑니다.</li>
-                <li>열린 질문을 통해 다양한 생각을 더 깊이 탐색해 봅니다.</li>
-            </ul>
-        </div>
-    </div>
-    """, unsafe_allow_html=True)
-    
-    # 구분선 추가
-    st.divider()
-    
-    # 팁 4
-    st.markdown("""
-    <div style="display: flex; align-items: flex-start; margin-bottom: 1rem; background-color: #f8f8f8; padding: 1rem; border-radius: 10px;">
-        <div style="background-color: #ffcdd2; color: white; border-radius: 50%; width: 40px; height: 40px; display: flex; justify-content: center; align-items: center; font-weight: bold; font-size: 20px; margin-right: 15px;">4</div>
-        <div style="flex: 1;">
-            <h3 style="margin-top: 0; color: #333333;">🤗 존중하기</h3>
-            <div style="background-color: #e6f2ff; padding: 0.5rem; border-radius: 5px; margin-bottom: 0.5rem;">
-                <p style="margin: 0; color: #333333;">다른 의견도 소중해요!</p>
-            </div>
-            <ul style="margin-top: 0.5rem; padding-left: 1.5rem;">
-                <li>모든 의견에 감사하는 마음을 표현합니다.</li>
-                <li>서로 다른 생각이 있어 더 풍부한 논의가 가능했음을 알아봅니다.</li>
-            </ul>
-        </div>
-    </div>
-    """, unsafe_allow_html=True)
-    
-    # 구분선 추가
-    st.divider()
-    
-    # 팁 5
-    st.markdown("""
-    <div style="display: flex; align-items: flex-start; margin-bottom: 1rem; background-color: #f8f8f8; padding: 1rem; border-radius: 10px;">
-        <div style="background-color: #ffcdd2; color: white; border-radius: 50%; width: 40px; height: 40px; display: flex; justify-content: center; align-items: center; font-weight: bold; font-size: 20px; margin-right: 15px;">5</div>
-        <div style="flex: 1;">
-            <h3 style="margin-top: 0; color: #333333;">🌱 마음 열기</h3>
-            <div style="background-color: #e6f2ff; padding: 0.5rem; border-radius: 5px; margin-bottom: 0.5rem;">
-                <p style="margin: 0; color: #333333;">내 생각이 바뀔 수도 있어요.</p>
-            </div>
-            <ul style="margin-top: 0.5rem; padding-left: 1.5rem;">
-                <li>토론 후 내 생각이 어떻게 변했는지 이야기해 봅니다.</li>
-                <li>다른 사람의 의견을 듣고 새롭게 배운 점을 나눠 봅니다.</li>
-            </ul>
-        </div>
-    </div>
-    """, unsafe_allow_html=True)
-    
-    # 구분선 추가
-    st.divider()
-    
-    # 마무리 메시지
-    st.success("토론은 정답을 찾는 게 아니라, 여러 생각을 나누는 거예요! 🦉✨")
-    
-    # 실제 토론 마무리 활동 입력 폼
-    st.subheader("💬 토론 마무리 활동")
-    st.markdown("토론에서 나온 생각들을 정리하고 새로운 해결책을 찾아보세요.")
-    
+@fragment
+def wrapup_form():
+    """마무리 활동 입력과 정리 결과 (입력하거나 버튼을 눌러도 이 부분만 다시 실행)"""
     # 토론 주제 입력
     st.markdown("#### 📌 토론했던 주제는 무엇인가요?")
     topic = st.text_input("", key="topic_input", placeholder="예: 학교에서 스마트폰 사용 허용 여부")
@@ -1683,6 +2187,127 @@ with tab5:
             
         else:
             st.warning("토론 주제를 입력해주세요!")
+
+def render_wrapup_section():
+    """토론 마무리 활동 화면"""
+    # 마무리 활동 TIP
+    st.header("🤝 토론 마무리하기")
+    
+    # 토론 마무리 활동 소개 (중앙 정렬)
+    st.markdown("<h3 style='text-align:center'>😀 토론 마무리 활동 TIP! 이렇게 해보세요!</h3>", unsafe_allow_html=True)
+    st.markdown("<p style='text-align:center'>토론이 끝난 후에 친구들과 함께 할 수 있는, 생각을 정리하고 나누는 활동이에요.</p>", unsafe_allow_html=True)
+    
+    # 구분선 추가
+    st.divider()
+    
+    # 팁 1
+    st.markdown("""
+    <div style="display: flex; align-items: flex-start; margin-bottom: 1rem; background-color: #f8f8f8; padding: 1rem; border-radius: 10px;">
+        <div style="background-color: #ffcdd2; color: white; border-radius: 50%; width: 40px; height: 40px; display: flex; justify-content: center; align-items: center; font-weight: bold; font-size: 20px; margin-right: 15px;">1</div>
+        <div style="flex: 1;">
+            <h3 style="margin-top: 0; color: #333333;">📝 요약하기</h3>
+            <div style="background-color: #e6f2ff; padding: 0.5rem; border-radius: 5px; margin-bottom: 0.5rem;">
+                <p style="margin: 0; color: #333333;">토론에서 나온 중요한 생각들을 정리해 봐요.</p>
+            </div>
+            <ul style="margin-top: 0.5rem; padding-left: 1.5rem;">
+                <li>찬성/반대 입장에서 나온 주요 의견들을 간단히 정리해 봅니다.</li>
+                <li>가장 설득력 있었던 의견은 무엇인지 생각해 봅니다.</li>
+            </ul>
+        </div>
+    </div>
+    """, unsafe_allow_html=True)
+    
+    # 구분선 추가
+    st.divider()
+    
+    # 팁 2
+    st.markdown("""
+    <div style="display: flex; align-items: flex-start; margin-bottom: 1rem; background-color: #f8f8f8; padding: 1rem; border-radius: 10px;">
+        <div style="background-color: #ffcdd2; color: white; border-radius: 50%; width: 40px; height: 40px; display: flex; justify-content: center; align-items: center; font-weight: bold; font-size: 20px; margin-right: 15px;">2</div>
+        <div style="flex: 1;">
+            <h3 style="margin-top: 0; color: #333333;">💭 공감하기</h3>
+            <div style="background-color: #e6f2ff; padding: 0.5rem; border-radius: 5px; margin-bottom: 0.5rem;">
+                <p style="margin: 0; color: #333333;">내 생각과 다른 의견에서도 배울 점을 찾아봐요.</p>
+            </div>
+            <ul style="margin-top: 0.5rem; padding-left: 1.5rem;">
+                <li>나와 다른 생각을 들었을 때 어떤 느낌이 들었는지 나눠 봅니다.</li>
+                <li>다른 친구의 의견 중 '좋은 점'을 찾아 이야기해 봅니다.</li>
+            </ul>
+        </div>
+    </div>
+    """, unsafe_allow_html=True)
+    
+    # 구분선 추가
+    st.divider()
+    
+    # 팁 3
+    st.markdown("""
+    <div style="display: flex; align-items: flex-start; margin-bottom: 1rem; background-color: #f8f8f8; padding: 1rem; border-radius: 10px;">
+        <div style="background-color: #ffcdd2; color: white; border-radius: 50%; width: 40px; height: 40px; display: flex; justify-content: center; align-items: center; font-weight: bold; font-size: 20px; margin-right: 15px;">3</div>
+        <div style="flex: 1;">
+            <h3 style="margin-top: 0; color: #333333;">❓ 질문하기</h3>
+            <div style="background-color: #e6f2ff; padding: 0.5rem; border-radius: 5px; margin-bottom: 0.5rem;">
+                <p style="margin: 0; color: #333333;">"왜 그렇게 생각해요?", "예시를 들어줄래요?"</p>
+            </div>
+            <ul style="margin-top: 0.5rem; padding-left: 1.5rem;">
+                <li>더 알고 싶은 내용이 있다면 질문을 통해 대화를 이어갑니다.</li>
+                <li>열린 질문을 통해 다양한 생각을 더 깊이 탐색해 봅니다.</li>
+            </ul>
+        </div>
+    </div>
+    """, unsafe_allow_html=True)
+    
+    # 구분선 추가
+    st.divider()
+    
+    # 팁 4
+    st.markdown("""
+    <div style="display: flex; align-items: flex-start; margin-bottom: 1rem; background-color: #f8f8f8; padding: 1rem; border-radius: 10px;">
+        <div style="background-color: #ffcdd2; color: white; border-radius: 50%; width: 40px; height: 40px; display: flex; justify-content: center; align-items: center; font-weight: bold; font-size: 20px; margin-right: 15px;">4</div>
+        <div style="flex: 1;">
+            <h3 style="margin-top: 0; color: #333333;">🤗 존중하기</h3>
+            <div style="background-color: #e6f2ff; padding: 0.5rem; border-radius: 5px; margin-bottom: 0.5rem;">
+                <p style="margin: 0; color: #333333;">다른 의견도 소중해요!</p>
+            </div>
+            <ul style="margin-top: 0.5rem; padding-left: 1.5rem;">
+                <li>모든 의견에 감사하는 마음을 표현합니다.</li>
+                <li>서로 다른 생각이 있어 더 풍부한 논의가 가능했음을 알아봅니다.</li>
+            </ul>
+        </div>
+    </div>
+    """, unsafe_allow_html=True)
+    
+    # 구분선 추가
+    st.divider()
+    
+    # 팁 5
+    st.markdown("""
+    <div style="display: flex; align-items: flex-start; margin-bottom: 1rem; background-color: #f8f8f8; padding: 1rem; border-radius: 10px;">
+        <div style="background-color: #ffcdd2; color: white; border-radius: 50%; width: 40px; height: 40px; display: flex; justify-content: center; align-items: center; font-weight: bold; font-size: 20px; margin-right: 15px;">5</div>
+        <div style="flex: 1;">
+            <h3 style="margin-top: 0; color: #333333;">🌱 마음 열기</h3>
+            <div style="background-color: #e6f2ff; padding: 0.5rem; border-radius: 5px; margin-bottom: 0.5rem;">
+                <p style="margin: 0; color: #333333;">내 생각이 바뀔 수도 있어요.</p>
+            </div>
+            <ul style="margin-top: 0.5rem; padding-left: 1.5rem;">
+                <li>토론 후 내 생각이 어떻게 변했는지 이야기해 봅니다.</li>
+                <li>다른 사람의 의견을 듣고 새롭게 배운 점을 나눠 봅니다.</li>
+            </ul>
+        </div>
+    </div>
+    """, unsafe_allow_html=True)
+    
+    # 구분선 추가
+    st.divider()
+    
+    # 마무리 메시지
+    st.success("토론은 정답을 찾는 게 아니라, 여러 생각을 나누는 거예요! 🦉✨")
+    
+    # 실제 토론 마무리 활동 입력 폼
+    st.subheader("💬 토론 마무리 활동")
+    st.markdown("토론에서 나온 생각들을 정리하고 새로운 해결책을 찾아보세요.")
+    
+    wrapup_form()
     
     # 선생님을 위한 도움말
     with st.expander("선생님을 위한 도움말"):
@@ -1695,8 +2320,106 @@ with tab5:
         - 토론 주제는 학생들의 관심사와 연결해 보세요.
         - 찬반 의견을 나눠 역할극처럼 진행해 보세요.
         - 모든 학생이 최소 한 번씩 의견을 말할 수 있도록 해주세요.
+        - 반 전체 의견을 CSV 파일로 모았다면 주소 뒤에 `?page=batch`를 붙여 한꺼번에 피드백을 받을 수 있어요 (TEACHER_PASSWORD 설정 필요).
         """)
 
+        # Gemini 클라이언트 준비 상태 (가져오기·구성은 백그라운드에서 한 번만)
+        model_stats = get_gemini_service().models.stats()
+        if GEMINI_PROVIDER == "fake":
+            st.caption(
+                f"Gemini 클라이언트: 가짜 제공자 (호출 {sum(model_stats['calls'].values())}회 · "
+                f"429 {model_stats['errors_429'] + model_stats['quota_exceeded']}회 · "
+                f"503 {model_stats['errors_503']}회 · 멈춤 {model_stats['hangs']}회)"
+            )
+        elif model_stats["ready"]:
+            st.caption(f"Gemini 클라이언트: 준비됨 (가져오기·구성 {model_stats['load_seconds']:.1f}초)")
+        else:
+            st.caption("Gemini 클라이언트: 준비 중")
+        # 로컬 주제 라이브러리 현황
+        library_stats = get_topic_library().stats()
+        st.caption(
+            f"주제 라이브러리 v{library_stats['version']}: 바로 답함 {library_stats['hits']}회 · "
+            f"API로 넘김 {library_stats['misses']}회"
+        )
+        # 응답 캐시 현황 (같은 질문이 얼마나 재사용되었는지 확인용)
+        cache_stats = get_gemini_service().cache.stats()
+        st.caption(
+            f"응답 캐시: 적중 {cache_stats['hits']}회 · 미스 {cache_stats['misses']}회 "
+            f"(적중률 {cache_stats['hit_rate']:.0%}) · 저장 {cache_stats['entries']}개 "
+            f"({cache_stats['bytes'] / 1024:.0f}KB)"
+        )
+        # 디스크 캐시 현황 (다른 프로세스나 재시작 전에 만든 응답 재사용)
+        if get_gemini_service().disk_cache is not None:
+            disk_stats = get_gemini_service().disk_cache.stats()
+            st.caption(
+                f"디스크 캐시: 적중 {disk_stats['hits']}회 · 미스 {disk_stats['misses']}회 · "
+                f"저장 {disk_stats['writes']}건 · 정리 {disk_stats['evictions']}건"
+            )
+        # 동시 요청 합치기 현황 (동시에 누른 같은 요청 중 API 호출을 아낀 횟수)
+        flight_stats = get_gemini_service().singleflight.stats()
+        st.caption(
+            f"동시 요청 합치기: 실제 호출 {flight_stats['leaders']}회 · "
+            f"절약 {flight_stats['followers']}회"
+        )
+        # 속도 제한 대기열 현황
+        limiter_stats = get_gemini_service().limiter.stats()
+        st.caption(
+            f"호출 대기열: 지금 {limiter_stats['queued']}건 대기 · 최대 {limiter_stats['max_queue']}건 · "
+            f"기다린 요청 {limiter_stats['waited']}건 (총 {limiter_stats['wait_seconds']:.0f}초)"
+        )
+        # 재시도·제한 시간·회로 차단기 현황
+        resilience_stats = get_gemini_service().resilience_stats()
+        breaker_stats = resilience_stats["breaker"]
+        st.caption(
+            f"재시도 {resilience_stats['retries']}회 · 제한 시간 초과 {resilience_stats['timeouts']}회 · "
+            f"포기 {resilience_stats['gave_up']}회 · 멈춤 {resilience_stats['cancelled']}회 · 회로 차단기 {breaker_stats['state']} "
+            f"(열림 {breaker_stats['opened']}회, 바로 실패 {breaker_stats['rejected']}회)"
+        )
+        # 논거 아이디어 미리 생성 현황
+        prefetch_stats = get_prefetcher().stats()
+        st.caption(
+            f"논거 아이디어 미리 생성: 완료 {prefetch_stats['completed']}건 · "
+            f"취소 {prefetch_stats['cancelled']}건 · 할당량 때문에 건너뜀 {prefetch_stats['skipped']}건"
+        )
+        # 기능별 평균 응답 시간 (첫 글자가 보이기까지 / 생성 완료까지)
+        for template_name, timing in get_gemini_service().timing_stats().items():
+            st.caption(
+                f"응답 시간 [{template_name}]: 첫 글자 {timing['avg_first_token']:.1f}초 · "
+                f"전체 {timing['avg_total']:.1f}초 (최근 {timing['count']}회 평균)"
+            )
+
+# ============================
+# 화면 구성: 탭 또는 섹션
+# ============================
+# (섹션 ID, 메뉴 이름, 그리는 함수) - 섹션 ID는 주소의 ?section= 값으로 쓰임
+SECTIONS = [
+    ("guide", "**📚 경기 토론 수업 모형**", render_guide_section),
+    ("recommend", "**🔍 토론 주제 추천**", render_recommend_section),
+    ("arguments", "**💡 찬반 논거 아이디어**", render_arguments_section),
+    ("feedback", "**📝 의견 피드백 받기**", render_feedback_section),
+    ("wrapup", "**🤝 토론 마무리하기**", render_wrapup_section),
+]
+# 섹션 모드에서 다른 섹션에 다녀와도 남아 있어야 하는 입력 위젯 키
+SECTION_INPUT_KEYS = [
+    "topic_interest_input", "argument_topic_input", "feedback_topic_input", "feedback_argument_input",
+    "topic_input", "pro_opinion", "pro_good_points", "con_opinion", "con_good_points",
+    "new_solution", "reflection",
+]
+
+if NAVIGATION_MODE == "sections":
+    # 고른 섹션의 코드만 실행 (나머지 섹션의 HTML, 입력 폼, 정규식 처리를 건너뜀)
+    keep_section_inputs()
+    current_section = selected_section()
+    for section_id, _label, render_section in SECTIONS:
+        if section_id == current_section:
+            render_section()
+else:
+    # 탭 메뉴로 기능 분리 (모든 탭의 코드가 실행됨)
+    tabs = st.tabs([label for _section_id, label, _render in SECTIONS])
+    for tab, (_section_id, _label, render_section) in zip(tabs, SECTIONS):
+        with tab:
+            render_section()
+
 # 푸터 추가
 st.markdown("""
 <div class="footer">
@@ -1707,3 +2430,6 @@ st.markdown("""
     </div>
 </div>
 """, unsafe_allow_html=True)
+
+# 실행이 끝까지 왔으므로 이번에 보낸 스타일시트는 브라우저에 전달됨
+confirm_stylesheet()
@@ -0,0 +1,266 @@
+"""
+선생님용 일괄 피드백 모듈
+
+선생님이 모은 반 전체의 의견(학생, 주제, 의견)을 CSV/TSV 파일로 받아 피드백을 한꺼번에 만듭니다.
+한 줄씩 차례로 기다리면 전체 시간이 모든 호출 시간의 합이 되므로, 제한된 수의 스레드에서 여러 줄을
+동시에 실행합니다. 실제 API 요청은 모두 GeminiService의 공용 속도 제한기를 거치므로
+분당 한도를 넘지 않고, 학생들의 요청과도 공평하게 차례를 나눕니다.
+Streamlit에 의존하지 않으며, 화면 표시는 app.py가 snapshot()을 읽어 맡습니다.
+
+- 줄마다 대기 → 작성 중(받은 글자 수) → 완료/실패 상태를 기록
+- 실패한 줄만 다시 실행(resume) 가능
+- 결과를 입력과 같은 형식(CSV 또는 TSV)의 파일 하나로 내보냄
+"""
+
+import csv
+import io
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# 줄 상태
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+# 결과 파일에 적을 상태 이름
+STATUS_TITLES = {PENDING: "대기", RUNNING: "작성 중", DONE: "완료", FAILED: "실패"}
+
+# 열 이름 → 머리글로 쓸 수 있는 이름들 (소문자·공백 제거 후 비교)
+COLUMN_ALIASES = {
+    "student": ("student", "name", "학생", "이름", "학생이름"),
+    "topic": ("topic", "주제", "토론주제"),
+    "opinion": ("opinion", "argument", "의견", "내의견", "논거"),
+}
+# 결과 파일의 열 (열 이름, 머리글)
+OUTPUT_COLUMNS = [
+    ("student", "학생"),
+    ("topic", "주제"),
+    ("opinion", "의견"),
+    ("feedback", "피드백"),
+    ("status", "상태"),
+    ("error", "오류"),
+]
+
+
+class BatchFormatError(ValueError):
+    """올린 파일을 (학생, 주제, 의견) 표로 읽을 수 없을 때 발생하는 예외"""
+
+
+def decode_table(data):
+    """
+    올린 파일의 바이트를 글자로 바꾸는 함수
+    엑셀에서 저장한 파일은 UTF-8(BOM 포함)이거나 한국어 윈도우의 CP949인 경우가 많아 둘 다 시도합니다.
+    """
+    if isinstance(data, str):
+        return data
+    for encoding in ("utf-8-sig", "cp949"):
+        try:
+            return data.decode(encoding)
+        except UnicodeDecodeError:
+            continue
+    raise BatchFormatError("파일의 글자 인코딩을 알 수 없어요. UTF-8로 저장해 주세요.")
+
+
+def _header_columns(header):
+    """머리글 줄에서 알아본 열 이름 → 칸 번호를 찾는 함수 (알아본 열이 없으면 빈 dict)"""
+    names = ["".join(cell.split()).lower() for cell in header]
+    columns = {}
+    for column, aliases in COLUMN_ALIASES.items():
+        for index, name in enumerate(names):
+            if name in aliases:
+                columns[column] = index
+                break
+    return columns
+
+
+def parse_opinion_table(data, default_topic="", max_rows=None):
+    """
+    CSV 또는 TSV 파일을 (학생, 주제, 의견) 줄 목록으로 읽는 함수
+
+    머리글(학생/주제/의견 또는 student/topic/opinion)이 있으면 열 순서는 상관없고,
+    없으면 학생, 주제, 의견 순서로 봅니다. 머리글이 있는데 의견 열을 알아볼 수 없으면
+    머리글 줄을 학생 의견으로 보내지 않도록 BatchFormatError를 냅니다.
+    첫 줄에 탭이 있으면 TSV, 아니면 CSV로 읽습니다.
+
+    매개변수:
+    - data (bytes 또는 str): 올린 파일 내용
+    - default_topic (str): 주제 칸이 없거나 비어 있을 때 쓸 주제
+    - max_rows (int): 받을 수 있는 최대 줄 수 (None이면 제한 없음)
+
+    반환값:
+    - tuple: (줄 목록 [{"line", "student", "topic", "opinion"}], 구분 문자 "," 또는 "\\t")
+    """
+    text = decode_table(data)
+    first_line = text.lstrip().split("\n", 1)[0]
+    delimiter = "\t" if "\t" in first_line else ","
+    records = [(number, record) for number, record in enumerate(csv.reader(io.StringIO(text), delimiter=delimiter), 1)
+               if any(cell.strip() for cell in record)]
+    if not records:
+        raise BatchFormatError("파일에 내용이 없어요.")
+
+    columns = _header_columns(records[0][1])
+    if not columns:
+        columns = {"student": 0, "topic": 1, "opinion": 2}
+    elif "opinion" not in columns:
+        names = ", ".join(COLUMN_ALIASES["opinion"])
+        raise BatchFormatError(f"머리글에서 의견 열을 찾을 수 없어요. 의견 열의 머리글을 다음 중 하나로 바꿔 주세요: {names}")
+    else:
+        records = records[1:]
+
+    def cell(record, column):
+        index = columns.get(column)
+        return record[index].strip() if index is not None and index < len(record) else ""
+
+    rows = []
+    missing = []
+    for number, record in records:
+        row = {
+            "line": number,
+            "student": cell(record, "student") or f"{len(rows) + 1}번",
+            "topic": cell(record, "topic") or default_topic.strip(),
+            "opinion": cell(record, "opinion"),
+        }
+        if not row["topic"] or not row["opinion"]:
+            missing.append(number)
+            continue
+        rows.append(row)
+    if missing:
+        shown = ", ".join(str(number) for number in missing[:5])
+        more = f" 외 {len(missing) - 5}줄" if len(missing) > 5 else ""
+        raise BatchFormatError(f"주제나 의견이 비어 있는 줄이 있어요: {shown}번째 줄{more}")
+    if not rows:
+        raise BatchFormatError("피드백을 만들 의견이 없어요.")
+    if max_rows is not None and len(rows) > max_rows:
+        raise BatchFormatError(f"한 번에 {max_rows}줄까지 처리할 수 있어요. (올린 파일: {len(rows)}줄)")
+    return rows, delimiter
+
+
+class BatchJob:
+    """
+    여러 줄의 피드백을 제한된 수의 스레드에서 동시에 만드는 작업
+
+    매개변수:
+    - rows (list): parse_opinion_table()이 돌려준 줄 목록
+    - max_workers (int): 동시에 실행할 줄 수
+    """
+
+    def __init__(self, rows, max_workers=4):
+        self.max_workers = max(1, int(max_workers))
+        self.rows = [
+            dict(row, status=PENDING, feedback="", error=None, chars=0, seconds=None)
+            for row in rows
+        ]
+        self._lock = threading.Lock()
+        self._futures = []
+        # 이번 실행에서 맡은 줄 번호 (다시 실행하면 이전 실행에서 끝난 줄은 시간 합에서 빠짐)
+        self._run_indexes = set()
+        self._started_at = None
+        self._finished_at = None
+
+    def start(self, generate):
+        """
+        아직 하지 않은 줄과 실패한 줄을 백그라운드에서 실행하는 함수 (이미 실행 중이면 아무것도 하지 않음)
+
+        매개변수:
+        - generate (callable): (줄, on_chunk)를 받아 피드백 글을 돌려주는 함수.
+          on_chunk(조각)을 부르면 받은 글자 수가 진행 상황에 반영됩니다.
+
+        반환값:
+        - int: 실행을 시작한 줄 수
+        """
+        with self._lock:
+            if any(not future.done() for future in self._futures):
+                return 0
+            indexes = [i for i, row in enumerate(self.rows) if row["status"] in (PENDING, FAILED)]
+            for i in indexes:
+                self.rows[i].update(status=PENDING, error=None, chars=0, seconds=None)
+            self._run_indexes = set(indexes)
+            self._started_at = time.monotonic()
+            self._finished_at = None
+        if not indexes:
+            return 0
+        executor = ThreadPoolExecutor(max_workers=min(self.max_workers, len(indexes)),
+                                      thread_name_prefix="batch-feedback")
+        futures = [executor.submit(self._run_row, i, generate) for i in indexes]
+        # 작업이 모두 끝나면 스레드가 저절로 정리되도록 기다리지 않고 종료 예약
+        executor.shutdown(wait=False)
+        with self._lock:
+            self._futures = futures
+        return len(indexes)
+
+    def _run_row(self, index, generate):
+        """줄 하나의 피드백을 만드는 함수 (스레드에서 실행)"""
+        row = self.rows[index]
+        started = time.monotonic()
+        with self._lock:
+            row["status"] = RUNNING
+
+        def on_chunk(piece):
+            with self._lock:
+                row["chars"] += len(piece)
+
+        try:
+            feedback = generate(dict(row), on_chunk)
+            if not feedback:
+                raise ValueError("빈 응답을 받았어요.")
+        except Exception as exc:
+            with self._lock:
+                row.update(status=FAILED, error=exc, seconds=time.monotonic() - started)
+                self._finish_if_done()
+            return
+        with self._lock:
+            row.update(status=DONE, feedback=feedback, chars=len(feedback), seconds=time.monotonic() - started)
+            self._finish_if_done()
+
+    def _finish_if_done(self):
+        """모든 줄이 끝났으면 끝난 시각을 기록 (잠금 안에서 호출)"""
+        if all(row["status"] in (DONE, FAILED) for row in self.rows):
+            self._finished_at = time.monotonic()
+
+    def is_running(self):
+        """실행 중이거나 차례를 기다리는 줄이 있는지 확인합니다."""
+        with self._lock:
+            return any(not future.done() for future in self._futures)
+
+    def snapshot(self):
+        """
+        화면 표시용으로 지금 상태를 복사해 돌려주는 함수
+
+        반환값:
+        - dict: rows(줄 목록 복사본), counts(상태별 줄 수), elapsed(이번 실행 경과 시간, 초),
+          sequential(이번 실행에서 끝난 줄들의 걸린 시간 합, 한 줄씩 했다면 걸렸을 시간)
+        """
+        with self._lock:
+            rows = [dict(row) for row in self.rows]
+            run_indexes = set(self._run_indexes)
+            if self._started_at is None:
+                elapsed = 0.0
+            else:
+                elapsed = (self._finished_at or time.monotonic()) - self._started_at
+        counts = {status: 0 for status in (PENDING, RUNNING, DONE, FAILED)}
+        for row in rows:
+            counts[row["status"]] += 1
+        sequential = sum(row["seconds"] or 0.0 for i, row in enumerate(rows)
+                         if i in run_indexes and row["status"] == DONE)
+        return {"rows": rows, "counts": counts, "elapsed": elapsed, "sequential": sequential}
+
+    def to_table(self, delimiter=",", describe_error=str):
+        """
+        결과를 CSV/TSV 글로 내보내는 함수 (아직 끝나지 않은 줄도 상태와 함께 포함)
+
+        매개변수:
+        - delimiter (str): 구분 문자 ("," 또는 "\\t")
+        - describe_error (callable): 오류 객체를 결과 파일에 적을 글로 바꾸는 함수
+
+        반환값:
+        - str: 머리글을 포함한 표
+        """
+        output = io.StringIO()
+        writer = csv.writer(output, delimiter=delimiter, lineterminator="\n")
+        writer.writerow([title for _column, title in OUTPUT_COLUMNS])
+        for row in self.snapshot()["rows"]:
+            row["error"] = describe_error(row["error"]) if row["error"] is not None else ""
+            row["status"] = STATUS_TITLES[row["status"]]
+            writer.writerow([row[column] for column, _title in OUTPUT_COLUMNS])
+        return output.getvalue()
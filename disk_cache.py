@@ -0,0 +1,190 @@
+"""
+SQLite 응답 캐시 모듈 (디스크 계층)
+
+메모리 캐시는 재배포할 때마다 사라지고, 여러 Streamlit 복제본(replica) 사이에서 공유되지도 않습니다.
+이 모듈은 WAL 모드의 SQLite 파일에 응답을 저장해서, 한 복제본에서 만든 주제를 다른 복제본도
+재사용하고 재시작 후에도 남아 있도록 합니다.
+
+- 쓰기는 백그라운드 스레드가 모아서(batch) 한 번에 처리하므로 화면 스레드는 디스크를 기다리지 않습니다.
+- 전체 크기 상한을 넘으면 가장 오래 쓰이지 않은 응답부터 지웁니다.
+"""
+
+import atexit
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    template TEXT,
+    value TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    expires_at REAL NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_last_access ON responses (last_access);
+"""
+
+
+class SqliteResponseCache:
+    """
+    여러 프로세스가 함께 쓰는 SQLite 응답 캐시
+
+    매개변수:
+    - path (str): SQLite 파일 경로 (폴더가 없으면 만듦)
+    - max_bytes (int): 저장할 응답의 전체 크기 상한 (UTF-8 바이트 기준)
+    - batch_size (int): 한 번에 모아서 쓸 최대 작업 수
+    - flush_interval (float): 작업이 적어도 이 시간(초)마다 한 번은 디스크에 씀
+    """
+
+    def __init__(self, path, max_bytes=256 * 1024 * 1024, batch_size=64, flush_interval=0.5):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+        self._pending = queue.Queue()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "writes": 0, "evictions": 0, "errors": 0}
+        self._writer = threading.Thread(target=self._write_loop, name="disk-cache-writer", daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+
+    def _connect(self):
+        """스레드마다 하나씩 SQLite 연결을 만들어 재사용"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=5000")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        """
+        디스크에서 응답을 꺼내는 함수 (만료된 항목은 미스로 처리)
+        마지막 사용 시각 갱신은 백그라운드 쓰기 작업으로 넘깁니다.
+
+        반환값:
+        - str: 저장된 응답 또는 없으면 None
+        """
+        now = time.time()
+        try:
+            row = self._connect().execute(
+                "SELECT value, expires_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+        except sqlite3.Error:
+            self._count("errors")
+            return None
+        if row is None or row[1] <= now:
+            self._count("misses")
+            return None
+        self._pending.put(("touch", key, now))
+        self._count("hits")
+        return row[0]
+
+    def set(self, key, value, template=None, ttl=3600):
+        """
+        응답 저장을 예약하는 함수 (실제 쓰기는 백그라운드 스레드가 처리)
+
+        매개변수:
+        - key (str): 캐시 키
+        - value (str): 저장할 응답 텍스트
+        - template (str): 응답을 만든 템플릿 이름
+        - ttl (float): 유지 시간(초)
+        """
+        self._pending.put(("set", key, value, template, ttl))
+
+    def _write_loop(self):
+        """백그라운드 쓰기 스레드: 작업을 모아서 한 트랜잭션으로 처리"""
+        while True:
+            first = self._pending.get()
+            if first is None:
+                return
+            batch = [first]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._pending.get(timeout=max(deadline - time.monotonic(), 0))
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._flush(batch)
+                    return
+                batch.append(item)
+            self._flush(batch)
+
+    def _flush(self, batch):
+        """모은 작업을 디스크에 쓰고 크기 상한을 지키는 함수"""
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            for item in batch:
+                if item[0] == "set":
+                    _, key, value, template, ttl = item
+                    conn.execute(
+                        "INSERT OR REPLACE INTO responses (key, template, value, size, expires_at, last_access)"
+                        " VALUES (?, ?, ?, ?, ?, ?)",
+                        (key, template, value, len(value.encode("utf-8")), now + ttl, now),
+                    )
+                else:
+                    _, key, accessed = item
+                    conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (accessed, key))
+            conn.execute("DELETE FROM responses WHERE expires_at <= ?", (now,))
+            evicted = self._evict(conn)
+            conn.execute("COMMIT")
+        except sqlite3.Error:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            self._count("errors")
+            return
+        with self._lock:
+            self._stats["writes"] += sum(1 for item in batch if item[0] == "set")
+            self._stats["evictions"] += evicted
+
+    def _evict(self, conn):
+        """크기 상한을 넘으면 가장 오래 쓰이지 않은 응답부터 지우는 함수"""
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        evicted = 0
+        if total <= self.max_bytes:
+            return evicted
+        for key, size in conn.execute(
+            "SELECT key, size FROM responses ORDER BY last_access ASC"
+        ).fetchall():
+            conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            evicted += 1
+            total -= size
+            if total <= self.max_bytes:
+                break
+        return evicted
+
+    def close(self):
+        """남은 쓰기 작업을 모두 처리하고 쓰기 스레드를 멈춥니다."""
+        if self._writer.is_alive():
+            self._pending.put(None)
+            self._writer.join(timeout=5)
+
+    def _count(self, name):
+        with self._lock:
+            self._stats[name] += 1
+
+    def stats(self):
+        """
+        디스크 캐시 통계를 반환하는 함수
+
+        반환값:
+        - dict: hits, misses, writes, evictions, errors, pending(대기 중인 쓰기 작업 수)
+        """
+        with self._lock:
+            stats = dict(self._stats)
+        stats["pending"] = self._pending.qsize()
+        return stats
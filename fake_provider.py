@@ -0,0 +1,313 @@
+"""
+오프라인 가짜 Gemini 제공자 모듈
+
+실제 API로 부하 시험을 하면 돈이 들고, 속도 제한에 걸리며, 시험용 컴퓨터에는 네트워크가 없기도 합니다.
+이 모듈의 FakeModelPool은 gemini_service.ModelPool과 같은 모양이라 GeminiService에 그대로 끼울 수 있고,
+세 가지 프롬프트 템플릿(주제 추천, 논거 아이디어, 피드백)에 맞는 형식의 마크다운을 돌려줍니다.
+응답 캐시, 재시도, 속도 제한, 스트리밍을 네트워크 없이 시험하도록 다음을 흉내 낼 수 있습니다.
+
+- 응답 지연 분포 (고정, 균등, 로그 정규)와 스트리밍 조각 사이 지연
+- 긴 프롬프트일수록 첫 글자가 늦게 나오는 것 (프롬프트 토큰당 추가 지연)
+- 일정 확률의 429(할당량 초과), 503(서버 일시 오류) 오류
+- 일정 확률로 응답이 멈춘 것처럼 오래 기다리기(hang)
+- 분당 요청 수 할당량 (넘으면 429와 재시도 대기 시간)
+"""
+
+import hashlib
+import random
+import re
+import threading
+import time
+from collections import Counter, deque
+
+from rate_limiter import estimate_tokens
+
+# 프롬프트 템플릿 이름 → (프롬프트에서 템플릿을 알아보는 문장, 입력값을 꺼내는 정규식)
+_TEMPLATES = [
+    ("recommend_topic", "추천 주제 생성 시작", re.compile(r"관심사: (.*)")),
+    ("replace_topic", "바꿀 주제 생성 시작", re.compile(r"관심사: (.*)")),
+    ("argument_ideas", "논거 아이디어 생성 시작", re.compile(r"토론 주제: (.*)")),
+    ("feedback", "피드백 생성 시작", re.compile(r"토론 주제: (.*)")),
+    # 찬반 논거 절반 요청은 입력값 대신 맡은 쪽("찬성"/"반대")을 꺼냄
+    ("argument_side", "측 논거 생성 시작", re.compile(r"(\S+) 측 논거 생성 시작")),
+]
+
+# 가짜 주제 추천에 쓰는 주제 틀 ({}에 관심사가 들어감)
+_TOPIC_PATTERNS = [
+    "학교에서 {}을(를) 더 많이 활용해야 한다",
+    "{}에 쓰는 시간을 제한해야 한다",
+    "{}을(를) 모든 학생이 배워야 한다",
+    "{} 관련 규칙을 학생이 직접 정해야 한다",
+]
+
+
+class FakeApiError(Exception):
+    """
+    가짜 API 오류 (google.api_core 예외처럼 code 속성에 HTTP 상태 코드를 담음)
+
+    매개변수:
+    - code (int): HTTP 상태 코드 (429, 503 등)
+    - message (str): 오류 메시지 ("retry in Ns"가 있으면 재시도 대기 시간으로 쓰임)
+    """
+
+    def __init__(self, code, message):
+        super().__init__(f"{code} {message}")
+        self.code = code
+
+
+def parse_latency(spec):
+    """
+    응답 지연 분포 설정을 해석하는 함수
+
+    매개변수:
+    - spec (str): "fixed:초", "uniform:최소:최대", "lognormal:중앙값:시그마" 중 하나
+
+    반환값:
+    - callable: random.Random을 받아 지연 시간(초)을 돌려주는 함수
+    """
+    kind, *values = str(spec).split(":")
+    values = [float(v) for v in values]
+    if kind == "fixed" and len(values) == 1:
+        return lambda rng: values[0]
+    if kind == "uniform" and len(values) == 2:
+        return lambda rng: rng.uniform(values[0], values[1])
+    if kind == "lognormal" and len(values) == 2:
+        # 중앙값이 values[0]이 되도록 mu = ln(중앙값)
+        median, sigma = values
+        return lambda rng: rng.lognormvariate(0.0, sigma) * median
+    raise ValueError(f"알 수 없는 지연 분포 설정입니다: {spec}")
+
+
+def detect_template(prompt):
+    """
+    프롬프트가 어떤 템플릿으로 만들어졌는지와 학생 입력값을 찾는 함수
+
+    반환값:
+    - tuple: (템플릿 이름 또는 None, 입력값)
+    """
+    for name, marker, pattern in _TEMPLATES:
+        if marker in prompt:
+            match = pattern.search(prompt)
+            return name, match.group(1).strip() if match else ""
+    return None, ""
+
+
+def render_fake_response(template, value):
+    """
+    템플릿 출력 형식에 맞는 가짜 마크다운을 만드는 함수 (같은 입력에는 항상 같은 응답)
+
+    매개변수:
+    - template (str): 템플릿 이름
+    - value (str): 관심사 또는 토론 주제
+
+    반환값:
+    - str: 마크다운 응답
+    """
+    value = value or "우리 학교"
+    if template == "recommend_topic":
+        offset = int(hashlib.sha256(value.encode("utf-8")).hexdigest(), 16) % len(_TOPIC_PATTERNS)
+        blocks = []
+        for number in range(1, 4):
+            title = _TOPIC_PATTERNS[(offset + number) % len(_TOPIC_PATTERNS)].format(value)
+            blocks.append(
+                f"## 주제 [{number}]: {title}\n"
+                f"### 간단한 배경 정보: '{value}'은(는) 우리 생활과 가까워서 친구들마다 생각이 달라요.\n"
+                f"### 핵심 쟁점: 그렇게 하면 어떤 점이 좋을까? 어떤 문제가 생길까?\n"
+            )
+        return "\n".join(blocks)
+    if template == "replace_topic":
+        # 주제 추천에 쓰지 않은 나머지 주제 틀 하나로 바꿀 주제를 만듦
+        offset = int(hashlib.sha256(value.encode("utf-8")).hexdigest(), 16) % len(_TOPIC_PATTERNS)
+        return (
+            f"## 주제 [1]: {_TOPIC_PATTERNS[offset].format(value)}\n"
+            f"### 간단한 배경 정보: '{value}'은(는) 우리 생활과 가까워서 친구들마다 생각이 달라요.\n"
+            f"### 핵심 쟁점: 그렇게 하면 어떤 점이 좋을까? 어떤 문제가 생길까?\n"
+        )
+    if template == "argument_ideas":
+        return (
+            f"## [{value}] 토론을 위한 논거 아이디어\n\n"
+            + _fake_side("찬성") + "\n" + _fake_side("반대")
+        )
+    if template == "argument_side":
+        return _fake_side(value)
+    if template == "feedback":
+        return (
+            "### 학생 의견 분석 및 피드백\n\n"
+            f"* **주제 관련성:** '{value}' 주제와 직접적으로 관련 있어요\n"
+            "* **입장 구분:** 찬성 입장에 가까워 보여요\n"
+            "* **더 생각해 볼 점 (건설적 피드백):** 주장을 뒷받침할 만한 경험이나 예시를 한 가지 더 이야기해 줄 수 있을까요?\n"
+        )
+    return "가짜 응답입니다.\n"
+
+
+# 가짜 논거 아이디어 (맡은 쪽 → 논거 3가지)
+_SIDE_IDEAS = {
+    "찬성": ("새로운 것을 배우고 경험할 기회가 많아져요.",
+             "스스로 선택하고 책임지는 힘을 기를 수 있어요.",
+             "친구들과 함께 의견을 나누며 더 좋은 방법을 찾을 수 있어요."),
+    "반대": ("시간과 비용이 많이 들 수 있어요.",
+             "모든 친구에게 공평하지 않을 수 있어요.",
+             "예상하지 못한 문제가 생길 수 있어요."),
+}
+
+
+def _fake_side(side):
+    """한쪽(찬성/반대) 논거 아이디어 부분의 가짜 마크다운"""
+    ideas = _SIDE_IDEAS.get(side, _SIDE_IDEAS["찬성"])
+    items = "".join(f"{number}. {idea}\n" for number, idea in enumerate(ideas, 1))
+    return f"### {side} 측 논거 아이디어 (이렇게 생각해 볼 수 있어요):\n{items}"
+
+
+class _FakeChunk:
+    """스트리밍 조각 (generate_content(stream=True)가 돌려주는 조각처럼 text 속성만 있음)"""
+
+    __slots__ = ("text",)
+
+    def __init__(self, text):
+        self.text = text
+
+
+class _FakeResponse:
+    """가짜 응답: 통째로 쓰면 text, 반복하면 조각 사이 지연을 두고 조각을 돌려줌"""
+
+    CHUNK_CHARS = 40
+
+    def __init__(self, text, chunk_delay):
+        self.text = text
+        self.chunk_delay = chunk_delay
+
+    def __iter__(self):
+        for i in range(0, len(self.text), self.CHUNK_CHARS):
+            if i and self.chunk_delay:
+                time.sleep(self.chunk_delay)
+            yield _FakeChunk(self.text[i:i + self.CHUNK_CHARS])
+
+
+class FakeModel:
+    """FakeModelPool이 만들어 주는 가짜 GenerativeModel"""
+
+    def __init__(self, pool, model_name):
+        self.pool = pool
+        self.model_name = model_name
+
+    def generate_content(self, prompt, stream=False, **kwargs):
+        return self.pool.respond(prompt)
+
+
+class FakeModelPool:
+    """
+    ModelPool 대신 쓰는 가짜 모델 풀
+
+    매개변수:
+    - latency (str): 첫 조각까지의 지연 분포 (parse_latency() 형식)
+    - chunk_delay (float): 스트리밍 조각 사이 지연(초)
+    - prefill_per_token (float): 프롬프트 토큰 하나마다 첫 조각 전에 더 기다릴 시간(초)
+    - error_rate_429 (float): 429 오류를 낼 확률 (0~1)
+    - error_rate_503 (float): 503 오류를 낼 확률 (0~1)
+    - hang_rate (float): 응답이 멈춘 것처럼 hang_seconds초 기다릴 확률 (0~1)
+    - hang_seconds (float): 멈췄을 때 기다리는 시간(초)
+    - quota_rpm (int): 분당 요청 수 할당량 (0이면 없음)
+    - seed (int): 난수 시드 (같은 시드면 오류·지연이 같은 순서로 나옴)
+    """
+
+    def __init__(self, latency="fixed:0", chunk_delay=0.0, error_rate_429=0.0, error_rate_503=0.0,
+                 hang_rate=0.0, hang_seconds=120.0, quota_rpm=0, seed=None, prefill_per_token=0.0):
+        self._latency = parse_latency(latency)
+        self.chunk_delay = chunk_delay
+        self.prefill_per_token = prefill_per_token
+        self.error_rate_429 = error_rate_429
+        self.error_rate_503 = error_rate_503
+        self.hang_rate = hang_rate
+        self.hang_seconds = hang_seconds
+        self.quota_rpm = quota_rpm
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._recent = deque()  # 최근 1분 동안 받은 요청 시각 (할당량 계산용)
+        self._models = {}
+        self._stats = Counter()
+
+    def get(self, model_name):
+        """모델명에 해당하는 가짜 모델을 반환합니다."""
+        with self._lock:
+            model = self._models.get(model_name)
+            if model is None:
+                model = self._models[model_name] = FakeModel(self, model_name)
+        return model
+
+    def warm(self, model_names):
+        """가져올 라이브러리가 없으므로 모델만 만들어 둡니다."""
+        for model_name in model_names:
+            self.get(model_name)
+
+    def warm_async(self, model_names):
+        """ModelPool과 같은 모양을 맞추기 위한 함수 (바로 준비됨)"""
+        self.warm(model_names)
+        return None
+
+    def is_ready(self):
+        return True
+
+    def respond(self, prompt):
+        """
+        가짜 응답을 만드는 함수: 할당량 → 오류 주입 → 멈춤 → 지연 순서로 흉내 냅니다.
+
+        반환값:
+        - _FakeResponse: text 속성이 있고 반복하면 조각을 돌려주는 응답
+        """
+        template, value = detect_template(prompt)
+        tokens = estimate_tokens(prompt)
+        with self._lock:
+            self._stats[f"calls:{template}"] += 1
+            self._stats["prompt_tokens"] += tokens
+            now = time.monotonic()
+            while self._recent and now - self._recent[0] >= 60:
+                self._recent.popleft()
+            if self.quota_rpm and len(self._recent) >= self.quota_rpm:
+                self._stats["quota_exceeded"] += 1
+                retry_in = 60 - (now - self._recent[0])
+                raise FakeApiError(429, f"Quota exceeded (fake). Please retry in {retry_in:.1f}s.")
+            self._recent.append(now)
+            roll = self._rng.random()
+            hang = self._rng.random() < self.hang_rate
+            latency = max(0.0, self._latency(self._rng)) + self.prefill_per_token * tokens
+        if roll < self.error_rate_429:
+            self._count("errors_429")
+            raise FakeApiError(429, "Resource has been exhausted (fake).")
+        if roll < self.error_rate_429 + self.error_rate_503:
+            self._count("errors_503")
+            raise FakeApiError(503, "The service is currently unavailable (fake).")
+        if hang:
+            self._count("hangs")
+            time.sleep(self.hang_seconds)
+        if latency:
+            time.sleep(latency)
+        return _FakeResponse(render_fake_response(template, value), self.chunk_delay)
+
+    def _count(self, name):
+        with self._lock:
+            self._stats[name] += 1
+
+    def stats(self):
+        """
+        가짜 제공자 통계를 반환하는 함수
+
+        반환값:
+        - dict: ready, load_seconds, error(ModelPool.stats()와 같은 키) +
+          calls(템플릿별 호출 수), prompt_tokens(받은 프롬프트의 추정 토큰 수), errors_429, errors_503, hangs,
+          quota_exceeded
+        """
+        with self._lock:
+            stats = Counter(self._stats)
+        calls = {key.split(":", 1)[1]: count for key, count in stats.items() if key.startswith("calls:")}
+        return {
+            "ready": True,
+            "load_seconds": 0.0,
+            "error": None,
+            "provider": "fake",
+            "calls": calls,
+            "prompt_tokens": stats["prompt_tokens"],
+            "errors_429": stats["errors_429"],
+            "errors_503": stats["errors_503"],
+            "hangs": stats["hangs"],
+            "quota_exceeded": stats["quota_exceeded"],
+        }
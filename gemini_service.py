@@ -0,0 +1,523 @@
+"""
+Gemini 호출 서비스 모듈
+
+app.py의 get_gemini_response()가 사용하는 호출 경로를 한곳에 모아 둔 모듈입니다.
+Streamlit에 의존하지 않으므로 여러 세션이 공유하는 리소스(st.cache_resource)로 만들어 씁니다.
+화면에 오류를 표시하는 일은 app.py가 맡고, 이 모듈은 실패 시 예외를 그대로 올려보냅니다.
+"""
+
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from rate_limiter import QueueCancelled, estimate_tokens
+from resilience import CircuitOpenError, GenerationCancelled, GenerationTimeout, is_retryable
+from response_cache import make_cache_key
+
+# 템플릿별 예상 출력 토큰 수가 없을 때 사용할 기본값
+DEFAULT_OUTPUT_TOKENS = 800
+# 템플릿별 제한 시간이 없을 때 사용할 기본값(초)
+DEFAULT_DEADLINE = 60
+
+
+class ModelPool:
+    """
+    모델명마다 GenerativeModel을 하나씩만 만들어 모든 세션이 재사용하는 풀
+
+    genai.configure()를 한 번만 실행하면 모든 모델이 같은 기본 클라이언트(gRPC 채널)를 쓰므로,
+    호출마다 모델과 클라이언트를 새로 만들지 않아도 됩니다.
+    google.generativeai(gRPC, protobuf 포함)는 가져오는 데만 1초 가까이 걸리므로
+    처음 필요할 때(또는 warm_async()의 백그라운드 스레드에서) 가져오고 구성합니다.
+
+    매개변수:
+    - api_key (str): genai.configure()에 넘길 API 키 (None이면 구성하지 않음)
+    """
+
+    def __init__(self, api_key=None):
+        self.api_key = api_key
+        self._genai = None
+        self._models = {}
+        self._lock = threading.RLock()
+        self._ready = threading.Event()
+        self._warm_error = None
+        self._load_seconds = None
+
+    def _load(self):
+        """google.generativeai를 처음 필요할 때 한 번만 가져와 구성하는 함수"""
+        if self._genai is None:
+            with self._lock:
+                if self._genai is None:
+                    started = time.perf_counter()
+                    import google.generativeai as genai
+                    if self.api_key:
+                        genai.configure(api_key=self.api_key)
+                    self._load_seconds = time.perf_counter() - started
+                    self._genai = genai
+        return self._genai
+
+    def get(self, model_name):
+        """
+        모델명에 해당하는 GenerativeModel을 반환하는 함수 (처음 요청될 때 한 번만 생성)
+
+        매개변수:
+        - model_name (str): Gemini 모델명
+
+        반환값:
+        - genai.GenerativeModel: 재사용되는 모델 객체
+        """
+        model = self._models.get(model_name)
+        if model is None:
+            genai = self._load()
+            with self._lock:
+                model = self._models.get(model_name)
+                if model is None:
+                    model = genai.GenerativeModel(model_name)
+                    self._models[model_name] = model
+        return model
+
+    def warm(self, model_names):
+        """
+        라이브러리를 가져오고 모델 객체와 기본 클라이언트를 미리 만들어 두는 함수
+        첫 학생의 요청에서 가져오기·클라이언트 생성 비용을 치르지 않도록 합니다.
+        """
+        self._load()
+        from google.generativeai import client as genai_client
+        genai_client.get_default_generative_client()
+        for model_name in model_names:
+            self.get(model_name)
+        self._ready.set()
+
+    def warm_async(self, model_names):
+        """
+        warm()을 화면 스레드가 아닌 백그라운드 스레드에서 실행하는 함수
+        실패해도 첫 호출에서 다시 시도하므로 오류는 기록만 합니다.
+
+        반환값:
+        - threading.Thread: 시작된 준비 스레드
+        """
+        def run():
+            try:
+                self.warm(model_names)
+            except Exception as exc:
+                self._warm_error = exc
+
+        thread = threading.Thread(target=run, name="gemini-warmup", daemon=True)
+        thread.start()
+        return thread
+
+    def is_ready(self):
+        """라이브러리 가져오기, 구성, 모델 준비가 모두 끝났는지 확인합니다."""
+        return self._ready.is_set()
+
+    def stats(self):
+        """
+        준비 상태를 반환하는 함수
+
+        반환값:
+        - dict: ready, load_seconds(가져오기+구성 시간, 아직이면 None), error(준비 실패 메시지 또는 None)
+        """
+        return {
+            "ready": self.is_ready(),
+            "load_seconds": self._load_seconds,
+            "error": str(self._warm_error) if self._warm_error else None,
+        }
+
+
+class GeminiService:
+    """
+    응답 캐시, 동시 요청 합치기, 속도 제한, 재시도/회로 차단기를 거쳐 Gemini를 호출하는 서비스
+
+    매개변수:
+    - cache (ResponseCache): 모든 세션이 공유하는 응답 캐시
+    - singleflight (SingleFlight): 진행 중인 같은 요청을 하나로 합치는 객체
+    - models (ModelPool): 모델명별로 재사용하는 GenerativeModel 풀
+    - limiter (RateLimiter): 모든 실제 API 요청이 거쳐 가는 프로세스 공용 속도 제한기
+    - output_tokens_by_template (dict): 템플릿 이름 → 예상 출력 토큰 수 (속도 제한 예약량 계산용)
+    - queue_timeout (float): 속도 제한 대기열에서 기다릴 최대 시간(초)
+    - retry_policy (RetryPolicy): 일시적인 오류의 재시도 정책
+    - breaker (CircuitBreaker): 연속 실패 시 호출을 잠시 막는 회로 차단기
+    - deadline_by_template (dict): 템플릿 이름 → 한 번의 생성 제한 시간(초)
+    - call_workers (int): 실제 API 호출을 실행하는 스레드 수 (제한 시간을 넘긴 호출이 세션을 붙잡지 않도록 분리).
+      제한 시간을 넘겼거나 취소된 스트리밍 아닌 호출도 응답이 올 때까지 이 스레드 하나를 씀
+    - disk_cache (SqliteResponseCache): 메모리 캐시 뒤에 두는 디스크 캐시 (여러 프로세스가 공유, 없으면 None)
+    - telemetry (Telemetry): 호출마다 기록(결과, 대기·지연 시간, 토큰 수, 재시도, 오류 종류)을 남길 곳 (없으면 None)
+    """
+
+    # 템플릿별로 보관할 최근 응답 시간 기록 개수
+    TIMING_WINDOW = 200
+    # 생성을 기다리는 동안 멈춰야 하는지 확인하는 간격(초)
+    CANCEL_POLL_INTERVAL = 0.25
+
+    def __init__(self, cache, singleflight, models, limiter, retry_policy, breaker,
+                 output_tokens_by_template=None, queue_timeout=None, deadline_by_template=None,
+                 call_workers=32, disk_cache=None, telemetry=None):
+        self.cache = cache
+        self.telemetry = telemetry
+        self.disk_cache = disk_cache
+        self.singleflight = singleflight
+        self.models = models
+        self.limiter = limiter
+        self.retry_policy = retry_policy
+        self.breaker = breaker
+        self.output_tokens_by_template = dict(output_tokens_by_template or {})
+        self.queue_timeout = queue_timeout
+        self.deadline_by_template = dict(deadline_by_template or {})
+        self._executor = ThreadPoolExecutor(max_workers=call_workers, thread_name_prefix="gemini-call")
+        self._timings = {}  # template → deque[(첫 글자까지 걸린 시간, 전체 시간)]
+        self._stats_lock = threading.Lock()
+        self._request_times = deque()  # 최근 실제 API 요청 시각 (할당량 여유 판단용)
+        self._resilience = {"retries": 0, "timeouts": 0, "gave_up": 0, "cancelled": 0}
+
+    def generate(self, prompt, model="gemini-2.0-flash", template=None, on_chunk=None,
+                 owner=None, on_wait=None, cancelled=None):
+        """
+        프롬프트에 대한 응답 텍스트를 반환하는 함수
+        캐시 적중 시 API를 호출하지 않고, 같은 프롬프트가 이미 요청 중이면 그 결과를 함께 받습니다.
+
+        매개변수:
+        - prompt (str): API에 전송할 프롬프트 텍스트
+        - model (str): 사용할 Gemini 모델명
+        - template (str): 프롬프트를 만든 템플릿 이름 (캐시 TTL 결정에 사용)
+        - on_chunk (callable): 지정하면 스트리밍 모드로 요청하고, 생성된 조각(str)이 도착할 때마다 호출
+          (캐시 적중이나 다른 요청의 결과를 공유받은 경우에는 호출되지 않으므로 반환값을 표시해야 함)
+        - owner (str): 요청한 세션 ID (속도 제한 대기열에서 세션 간 공평한 순서에 사용)
+        - on_wait (callable): 속도 제한 대기열에서 기다리는 동안 (순번, 예상 대기 시간(초))으로 호출
+        - cancelled (callable): 생성 도중 틈틈이 확인할 함수. True를 돌려주면 대기열에서 빠지거나 받던 응답을 멈추고
+          GenerationCancelled 발생 (같은 요청의 결과를 기다리는 다른 세션이 있으면 멈추지 않고 끝까지 만듦)
+
+        반환값:
+        - str: 응답 텍스트
+        """
+        call = {
+            "template": template, "model": model,
+            "prompt_chars": len(prompt), "prompt_tokens": estimate_tokens(prompt), "output_tokens": 0,
+            "queue_wait": 0.0, "first_token_at": None, "retries": 0, "outcome": None, "error": None,
+        }
+        started = time.perf_counter()
+        try:
+            text = self._generate(prompt, model, template, on_chunk, owner, on_wait, cancelled, call)
+        except BaseException as e:
+            # 리더의 오류를 함께 받은 팔로워는 _fetch에 들어가지 않아 결과가 비어 있음
+            call["outcome"] = call["outcome"] or "coalesced"
+            call["error"] = type(e).__name__
+            raise
+        else:
+            call["output_tokens"] = estimate_tokens(text) if text else 0
+            return text
+        finally:
+            if self.telemetry is not None:
+                call["latency"] = time.perf_counter() - started
+                first_token_at = call.pop("first_token_at")
+                call["first_token"] = (first_token_at - started if first_token_at is not None
+                                       else call["latency"])
+                self.telemetry.record(call)
+
+    def _generate(self, prompt, model, template, on_chunk, owner, on_wait, cancelled, call):
+        """캐시 → 디스크 캐시 → 동시 요청 합치기 순서로 응답을 찾는 함수 (call에 결과를 적음)"""
+        key = make_cache_key(model, prompt)
+        cached = self.cache.get(key)
+        if cached is not None:
+            call["outcome"] = "cache_hit"
+            return cached
+        # 다른 프로세스가 만들었거나 재시작 전에 만든 응답은 디스크 캐시에서 찾음
+        if self.disk_cache is not None:
+            cached = self.disk_cache.get(key)
+            if cached is not None:
+                self.cache.set(key, cached, template=template)
+                call["outcome"] = "disk_hit"
+                return cached
+
+        # 결과를 함께 기다리는 다른 세션이 있으면 이 세션이 떠나도 생성을 멈추지 않음
+        def stop_if():
+            return cancelled() and not self.singleflight.followers(key)
+
+        while True:
+            try:
+                text, shared = self.singleflight.do(
+                    key, lambda: self._fetch(key, prompt, model, template, on_chunk, owner, on_wait,
+                                             stop_if if cancelled is not None else None, call)
+                )
+            except GenerationCancelled:
+                # 막 멈춘 다른 세션의 생성에 이어 붙었던 경우에는 직접 다시 요청
+                if cancelled is not None and cancelled():
+                    raise
+                continue
+            break
+        if shared:
+            call["outcome"] = "coalesced"
+        return text
+
+    def _fetch(self, key, prompt, model, template, on_chunk, owner, on_wait, cancelled, call):
+        """리더 요청만 실행하는 함수: 캐시를 다시 확인한 뒤 API를 호출하고 결과를 저장"""
+        # 캐시 확인 직후 다른 요청이 막 끝났을 수 있으므로 한 번 더 확인
+        cached = self.cache.get(key, record=False)
+        if cached is not None:
+            call["outcome"] = "cache_hit"
+            return cached
+        prompt_tokens = estimate_tokens(prompt)
+        reserved = prompt_tokens + self.output_tokens_by_template.get(template, DEFAULT_OUTPUT_TOKENS)
+        deadline = self.deadline_by_template.get(template, DEFAULT_DEADLINE)
+        attempt = 0
+        while True:
+            attempt += 1
+            # 서버 상태가 나쁘면 기다리지 않고 바로 실패 (CircuitOpenError)
+            # 실제로 보내기 전에 막힌 호출은 할당량을 쓰지 않으므로 upstream이 아닌 rejected로 기록
+            # (앞선 시도를 이미 보냈다면 upstream 그대로)
+            try:
+                trial = self.breaker.before_call()
+            except CircuitOpenError:
+                call["outcome"] = call["outcome"] or "rejected"
+                raise
+            # 속도 제한 대기열에서 차례를 기다린 뒤 요청 (입력 + 예상 출력 토큰만큼 예약)
+            queued = time.perf_counter()
+            try:
+                self.limiter.acquire(owner or "anonymous", reserved, on_wait=on_wait,
+                                     timeout=self.queue_timeout, cancelled=cancelled)
+            except QueueCancelled:
+                # 요청을 보내기 전이므로 예약한 요청·토큰을 쓰지 않고 대기열 자리만 비움
+                self.breaker.release(trial)
+                self._record_cancel(template, "queued")
+                call["outcome"] = call["outcome"] or "cancelled"
+                raise GenerationCancelled("요청을 보내기 전에 멈췄습니다.") from None
+            except BaseException:
+                # 대기열에서 너무 오래 기다린 경우(QueueTimeout) 등
+                self.breaker.release(trial)
+                call["outcome"] = call["outcome"] or "rejected"
+                raise
+            finally:
+                call["queue_wait"] += time.perf_counter() - queued
+            streamed = []
+
+            def forward(piece):
+                streamed.append(piece)
+                on_chunk(piece)
+
+            def settle_attempt():
+                # 끝까지 받지 못한 시도: 프롬프트와 받은 만큼만 쓴 것으로 보고 나머지 출력 토큰 예약분은 돌려줌
+                received = estimate_tokens("".join(streamed)) if streamed else 0
+                self.limiter.settle(reserved, prompt_tokens + received)
+
+            # 여기서부터 실제 요청 (재시도는 실제로 다시 보낸 시도만 셈)
+            call["outcome"] = "upstream"
+            if attempt > 1:
+                call["retries"] += 1
+            try:
+                text = self._request(prompt, model, template, forward if on_chunk else None, deadline, call,
+                                     cancelled)
+            except GenerationCancelled:
+                # 실패가 아니므로 회로 차단기에는 세지 않고, 받지 않은 출력 토큰 예약분은 돌려줌
+                self.breaker.release(trial)
+                settle_attempt()
+                raise
+            except Exception as e:
+                # 다시 시도하든 포기하든 이 시도의 예약은 여기서 정리 (다음 시도는 새로 예약하고,
+                # 백오프로 기다리는 동안 쓰지 않은 예약분이 다른 세션의 차례를 막지 않도록)
+                settle_attempt()
+                retryable = is_retryable(e)
+                if retryable:
+                    self.breaker.record_failure(trial)
+                else:
+                    self.breaker.release(trial)
+                if isinstance(e, GenerationTimeout):
+                    self._count("timeouts")
+                # 이미 화면에 일부를 보여 줬다면 다시 시도하지 않음 (같은 내용이 두 번 표시되지 않도록)
+                if not retryable or streamed or attempt >= self.retry_policy.max_attempts:
+                    if retryable:
+                        self._count("gave_up")
+                    raise
+                self._count("retries")
+                if self._sleep(self.retry_policy.delay(attempt, e), cancelled):
+                    self._record_cancel(template, "queued")
+                    raise GenerationCancelled("다시 시도하기 전에 멈췄습니다.") from None
+                continue
+            except BaseException:
+                # 화면 재실행 등으로 중단된 경우 시험 호출 자리만 반납
+                self.breaker.release(trial)
+                settle_attempt()
+                raise
+            self.breaker.record_success(trial)
+            break
+
+        # 실제 출력 길이로 예약량 보정
+        self.limiter.settle(reserved, prompt_tokens + estimate_tokens(text or ""))
+        if text:
+            self.cache.set(key, text, template=template)
+            if self.disk_cache is not None:
+                # 디스크 쓰기는 백그라운드에서 처리되므로 기다리지 않음
+                self.disk_cache.set(key, text, template=template, ttl=self.cache.ttl_for(template))
+        return text
+
+    def _request(self, prompt, model, template, on_chunk, deadline, call=None, cancelled=None):
+        """
+        Gemini API에 실제로 요청을 보내는 함수
+        호출은 별도 스레드에서 실행하고, deadline초 안에 끝나지 않으면 GenerationTimeout을 발생시킵니다.
+        기다리는 동안 cancelled()가 True가 되면 남은 응답을 읽지 않고 GenerationCancelled를 발생시킵니다.
+        생성된 조각은 이 함수를 부른 스레드에서 on_chunk로 전달되므로 화면 갱신에 바로 쓸 수 있습니다.
+        첫 글자가 도착할 때까지 걸린 시간(TTFT)과 전체 생성 시간을 따로 기록합니다.
+        """
+        self._record_request()
+        started = time.perf_counter()
+        expires = time.monotonic() + deadline
+        pieces = queue.Queue()
+        stop = threading.Event()
+        self._executor.submit(self._produce, prompt, model, on_chunk is not None, pieces, stop)
+
+        first_token = None
+        parts = []
+        try:
+            while True:
+                if cancelled is not None and cancelled():
+                    if on_chunk is None:
+                        # 스트리밍하지 않는 호출은 멈출 수 없어 기다리지만 않음: 서버는 끝까지 생성하고,
+                        # 호출 스레드(call_workers 중 하나)도 응답이 올 때까지 붙잡혀 있으므로 아낀 시간은 없음
+                        self._record_cancel(template, "abandoned")
+                    else:
+                        self._record_cancel(template, "streaming", time.perf_counter() - started)
+                    raise GenerationCancelled("응답을 받는 도중에 멈췄습니다.")
+                remaining = max(expires - time.monotonic(), 0)
+                try:
+                    kind, value = pieces.get(timeout=remaining if cancelled is None
+                                             else min(remaining, self.CANCEL_POLL_INTERVAL))
+                except queue.Empty:
+                    if cancelled is not None and time.monotonic() < expires:
+                        continue
+                    raise GenerationTimeout(f"{deadline:g}초 안에 응답이 끝나지 않았습니다.") from None
+                if kind == "error":
+                    raise value
+                if kind == "done":
+                    break
+                if first_token is None:
+                    # 스트리밍하지 않으면 학생은 생성이 끝나야 첫 글자를 봄
+                    first_token = time.perf_counter() - started
+                    if call is not None:
+                        call["first_token_at"] = started + first_token
+                parts.append(value)
+                if on_chunk is not None:
+                    on_chunk(value)
+        finally:
+            # 제한 시간 초과, 오류, 취소로 그만둔 경우 남은 스트림을 더 읽지 않도록 알림
+            # (호출 스레드가 스트림을 놓으면 gRPC 스트림도 닫혀 서버 쪽 생성이 멈춤)
+            stop.set()
+        text = "".join(parts)
+        total = time.perf_counter() - started
+        self._record_timing(template, first_token if first_token is not None else total, total)
+        return text
+
+    def _produce(self, prompt, model, stream, pieces, stop):
+        """호출 전용 스레드에서 실행: 생성 결과를 조각 단위로 pieces 큐에 넣음"""
+        try:
+            gemini_model = self.models.get(model)
+            if stream:
+                for chunk in gemini_model.generate_content(prompt, stream=True):
+                    if stop.is_set():
+                        return
+                    piece = chunk.text
+                    if piece:
+                        pieces.put(("chunk", piece))
+            else:
+                pieces.put(("chunk", gemini_model.generate_content(prompt).text))
+            pieces.put(("done", None))
+        except Exception as e:
+            pieces.put(("error", e))
+
+    def _sleep(self, seconds, cancelled=None):
+        """
+        seconds초 동안 기다리는 함수 (cancelled()가 True가 되면 바로 멈춤)
+
+        반환값:
+        - bool: 기다리는 도중 멈췄으면 True
+        """
+        if cancelled is None:
+            time.sleep(seconds)
+            return False
+        until = time.monotonic() + seconds
+        while True:
+            if cancelled():
+                return True
+            remaining = until - time.monotonic()
+            if remaining <= 0:
+                return False
+            time.sleep(min(remaining, self.CANCEL_POLL_INTERVAL))
+
+    def _record_cancel(self, template, stage, elapsed=0.0):
+        """
+        멈춘 생성을 기록하는 함수
+        아낀 생성 시간은 이 템플릿의 최근 평균 생성 시간에서 멈추기 전까지 쓴 시간을 뺀 값으로 어림합니다.
+        (최근 기록이 없거나, 멈출 수 없어 기다리지만 않은 호출(abandoned)이면 0으로 셈)
+
+        매개변수:
+        - stage (str): "queued"(요청을 보내기 전), "streaming"(응답을 받는 도중),
+          "abandoned"(스트리밍하지 않는 호출이라 멈추지 못하고 기다리지만 않음)
+        - elapsed (float): 요청을 보낸 뒤 멈추기까지 걸린 시간(초)
+        """
+        with self._stats_lock:
+            self._resilience["cancelled"] += 1
+            samples = self._timings.get(template)
+            average = sum(s[1] for s in samples) / len(samples) if samples else None
+        saved = max(average - elapsed, 0.0) if average is not None and stage != "abandoned" else 0.0
+        if self.telemetry is not None:
+            self.telemetry.record_cancel(template, stage, saved)
+
+    def _count(self, name):
+        with self._stats_lock:
+            self._resilience[name] += 1
+
+    def resilience_stats(self):
+        """
+        재시도·제한 시간·회로 차단기 통계를 반환하는 함수
+
+        반환값:
+        - dict: retries, timeouts, gave_up, cancelled(멈춘 생성 수), breaker(회로 차단기 통계)
+        """
+        with self._stats_lock:
+            stats = dict(self._resilience)
+        stats["breaker"] = self.breaker.stats()
+        return stats
+
+    def _record_request(self):
+        """실제 API 요청 시각을 기록하는 함수 (1분이 지난 기록은 버림)"""
+        now = time.monotonic()
+        with self._stats_lock:
+            self._request_times.append(now)
+            while self._request_times and self._request_times[0] < now - 60:
+                self._request_times.popleft()
+
+    def recent_request_count(self, window=60):
+        """
+        최근 window초 동안 실제로 보낸 API 요청 수를 반환하는 함수
+
+        매개변수:
+        - window (float): 집계할 기간(초, 최대 60)
+
+        반환값:
+        - int: 요청 수
+        """
+        since = time.monotonic() - window
+        with self._stats_lock:
+            return sum(1 for t in self._request_times if t >= since)
+
+    def _record_timing(self, template, first_token, total):
+        """템플릿별 최근 응답 시간을 기록하는 함수"""
+        with self._stats_lock:
+            window = self._timings.setdefault(template, deque(maxlen=self.TIMING_WINDOW))
+            window.append((first_token, total))
+
+    def timing_stats(self):
+        """
+        템플릿별 최근 응답 시간 통계를 반환하는 함수
+
+        반환값:
+        - dict: template → {"count", "avg_first_token", "avg_total"} (단위: 초)
+        """
+        with self._stats_lock:
+            snapshot = {template: list(window) for template, window in self._timings.items()}
+        stats = {}
+        for template, samples in snapshot.items():
+            stats[template] = {
+                "count": len(samples),
+                "avg_first_token": sum(s[0] for s in samples) / len(samples),
+                "avg_total": sum(s[1] for s in samples) / len(samples),
+            }
+        return stats
@@ -0,0 +1,209 @@
+"""
+진행 중인 생성 지키기(in-flight guard) 모듈
+
+태블릿에서 학생들은 '피드백 받기', '논거 아이디어 보기' 버튼을 두세 번 연달아 누릅니다.
+Streamlit은 누를 때마다 화면을 다시 실행하므로, 앞 실행에서 받던 응답은 중간에 끊기고
+같은 요청이 처음부터 다시 시작됩니다. 이 모듈은 생성을 화면 실행과 떼어 내 제한된 스레드 풀에서 실행하고,
+세션과 동작(action)마다 진행 중인 작업을 하나씩 기억해 둡니다.
+
+- 같은 입력(입력 해시가 같음)으로 다시 누르면 새 요청을 보내지 않고 진행 중인 작업에 이어 붙음
+  (그때까지 받은 조각을 처음부터 다시 받은 뒤 이어지는 조각을 받으므로 화면을 그대로 다시 그릴 수 있음)
+- 입력을 바꿔 다시 누르면 새 작업을 시작하고, 이전 작업에는 멈추라고 알림 (이미 끝나 가더라도 결과는 버림)
+- 세션이 끝나면(탭을 닫음 등) 그 세션의 작업도 멈춰야 하는 것으로 봄
+  (작업 함수가 task.cancelled()를 틈틈이 확인해 대기열에서 빠지거나 받던 응답을 멈춤)
+- 작업마다 기다릴 최대 시간을 두어, 작업이 끝나지 않아도 기다리는 화면 실행은 GenerationTimeout으로 풀려남
+- 새로 시작, 이어 붙음, 버림, 멈춤 횟수를 동작별로 Telemetry에 기록
+Streamlit에 의존하지 않습니다.
+"""
+
+import hashlib
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from resilience import GenerationTimeout
+
+
+class SupersededError(Exception):
+    """같은 동작을 더 새로운 입력으로 다시 요청해서 결과를 버린 작업을 기다릴 때 발생하는 예외"""
+
+
+def make_inputs_key(*inputs):
+    """
+    동작의 입력값들로 입력 해시를 만드는 함수
+
+    반환값:
+    - str: SHA-256 해시 문자열
+    """
+    raw = "\x00".join(str(value) for value in inputs)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class InflightTask:
+    """
+    별도 스레드에서 실행되는 생성 작업 하나 (여러 화면 실행이 차례로 이어 붙어 결과를 받음)
+
+    매개변수:
+    - key (str): 입력 해시
+    - alive (callable): 작업을 요청한 세션이 아직 살아 있는지 알려 주는 함수 (알 수 없으면 None)
+    - timeout (float): 작업을 시작한 뒤 결과를 기다릴 최대 시간(초) (None이면 끝날 때까지 기다림)
+    """
+
+    def __init__(self, key, alive=None, timeout=None):
+        self.key = key
+        self.alive = alive
+        self.expires = None if timeout is None else time.monotonic() + timeout
+        self._cancel = threading.Event()
+        self._events = []  # 작업 도중의 사건 (조각, 대기 순번 등) - 이어 붙은 쪽도 처음부터 받음
+        self._condition = threading.Condition()
+        self._finished = False
+        self._result = None
+        self._error = None
+
+    def publish(self, event):
+        """작업 도중의 사건 하나를 기록합니다. (작업 스레드에서 호출)"""
+        with self._condition:
+            self._events.append(event)
+            self._condition.notify_all()
+
+    def finish(self, result=None, error=None):
+        """작업 결과(또는 오류)를 기록하고 기다리는 쪽을 깨웁니다."""
+        with self._condition:
+            self._result = result
+            self._error = error
+            self._finished = True
+            self._condition.notify_all()
+
+    def cancel(self):
+        """작업에 멈추라고 알립니다. (작업 함수가 cancelled()로 확인)"""
+        self._cancel.set()
+
+    def cancelled(self):
+        """더 새로운 입력으로 바뀌었거나 요청한 세션이 끝나서 작업을 멈춰야 하면 True"""
+        if not self._cancel.is_set() and self.alive is not None and not self.alive():
+            self._cancel.set()
+        return self._cancel.is_set()
+
+    def follow(self, on_events=None):
+        """
+        작업이 끝날 때까지 기다리며 사건을 받는 함수 (화면 스레드에서 호출)
+
+        매개변수:
+        - on_events (callable): 새 사건 목록(list)으로 호출 (기다리는 사이 쌓인 사건은 한 번에 받음)
+
+        반환값:
+        - 작업 함수의 반환값 (작업이 실패했으면 같은 예외가 발생)
+
+        작업을 시작한 뒤 timeout초가 지나도 끝나지 않으면 작업에 멈추라고 알리고 GenerationTimeout이 발생합니다.
+        """
+        seen = 0
+        while True:
+            with self._condition:
+                while seen == len(self._events) and not self._finished:
+                    remaining = None if self.expires is None else self.expires - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        self.cancel()
+                        raise GenerationTimeout("정해진 시간 안에 생성 작업이 끝나지 않았습니다.")
+                    self._condition.wait(remaining)
+                events = self._events[seen:]
+                seen = len(self._events)
+                finished = self._finished
+            if events and on_events is not None:
+                on_events(events)
+            if finished:
+                break
+        if self._error is not None:
+            raise self._error
+        return self._result
+
+
+class InflightGuard:
+    """
+    세션·동작마다 진행 중인 생성 작업을 하나씩 기억해 중복 요청을 막는 클래스 (프로세스당 하나)
+
+    매개변수:
+    - telemetry (Telemetry): 새로 시작(started), 이어 붙음(attached), 버림(stale), 멈춤(cancelled) 횟수를 기록할 곳
+      (없으면 None)
+    - max_workers (int): 동시에 실행할 작업 수 (넘는 작업은 스레드가 빌 때까지 기다림)
+    """
+
+    def __init__(self, telemetry=None, max_workers=32):
+        self.telemetry = telemetry
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="inflight")
+        self._lock = threading.Lock()
+        self._tasks = {}  # (세션 ID, 동작) → 진행 중인 InflightTask
+        self._stats = Counter()
+
+    def submit(self, session, action, key, fn, alive=None, timeout=None):
+        """
+        동작을 새로 실행하거나, 같은 입력으로 진행 중인 작업에 이어 붙는 함수
+
+        매개변수:
+        - session (str): 세션 ID
+        - action (str): 동작 이름 (예: "feedback")
+        - key (str): 입력 해시 (make_inputs_key())
+        - fn (callable): InflightTask를 받아 결과를 돌려주는 함수 (스레드 풀에서 실행).
+          도중의 사건은 task.publish()로 남기고, task.cancelled()가 True가 되면 되도록 빨리 그만둠
+        - alive (callable): 세션이 아직 살아 있는지 알려 주는 함수 (없으면 세션 종료로는 멈추지 않음)
+        - timeout (float): 새로 시작하는 작업의 결과를 기다릴 최대 시간(초) (스레드 풀에서 차례를 기다린 시간 포함)
+
+        반환값:
+        - tuple: (InflightTask, 진행 중인 작업에 이어 붙었는지 여부)
+        """
+        with self._lock:
+            task = self._tasks.get((session, action))
+            # 이미 멈추라는 알림을 받은 작업(기다릴 시간을 넘김 등)에는 이어 붙지 않고 새로 시작
+            attached = task is not None and task.key == key and not task.cancelled()
+            if not attached:
+                # 입력이 바뀌었으면 이전 작업은 목록에서 빠지고 멈추라는 알림을 받음 (끝나도 결과를 버림)
+                if task is not None:
+                    task.cancel()
+                task = InflightTask(key, alive, timeout)
+                self._tasks[(session, action)] = task
+        self._record(action, "attached" if attached else "started")
+        if not attached:
+            self._executor.submit(self._run, session, action, task, fn)
+        return task, attached
+
+    def _run(self, session, action, task, fn):
+        """작업 스레드: fn을 실행하고, 그사이 새 입력으로 바뀌었으면 결과를 버림"""
+        result = error = None
+        try:
+            result = fn(task)
+        except Exception as e:
+            error = e
+        except BaseException as e:
+            # 스레드를 끝내는 예외도 기다리는 쪽에는 실패로 알리고(아래 finally) 그대로 올려보냄
+            error = RuntimeError(f"{action}: 작업이 중단되었습니다 ({type(e).__name__}).")
+            raise
+        finally:
+            # 어떤 식으로 끝나든 목록에서 빼고 기다리는 쪽을 깨움 (그러지 않으면 이어 붙은 화면 실행이 멈춰 있음)
+            with self._lock:
+                current = self._tasks.get((session, action)) is task
+                if current:
+                    del self._tasks[(session, action)]
+            if not current:
+                # 알림을 받고 중간에 그만뒀으면 멈춤, 그 전에 끝났으면 버림으로 셈
+                self._record(action, "cancelled" if error is not None and task.cancelled() else "stale")
+                result, error = None, SupersededError(f"{action}: 입력이 바뀌어 이전 결과를 버렸습니다.")
+            task.finish(result, error)
+
+    def _record(self, action, outcome):
+        with self._lock:
+            self._stats[outcome] += 1
+        if self.telemetry is not None:
+            self.telemetry.record_submission(action, outcome)
+
+    def stats(self):
+        """
+        중복 요청 처리 통계를 반환하는 함수
+
+        반환값:
+        - dict: started(새로 시작), attached(이어 붙어 아낀 요청), stale(입력이 바뀌어 버린 결과),
+          cancelled(입력이 바뀌어 중간에 멈춘 작업), inflight(진행 중인 작업 수)
+        """
+        with self._lock:
+            stats = {outcome: self._stats[outcome] for outcome in ("started", "attached", "stale", "cancelled")}
+            stats["inflight"] = len(self._tasks)
+        return stats
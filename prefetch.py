@@ -0,0 +1,105 @@
+"""
+백그라운드 미리 생성(prefetch) 모듈
+
+주제 추천을 받은 학생 대부분은 곧바로 추천 주제 중 하나를 골라 논거 아이디어를 요청합니다.
+이 모듈은 그런 "다음 요청"을 제한된 스레드 풀에서 미리 실행해 응답 캐시에 넣어 두는 일을 합니다.
+
+- 전체 동시 실행 수 상한 (스레드 수) 과 대기 작업 수 상한
+- 세션(소유자)별 취소
+- 할당량이 빠듯할 때(quota_ok()가 False) 자동으로 건너뜀
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class Prefetcher:
+    """
+    세션별로 미리 생성 작업을 예약하고 취소할 수 있는 백그라운드 실행기
+
+    매개변수:
+    - max_workers (int): 동시에 실행할 수 있는 미리 생성 작업 수 (프로세스 전체 기준)
+    - max_pending (int): 대기 중인 작업 수 상한 (넘으면 새 작업은 건너뜀)
+    - quota_ok (callable): 할당량에 여유가 있으면 True를 반환하는 함수
+    """
+
+    def __init__(self, max_workers=2, max_pending=30, quota_ok=None):
+        self.max_pending = max_pending
+        self.quota_ok = quota_ok or (lambda: True)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="prefetch")
+        self._lock = threading.Lock()
+        self._futures = {}  # owner → [Future]
+        self._stats = {"submitted": 0, "completed": 0, "failed": 0, "cancelled": 0, "skipped": 0}
+
+    def submit(self, owner, jobs):
+        """
+        미리 생성 작업들을 예약하는 함수 (같은 소유자의 이전 작업은 먼저 취소)
+
+        매개변수:
+        - owner (str): 작업을 요청한 세션 ID
+        - jobs (list): 인자 없이 실행할 함수 목록
+
+        반환값:
+        - int: 실제로 예약된 작업 수
+        """
+        self.cancel(owner)
+        if not self.quota_ok():
+            self._count("skipped", len(jobs))
+            return 0
+
+        futures = []
+        with self._lock:
+            pending = sum(1 for fs in self._futures.values() for f in fs if not f.done())
+            for job in jobs:
+                if pending >= self.max_pending:
+                    self._stats["skipped"] += 1
+                    continue
+                futures.append(self._executor.submit(self._run, job))
+                self._stats["submitted"] += 1
+                pending += 1
+            self._futures[owner] = futures
+        return len(futures)
+
+    def cancel(self, owner):
+        """
+        소유자의 아직 시작하지 않은 작업을 취소하는 함수
+        (이미 실행 중인 작업은 끝까지 실행되어 결과가 캐시에 저장됨)
+
+        반환값:
+        - int: 취소된 작업 수
+        """
+        with self._lock:
+            futures = self._futures.pop(owner, [])
+        cancelled = sum(1 for f in futures if f.cancel())
+        self._count("cancelled", cancelled)
+        return cancelled
+
+    def _run(self, job):
+        """작업 하나를 실행하는 함수: 실행 직전에 할당량을 다시 확인"""
+        if not self.quota_ok():
+            self._count("skipped")
+            return None
+        try:
+            result = job()
+        except Exception:
+            # 미리 생성은 실패해도 학생이 직접 요청할 때 다시 시도되므로 조용히 넘어감
+            self._count("failed")
+            return None
+        self._count("completed")
+        return result
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self._stats[name] += amount
+
+    def stats(self):
+        """
+        미리 생성 통계를 반환하는 함수
+
+        반환값:
+        - dict: submitted, completed, failed, cancelled, skipped, pending(아직 끝나지 않은 작업 수)
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["pending"] = sum(1 for fs in self._futures.values() for f in fs if not f.done())
+        return stats
@@ -0,0 +1,220 @@
+"""
+Gemini 호출 속도 제한 모듈
+
+여러 반이 같은 배포를 함께 쓰면 순간적으로 Gemini 분당 할당량을 넘기 쉽습니다.
+이 모듈은 프로세스 전체에서 공유하는 토큰 버킷(분당 요청 수, 분당 토큰 수)으로 호출 속도를 제한합니다.
+기다리는 요청은 세션별 FIFO 대기열에 들어가고, 세션들 사이에서는 돌아가며(round-robin) 순서를 받으므로
+한 학생이 버튼을 계속 눌러도 반 전체가 밀리지 않습니다.
+"""
+
+import threading
+import time
+from collections import OrderedDict, deque
+
+
+class QueueTimeout(Exception):
+    """대기열에서 너무 오래 기다려 요청을 포기했을 때 발생하는 예외"""
+
+
+class QueueCancelled(Exception):
+    """대기열에서 기다리던 요청이 필요 없어져(세션 종료, 새 입력) 물러났을 때 발생하는 예외"""
+
+
+def estimate_tokens(text):
+    """
+    텍스트의 대략적인 토큰 수를 추정하는 함수
+    (한글은 글자당 약 0.75토큰, 영문·숫자는 글자당 약 0.25토큰으로 계산: UTF-8 바이트 수 / 4)
+
+    매개변수:
+    - text (str): 토큰 수를 추정할 텍스트
+
+    반환값:
+    - int: 추정 토큰 수 (최소 1)
+    """
+    return max(1, len(text.encode("utf-8")) // 4)
+
+
+class _Bucket:
+    """일정한 속도로 채워지는 토큰 버킷"""
+
+    def __init__(self, per_minute, burst):
+        self.rate = per_minute / 60.0
+        self.capacity = max(1.0, per_minute * burst)
+        self.available = self.capacity
+        self.updated = time.monotonic()
+
+    def refill(self, now):
+        self.available = min(self.capacity, self.available + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def eta(self, amount):
+        """amount만큼 채워지기까지 남은 시간(초)"""
+        missing = amount - self.available
+        return missing / self.rate if missing > 0 else 0.0
+
+
+class _Ticket:
+    """대기열에 들어간 요청 하나"""
+
+    __slots__ = ("owner", "tokens")
+
+    def __init__(self, owner, tokens):
+        self.owner = owner
+        self.tokens = tokens
+
+
+class RateLimiter:
+    """
+    분당 요청 수와 분당 토큰 수를 함께 제한하고, 세션별로 공평하게 순서를 주는 속도 제한기
+
+    매개변수:
+    - requests_per_minute (int): 분당 요청 수 한도
+    - tokens_per_minute (int): 분당 토큰 수 한도 (입력 + 예상 출력)
+    - burst (float): 한꺼번에 쓸 수 있는 양 (분당 한도에 대한 비율)
+    """
+
+    # 대기 중 순번과 예상 시간을 다시 계산하는 간격(초)
+    POLL_INTERVAL = 0.5
+
+    def __init__(self, requests_per_minute, tokens_per_minute, burst=0.25):
+        self._requests = _Bucket(requests_per_minute, burst)
+        self._tokens = _Bucket(tokens_per_minute, burst)
+        self._queues = OrderedDict()  # owner → deque[_Ticket], 맨 앞 세션이 다음 차례
+        self._cond = threading.Condition()
+        self._stats = {"granted": 0, "waited": 0, "wait_seconds": 0.0, "timeouts": 0, "cancelled": 0,
+                       "max_queue": 0}
+
+    def acquire(self, owner, tokens, on_wait=None, timeout=None, cancelled=None):
+        """
+        차례가 올 때까지 기다렸다가 요청 1회와 토큰을 사용하는 함수
+
+        매개변수:
+        - owner (str): 요청한 세션 ID (세션 간 공평한 순서에 사용)
+        - tokens (int): 이번 요청에 쓸 것으로 예상되는 토큰 수
+        - on_wait (callable): 기다리는 동안 (순번, 예상 대기 시간(초))으로 호출되는 함수
+        - timeout (float): 최대 대기 시간(초). 넘으면 QueueTimeout 발생
+        - cancelled (callable): 기다리는 동안 확인할 함수. True를 돌려주면 대기열에서 빠지고 QueueCancelled 발생
+
+        반환값:
+        - float: 대기한 시간(초)
+        """
+        ticket = _Ticket(owner, tokens)
+        started = time.monotonic()
+        deadline = started + timeout if timeout is not None else None
+        reported = None
+        with self._cond:
+            self._queues.setdefault(owner, deque()).append(ticket)
+            self._stats["max_queue"] = max(self._stats["max_queue"], self._queue_length())
+        try:
+            while True:
+                with self._cond:
+                    now = time.monotonic()
+                    self._requests.refill(now)
+                    self._tokens.refill(now)
+                    if self._try_grant(ticket):
+                        waited = now - started
+                        if reported is not None:
+                            self._stats["waited"] += 1
+                            self._stats["wait_seconds"] += waited
+                        return waited
+                    if deadline is not None and now >= deadline:
+                        self._stats["timeouts"] += 1
+                        raise QueueTimeout(f"{timeout:.0f}초 동안 차례가 오지 않았습니다.")
+                    if cancelled is not None and cancelled():
+                        # 자리를 비워 뒤에 선 요청이 바로 차례를 받도록 함
+                        self._stats["cancelled"] += 1
+                        raise QueueCancelled("요청이 필요 없어져 대기열에서 빠졌습니다.")
+                    position, eta = self._position(ticket)
+                    wait = self.POLL_INTERVAL
+                    if deadline is not None:
+                        wait = min(wait, deadline - now)
+                    if on_wait is None or (position, round(eta)) == reported:
+                        self._cond.wait(wait)
+                        continue
+                reported = (position, round(eta))
+                # 화면 갱신 등은 잠금 밖에서 호출
+                on_wait(position, eta)
+        except BaseException:
+            with self._cond:
+                self._remove(ticket)
+                self._cond.notify_all()
+            raise
+
+    def settle(self, estimated_tokens, actual_tokens):
+        """
+        요청이 끝난 뒤 실제 사용한 토큰 수로 토큰 버킷을 보정하는 함수
+        (예상보다 적게 썼으면 돌려주고, 많이 썼으면 더 차감)
+        돌려받는 양이 많아도 버킷 용량을 넘지 않게 해서, 한꺼번에 쓸 수 있는 양(burst)이 늘어나지 않도록 합니다.
+        """
+        with self._cond:
+            # 그동안 채워진 양을 먼저 반영한 뒤 보정해야 용량 제한이 정확함
+            self._tokens.refill(time.monotonic())
+            self._tokens.available = min(self._tokens.capacity,
+                                         self._tokens.available - (actual_tokens - estimated_tokens))
+            self._cond.notify_all()
+
+    def queue_length(self):
+        """현재 대기 중인 요청 수를 반환합니다."""
+        with self._cond:
+            return self._queue_length()
+
+    def stats(self):
+        """
+        속도 제한 통계를 반환하는 함수
+
+        반환값:
+        - dict: granted, waited, wait_seconds, timeouts, cancelled, max_queue, queued
+        """
+        with self._cond:
+            stats = dict(self._stats)
+            stats["queued"] = self._queue_length()
+        return stats
+
+    def _queue_length(self):
+        return sum(len(q) for q in self._queues.values())
+
+    def _try_grant(self, ticket):
+        """ticket이 맨 앞 차례이고 버킷에 여유가 있으면 사용 처리 후 True"""
+        owner, queue = next(iter(self._queues.items()))
+        if queue[0] is not ticket:
+            return False
+        tokens = min(ticket.tokens, self._tokens.capacity)
+        if self._requests.available < 1 or self._tokens.available < tokens:
+            return False
+        self._requests.available -= 1
+        self._tokens.available -= tokens
+        queue.popleft()
+        if queue:
+            # 같은 세션의 다음 요청은 다른 세션들 뒤로 (돌아가며 차례 주기)
+            self._queues.move_to_end(owner)
+        else:
+            del self._queues[owner]
+        self._stats["granted"] += 1
+        self._cond.notify_all()
+        return True
+
+    def _position(self, ticket):
+        """
+        ticket의 순번(1부터)과 예상 대기 시간(초)을 계산하는 함수
+        세션들이 돌아가며 차례를 받는다고 보고, ticket보다 먼저 처리될 요청 수를 셉니다.
+        """
+        owners = list(self._queues)
+        mine = owners.index(ticket.owner)
+        index = self._queues[ticket.owner].index(ticket)
+        ahead = index
+        for i, owner in enumerate(owners):
+            if i == mine:
+                continue
+            ahead += min(len(self._queues[owner]), index + 1 if i < mine else index)
+        position = ahead + 1
+        eta = max(self._requests.eta(position), self._tokens.eta(position * ticket.tokens))
+        return position, eta
+
+    def _remove(self, ticket):
+        """대기열에서 ticket을 제거하는 함수 (포기하거나 오류가 난 경우)"""
+        queue = self._queues.get(ticket.owner)
+        if queue is None or ticket not in queue:
+            return
+        queue.remove(ticket)
+        if not queue:
+            del self._queues[ticket.owner]
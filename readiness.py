@@ -0,0 +1,64 @@
+"""
+준비 상태(readiness) 확인 모듈
+
+호스팅 환경에서 앱이 잠들었다가 깨어나면, 첫 요청 때 google.generativeai를 가져오고 구성하느라 시간이 걸립니다.
+이 모듈은 Streamlit과 별도의 작은 HTTP 서버를 띄워 GET /ready에 준비 상태를 알려 줍니다.
+준비가 끝났으면 200, 아직이면 503을 돌려주므로, 한 반 전체를 이 프로세스로 보내기 전에 확인할 수 있습니다.
+"""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class ReadinessServer:
+    """
+    GET /ready 요청에 준비 상태를 JSON으로 답하는 HTTP 서버
+
+    매개변수:
+    - port (int): 들을 포트 번호
+    - check (callable): 인자 없이 호출하면 "ready"(bool)가 들어 있는 dict를 돌려주는 함수
+    - host (str): 들을 주소
+    """
+
+    def __init__(self, port, check, host="0.0.0.0"):
+        self.check = check
+        self._server = ThreadingHTTPServer((host, port), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, name="readiness-server", daemon=True)
+
+    @property
+    def port(self):
+        return self._server.server_address[1]
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/ready":
+                    self.send_error(404)
+                    return
+                status = server.check()
+                body = json.dumps(status).encode("utf-8")
+                self.send_response(200 if status.get("ready") else 503)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                # 상태 확인 요청은 자주 오므로 로그를 남기지 않음
+                pass
+
+        return Handler
+
+    def start(self):
+        """백그라운드 스레드에서 요청을 받기 시작합니다."""
+        self._thread.start()
+        return self
+
+    def close(self):
+        """서버를 멈춥니다."""
+        self._server.shutdown()
+        self._server.server_close()
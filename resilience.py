@@ -0,0 +1,190 @@
+"""
+Gemini 호출 안정성 모듈 (재시도, 제한 시간, 회로 차단기)
+
+- 일시적인 오류(429, 500, 503, 504)는 지수 백오프 + 지터로 다시 시도하고,
+  서버가 알려 준 재시도 대기 시간(retry delay)이 있으면 그만큼은 반드시 기다립니다.
+- 한 번의 호출이 너무 오래 걸리면(GenerationTimeout) 세션이 멈춰 있지 않도록 포기합니다.
+- 필요 없어진 생성(GenerationCancelled)은 실패로 세지 않고 다시 시도하지도 않습니다.
+- 연속으로 실패하면 회로 차단기가 열려 한동안 호출하지 않고 바로 실패(CircuitOpenError)시킵니다.
+"""
+
+import random
+import re
+import threading
+import time
+
+# 다시 시도할 만한 HTTP 상태 코드 (할당량 초과, 서버 일시 오류)
+RETRYABLE_STATUS_CODES = {429, 500, 503, 504}
+
+# 오류 메시지에 포함된 "retry in 12.3s" 형태의 대기 시간
+_RETRY_IN_PATTERN = re.compile(r"retry in ([0-9.]+)\s*s", re.IGNORECASE)
+
+
+class GenerationTimeout(Exception):
+    """정해진 제한 시간 안에 생성이 끝나지 않았을 때 발생하는 예외"""
+
+
+class GenerationCancelled(Exception):
+    """요청한 세션이 끝났거나 더 새로운 입력으로 바뀌어 생성을 중간에 멈췄을 때 발생하는 예외"""
+
+
+class CircuitOpenError(Exception):
+    """회로 차단기가 열려 있어 호출하지 않고 바로 실패할 때 발생하는 예외"""
+
+
+def status_code(exc):
+    """
+    예외에서 HTTP 상태 코드를 꺼내는 함수 (google.api_core 예외의 code 속성 사용)
+
+    반환값:
+    - int: 상태 코드 또는 알 수 없으면 None
+    """
+    code = getattr(exc, "code", None)
+    if isinstance(code, int):
+        return code
+    return None
+
+
+def is_retryable(exc):
+    """일시적인 오류라서 다시 시도할 만한지 판단하는 함수"""
+    return isinstance(exc, GenerationTimeout) or status_code(exc) in RETRYABLE_STATUS_CODES
+
+
+def retry_after_seconds(exc):
+    """
+    서버가 알려 준 재시도 대기 시간(초)을 꺼내는 함수
+    오류 상세 정보(RetryInfo.retry_delay)를 먼저 보고, 없으면 오류 메시지에서 찾습니다.
+
+    반환값:
+    - float: 대기 시간(초) 또는 알 수 없으면 None
+    """
+    for detail in getattr(exc, "details", None) or []:
+        delay = getattr(detail, "retry_delay", None)
+        if delay is not None:
+            return delay.seconds + delay.nanos / 1e9
+    match = _RETRY_IN_PATTERN.search(str(exc))
+    if match:
+        return float(match.group(1))
+    return None
+
+
+class RetryPolicy:
+    """
+    지수 백오프 + 지터 재시도 정책
+
+    매개변수:
+    - max_attempts (int): 첫 시도를 포함한 최대 시도 횟수
+    - base_delay (float): 첫 재시도 대기 시간의 상한(초)
+    - max_delay (float): 재시도 대기 시간의 최대값(초)
+    """
+
+    def __init__(self, max_attempts=3, base_delay=1.0, max_delay=20.0):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def delay(self, attempt, exc=None):
+        """
+        attempt번째 실패(1부터) 뒤에 기다릴 시간(초)을 계산하는 함수
+        0과 지수 상한 사이에서 무작위로 고르되(full jitter), 서버가 요청한 시간보다 짧지는 않게 합니다.
+        """
+        ceiling = min(self.max_delay, self.base_delay * (2 ** (attempt - 1)))
+        delay = random.uniform(0, ceiling)
+        hinted = retry_after_seconds(exc) if exc is not None else None
+        if hinted is not None:
+            delay = max(delay, min(hinted, self.max_delay))
+        return delay
+
+
+class CircuitBreaker:
+    """
+    연속 실패가 쌓이면 잠시 호출을 막는 회로 차단기
+
+    - closed: 정상 상태, 모든 호출 허용
+    - open: 연속 실패 후 reset_timeout초 동안 모든 호출을 바로 실패시킴
+    - half_open: 대기 시간이 지나면 시험 호출 1개만 허용하고, 성공하면 closed, 실패하면 다시 open
+
+    매개변수:
+    - failure_threshold (int): 회로를 여는 연속 실패 횟수
+    - reset_timeout (float): 회로를 연 뒤 시험 호출을 허용하기까지의 시간(초)
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._state = "closed"
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial = None  # 진행 중인 시험 호출의 표 (before_call()이 돌려준 객체)
+        self._lock = threading.Lock()
+        self._stats = {"opened": 0, "half_opened": 0, "closed": 0, "rejected": 0}
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state
+
+    def before_call(self):
+        """
+        호출 직전에 실행: 회로가 열려 있으면 CircuitOpenError 발생
+
+        반환값:
+        - object: 이 호출이 반쯤 열린 상태의 시험 호출이면 그 표, 아니면 None
+          (호출이 끝나면 record_success/record_failure/release 중 하나에 그대로 넘김)
+        """
+        with self._lock:
+            if self._state == "open":
+                if time.monotonic() - self._opened_at < self.reset_timeout:
+                    self._stats["rejected"] += 1
+                    raise CircuitOpenError("Gemini 서버 상태가 좋지 않아 잠시 호출을 멈췄습니다.")
+                self._state = "half_open"
+                self._stats["half_opened"] += 1
+            if self._state == "half_open":
+                if self._trial is not None:
+                    self._stats["rejected"] += 1
+                    raise CircuitOpenError("Gemini 서버 상태를 확인하는 중입니다.")
+                self._trial = object()
+                return self._trial
+            return None
+
+    def _end_trial(self, trial):
+        # 시험 호출 자리는 그 시험 호출만 비움 (회로가 열리기 전에 시작한 다른 호출이 끝나도 그대로 둠)
+        if trial is not None and trial is self._trial:
+            self._trial = None
+
+    def record_success(self, trial=None):
+        """호출이 성공했을 때 실행 (trial: before_call()이 돌려준 값)"""
+        with self._lock:
+            self._failures = 0
+            self._end_trial(trial)
+            if self._state != "closed":
+                self._state = "closed"
+                self._stats["closed"] += 1
+
+    def record_failure(self, trial=None):
+        """서버 쪽 문제로 호출이 실패했을 때 실행 (trial: before_call()이 돌려준 값)"""
+        with self._lock:
+            self._failures += 1
+            self._end_trial(trial)
+            if self._state == "half_open" or self._failures >= self.failure_threshold:
+                if self._state != "open":
+                    self._stats["opened"] += 1
+                self._state = "open"
+                self._opened_at = time.monotonic()
+
+    def release(self, trial=None):
+        """성공/실패를 판단할 수 없이 호출이 끝났을 때 실행 (시험 호출이었으면 그 자리만 반납)"""
+        with self._lock:
+            self._end_trial(trial)
+
+    def stats(self):
+        """
+        회로 차단기 통계를 반환하는 함수
+
+        반환값:
+        - dict: state, opened, half_opened, closed, rejected
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["state"] = self._state
+        return stats
@@ -0,0 +1,156 @@
+"""
+Gemini 응답 캐시 모듈
+
+같은 프로세스에서 실행되는 모든 학생 세션이 함께 사용하는 응답 캐시입니다.
+한 반의 학생들이 같은 관심사("게임", "환경", "학교")를 입력하거나 같은 추천 주제를
+고르는 경우가 많기 때문에, 같은 프롬프트는 한 번만 Gemini에 요청하고 결과를 재사용합니다.
+
+- 키: 모델명 + 프롬프트 그대로 (관심사·주제 같은 짧은 입력만 프롬프트를 만들기 전에 normalize_input()으로 통일하고,
+  학생이 쓴 의견은 문장부호 하나까지 피드백 대상이므로 손대지 않음)
+- 제거 정책: LRU (전체 메모리 사용량 상한)
+- 만료 정책: 템플릿별 TTL
+- 통계: 적중/미스/제거/만료 횟수
+"""
+
+import hashlib
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+# 연속된 공백을 하나로 합칠 때 사용하는 구분자 목록
+_WHITESPACE = (" ", "\t", "\n", "\r", "　", "\xa0")
+
+
+def normalize_input(text):
+    """
+    프롬프트에 넣기 전에 짧은 입력(관심사, 토론 주제)을 가볍게 정규화하는 함수
+    같은 주제가 같은 프롬프트가 되어 캐시를 함께 쓰도록 하되, 뜻이 달라질 수 있는 문장부호·대소문자는 그대로 둡니다.
+
+    - 유니코드 NFC 정규화 (자모가 분리된 한글 입력을 완성형으로 통일)
+    - 연속된 공백을 한 칸으로 축소하고 앞뒤 공백 제거
+
+    매개변수:
+    - text (str): 학생 입력
+
+    반환값:
+    - str: 정규화된 텍스트
+    """
+    text = unicodedata.normalize("NFC", text)
+    chars = [" " if ch in _WHITESPACE else ch for ch in text]
+    return " ".join("".join(chars).split())
+
+
+def make_cache_key(model, prompt):
+    """
+    모델명과 프롬프트로 캐시 키를 만드는 함수
+    프롬프트는 글자 그대로 씁니다 (학생 의견의 문장부호·숫자가 다르면 다른 응답이어야 하므로).
+
+    매개변수:
+    - model (str): Gemini 모델명
+    - prompt (str): 템플릿에 입력값을 채운 프롬프트
+
+    반환값:
+    - str: SHA-256 해시 문자열
+    """
+    raw = f"{model}\x00{prompt}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    스레드 안전한 LRU + TTL 응답 캐시
+
+    매개변수:
+    - max_bytes (int): 캐시에 저장할 응답의 전체 크기 상한 (UTF-8 바이트 기준)
+    - default_ttl (float): 템플릿별 TTL이 없을 때 사용할 유지 시간(초)
+    - ttl_by_template (dict): 템플릿 이름 → 유지 시간(초)
+    """
+
+    def __init__(self, max_bytes=32 * 1024 * 1024, default_ttl=3600, ttl_by_template=None):
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self.ttl_by_template = dict(ttl_by_template or {})
+        self._entries = OrderedDict()  # key → (value, expires_at, size)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0}
+
+    def ttl_for(self, template):
+        """템플릿 이름에 해당하는 TTL(초)을 반환합니다."""
+        return self.ttl_by_template.get(template, self.default_ttl)
+
+    def get(self, key, record=True):
+        """
+        캐시에서 응답을 꺼내는 함수 (만료된 항목은 지우고 미스로 처리)
+
+        매개변수:
+        - key (str): make_cache_key()로 만든 키
+        - record (bool): 적중/미스 통계에 반영할지 여부 (같은 요청 안에서 다시 확인할 때는 False)
+
+        반환값:
+        - str: 저장된 응답 또는 없으면 None
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                if record:
+                    self._stats["misses"] += 1
+                return None
+            value, expires_at, size = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                self._bytes -= size
+                self._stats["expirations"] += 1
+                if record:
+                    self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            if record:
+                self._stats["hits"] += 1
+            return value
+
+    def set(self, key, value, template=None):
+        """
+        응답을 캐시에 저장하는 함수 (용량을 넘으면 가장 오래 쓰지 않은 항목부터 제거)
+
+        매개변수:
+        - key (str): make_cache_key()로 만든 키
+        - value (str): 저장할 응답 텍스트
+        - template (str): 응답을 만든 템플릿 이름 (TTL 결정에 사용)
+        """
+        size = len(value.encode("utf-8")) + len(key)
+        if size > self.max_bytes:
+            return
+        expires_at = time.monotonic() + self.ttl_for(template)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[2]
+            self._entries[key] = (value, expires_at, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (_, _, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self._stats["evictions"] += 1
+
+    def clear(self):
+        """캐시를 비웁니다. (통계는 유지)"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        """
+        캐시 통계를 반환하는 함수
+
+        반환값:
+        - dict: hits, misses, evictions, expirations, entries, bytes, hit_rate
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+            stats["bytes"] = self._bytes
+        total = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / total if total else 0.0
+        return stats
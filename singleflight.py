@@ -0,0 +1,85 @@
+"""
+동시 요청 합치기(single-flight) 모듈
+
+선생님이 "지금 모두 주제 추천 눌러 보세요"라고 하면 여러 세션이 1초 안에 같은 프롬프트를 보냅니다.
+아직 첫 요청이 끝나지 않았으므로 캐시로는 막을 수 없습니다.
+이 모듈은 같은 키의 요청이 진행 중이면 새 요청을 보내지 않고, 먼저 시작한 요청(리더)의
+결과(또는 오류)를 뒤따르는 요청(팔로워)들이 함께 받도록 합니다.
+"""
+
+import threading
+from concurrent.futures import Future
+
+
+class SingleFlight:
+    """
+    같은 키로 동시에 들어온 호출을 하나의 실제 호출로 합치는 클래스
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._inflight = {}  # key → Future
+        self._waiting = {}  # key → 지금 리더의 결과를 기다리는 팔로워 수
+        self._stats = {"leaders": 0, "followers": 0}
+
+    def do(self, key, fn):
+        """
+        키에 해당하는 호출이 진행 중이면 그 결과를 기다리고, 아니면 fn()을 직접 실행하는 함수
+
+        매개변수:
+        - key (str): 요청을 구분하는 키 (예: 캐시 키)
+        - fn (callable): 실제 호출을 수행하는 인자 없는 함수
+
+        반환값:
+        - tuple: (fn의 결과, 다른 호출의 결과를 공유받았는지 여부)
+        """
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is None:
+                future = Future()
+                self._inflight[key] = future
+                self._stats["leaders"] += 1
+                leader = True
+            else:
+                self._stats["followers"] += 1
+                self._waiting[key] = self._waiting.get(key, 0) + 1
+                leader = False
+
+        if not leader:
+            # 리더의 결과를 기다림 (리더가 실패하면 같은 예외가 다시 발생)
+            try:
+                return future.result(), True
+            finally:
+                with self._lock:
+                    self._waiting[key] -= 1
+                    if not self._waiting[key]:
+                        del self._waiting[key]
+
+        try:
+            result = fn()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result, False
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def followers(self, key):
+        """키에 해당하는 진행 중인 호출의 결과를 지금 기다리는 팔로워 수를 반환합니다."""
+        with self._lock:
+            return self._waiting.get(key, 0)
+
+    def stats(self):
+        """
+        합치기 통계를 반환하는 함수
+
+        반환값:
+        - dict: leaders(실제 호출 수), followers(절약한 호출 수), inflight(진행 중인 호출 수)
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["inflight"] = len(self._inflight)
+        return stats
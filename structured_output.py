@@ -0,0 +1,299 @@
+"""
+구조화된 응답 모듈
+
+세 기능(주제 추천, 논거 아이디어, 피드백)과 주제 하나 바꾸기의 응답을 정해진 스키마의 기록(NamedTuple)으로 읽고,
+화면에는 그 기록에서 다시 만든 마크다운을 보여 줍니다. 주제 버튼처럼 응답의 일부가 필요한 곳은
+다시 실행될 때마다 정규식으로 글을 긁지 않고 세션에 저장된 기록을 그대로 씁니다.
+
+응답 형식은 프롬프트 템플릿의 "# 출력 형식:" 마크다운을 스키마로 삼습니다.
+(google-generativeai 0.3.2에는 JSON 출력 모드가 없고, 화면은 생성되는 글자를 그대로 바로 보여 주기 때문)
+제목의 # 개수, 굵은 글씨, 번호 모양(1. / 1) / -) 같은 작은 차이는 그대로 읽어 내고,
+항목이 빠졌거나 제목을 찾을 수 없으면 FormatError를 냅니다. 그때는 app.py가 형식 정리 요청을 한 번 보냅니다.
+주제 추천은 TopicStream으로 스트리밍 도중에도 완성된 주제부터 하나씩 읽을 수 있습니다.
+"""
+
+import re
+from typing import NamedTuple
+
+# 템플릿 이름 (app.py의 TEMPLATE_* 와 같은 값)
+RECOMMEND_TOPIC = "recommend_topic"
+REPLACE_TOPIC = "replace_topic"
+ARGUMENT_IDEAS = "argument_ideas"
+FEEDBACK = "feedback"
+
+
+class FormatError(ValueError):
+    """응답이 출력 형식(스키마)에 맞지 않을 때 발생하는 예외"""
+
+
+class Topic(NamedTuple):
+    """추천 주제 하나"""
+    title: str
+    background: str
+    issues: str
+
+
+class ArgumentIdeas(NamedTuple):
+    """한 주제의 찬반 논거 아이디어"""
+    topic: str
+    pro: tuple
+    con: tuple
+
+
+class Feedback(NamedTuple):
+    """학생 의견 피드백"""
+    relevance: str
+    stance: str
+    suggestion: str
+
+
+# "## 주제 [1]: 주제명" (# 대신 굵은 글씨만 쓰거나 괄호, 구분 기호가 조금 달라도 인정)
+_TOPIC_HEADING = re.compile(r"^\s*(?:#{1,4}\s*(?:\*\*)?|\*\*)\s*주제\s*\[?\s*(\d+)\s*\]?\s*(?:\*\*)?\s*[:：.)\-]\s*(.*)$",
+                            re.MULTILINE)
+# "## [주제] 토론을 위한 논거 아이디어"
+_ARGUMENT_HEADING = re.compile(r"^\s*#{1,4}\s*\[?(.*?)\]?\s*토론을 위한 논거 아이디어", re.MULTILINE)
+# 번호나 글머리표가 붙은 목록 항목
+_LIST_ITEM = re.compile(r"^\s*(?:\d+\s*[.)]|[-*•])\s+(.+)$")
+_HEADING = re.compile(r"^\s*#{1,6}\s")
+
+
+def _clean(text):
+    """앞뒤 공백, 굵은 글씨 표시, 출력 형식을 흉내 낸 대괄호를 지움"""
+    text = text.strip().strip("*").strip()
+    if text.startswith("[") and text.endswith("]"):
+        text = text[1:-1].strip()
+    return text
+
+
+def _field(block, label):
+    """
+    "label: 값" 항목의 값을 찾는 함수
+    값이 같은 줄에 없으면 다음 제목이나 다른 항목 전까지의 줄(목록이면 항목들)을 " / "로 이어 붙입니다.
+    """
+    lines = block.splitlines()
+    pattern = re.compile(rf"^\s*(?:#{{1,6}}\s*|[*-]\s*)?(?:\*\*)?\s*{label}[^:：]*[:：]\s*(?:\*\*)?\s*(.*)$")
+    for index, line in enumerate(lines):
+        match = pattern.match(line)
+        if not match:
+            continue
+        value = _clean(match.group(1))
+        if value:
+            return value
+        values = []
+        for following in lines[index + 1:]:
+            if _HEADING.match(following) or re.match(r"^\s*[*-]\s*\*\*", following):
+                break
+            item = _LIST_ITEM.match(following)
+            text = _clean(item.group(1) if item else following)
+            if text:
+                values.append(text)
+        return " / ".join(values)
+    return ""
+
+
+def parse_recommendations(text):
+    """
+    주제 추천 응답을 Topic 기록들로 읽는 함수
+
+    반환값:
+    - tuple: Topic 기록들 (응답에 나온 순서)
+    """
+    headings = list(_TOPIC_HEADING.finditer(text))
+    if not headings:
+        raise FormatError("'## 주제 [번호]: 주제명' 제목을 찾지 못했습니다.")
+    numbers = [int(heading.group(1)) for heading in headings]
+    if numbers != list(range(1, len(numbers) + 1)):
+        # 번호가 1부터 이어지지 않으면 읽지 못한 주제가 있다는 뜻
+        raise FormatError(f"주제 번호가 순서대로가 아닙니다: {numbers}")
+    topics = []
+    for heading, following in zip(headings, headings[1:] + [None]):
+        block = text[heading.end():following.start() if following else len(text)]
+        topic = Topic(
+            title=_clean(heading.group(2)),
+            background=_field(block, r"(?:간단한\s*)?배경 정보"),
+            issues=_field(block, "핵심 쟁점"),
+        )
+        missing = [name for name, value in zip(Topic._fields, topic) if not value]
+        if missing:
+            raise FormatError(f"주제 [{heading.group(1)}]에 빠진 항목이 있습니다: {', '.join(missing)}")
+        topics.append(topic)
+    return tuple(topics)
+
+
+class TopicStream:
+    """
+    스트리밍으로 도착하는 주제 추천 응답을 조각마다 받아, 완성된 주제를 바로 돌려주는 점진적 읽기 도구
+
+    "## 주제 [n]" 블록은 다음 주제 제목이 나타나면 완성된 것으로 봅니다.
+    (마지막 블록은 스트림이 끝난 뒤 parse_response()로 응답 전체를 읽을 때 함께 읽음)
+    읽은 주제는 parse_recommendations()와 같은 검사(번호 순서, 빠진 항목)를 거칩니다.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self.topics = ()  # 지금까지 완성된 Topic 기록들
+
+    def feed(self, piece):
+        """
+        조각 하나를 더하는 함수
+
+        반환값:
+        - tuple: 이번 조각으로 새로 완성된 Topic 기록들 (없으면 빈 튜플)
+        """
+        self.text += piece
+        headings = list(_TOPIC_HEADING.finditer(self.text))
+        # 마지막 제목의 블록은 아직 쓰는 중이므로 그 앞까지만 읽음
+        if len(headings) - 1 <= len(self.topics):
+            return ()
+        return self._update(self.text[:headings[-1].start()])
+
+    def _update(self, text):
+        try:
+            topics = parse_recommendations(text)
+        except FormatError:
+            # 형식이 어긋난 응답은 끝난 뒤 전체를 한 번에 읽고 필요하면 형식 정리를 요청함
+            return ()
+        added = topics[len(self.topics):]
+        self.topics = topics
+        return added
+
+
+def _list_section(text, side):
+    """
+    "찬성 측"/"반대 측" 같은 제목 아래의 목록 항목들을 읽는 함수 (다음 제목까지)
+    (맨 위의 "[주제] 토론을 위한 논거 아이디어" 제목은 주제 글자에 '찬성'이 들어 있어도 건너뜀)
+    """
+    section = re.compile(rf"{side}\s*(?:측|논거|의견|입장)")
+    items = []
+    inside = False
+    for line in text.splitlines():
+        if _HEADING.match(line) or re.match(r"^\s*\*\*[^*]+\*\*\s*:?\s*$", line):
+            if inside:
+                break
+            inside = bool(section.search(line)) and "토론을 위한" not in line
+            continue
+        if inside:
+            item = _LIST_ITEM.match(line)
+            if item and _clean(item.group(1)):
+                items.append(item.group(1).strip())
+    return tuple(items)
+
+
+def parse_argument_ideas(text, topic=""):
+    """
+    논거 아이디어 응답을 ArgumentIdeas 기록으로 읽는 함수
+
+    매개변수:
+    - text (str): 응답
+    - topic (str): 학생이 입력한 주제 (응답의 제목에서 주제를 찾지 못할 때 사용)
+    """
+    heading = _ARGUMENT_HEADING.search(text)
+    ideas = ArgumentIdeas(
+        topic=_clean(heading.group(1)) if heading and _clean(heading.group(1)) else topic,
+        pro=_list_section(text, "찬성"),
+        con=_list_section(text, "반대"),
+    )
+    if not ideas.pro or not ideas.con:
+        raise FormatError("찬성 측 또는 반대 측 논거 목록을 찾지 못했습니다.")
+    return ideas
+
+
+def parse_feedback(text):
+    """피드백 응답을 Feedback 기록으로 읽는 함수"""
+    feedback = Feedback(
+        relevance=_field(text, "주제 관련성"),
+        stance=_field(text, "입장 (?:구분|명확성)"),
+        suggestion=_field(text, "더 생각해 볼 점"),
+    )
+    missing = [name for name, value in zip(Feedback._fields, feedback) if not value]
+    if missing:
+        raise FormatError(f"피드백에 빠진 항목이 있습니다: {', '.join(missing)}")
+    return feedback
+
+
+def parse_replacement_topic(text):
+    """
+    주제 하나 바꾸기 응답을 읽는 함수 (주제 추천과 같은 형식으로 한 가지만 요청함)
+    모델이 주제를 더 붙여 쓰더라도 첫 주제만 씁니다.
+
+    반환값:
+    - tuple: Topic 기록 하나만 든 튜플
+    """
+    return parse_recommendations(text)[:1]
+
+
+def render_topic(topic, number):
+    """Topic 기록 하나를 "## 주제 [번호]" 블록의 마크다운으로 만듭니다."""
+    return (
+        f"## 주제 [{number}]: {topic.title}\n"
+        f"### 간단한 배경 정보: {topic.background}\n"
+        f"### 핵심 쟁점: {topic.issues}"
+    )
+
+
+def render_recommendations(topics):
+    """Topic 기록들을 출력 형식의 마크다운으로 만듭니다."""
+    return "\n\n".join(render_topic(topic, number) for number, topic in enumerate(topics, 1))
+
+
+def render_argument_ideas(ideas):
+    """ArgumentIdeas 기록을 출력 형식의 마크다운으로 만듭니다."""
+    def numbered(items):
+        return "\n".join(f"{number}. {item}" for number, item in enumerate(items, 1))
+
+    return (
+        f"## [{ideas.topic}] 토론을 위한 논거 아이디어\n\n"
+        f"### 찬성 측 논거 아이디어 (이렇게 생각해 볼 수 있어요):\n{numbered(ideas.pro)}\n\n"
+        f"### 반대 측 논거 아이디어 (이렇게 생각해 볼 수 있어요):\n{numbered(ideas.con)}"
+    )
+
+
+def render_feedback(feedback):
+    """Feedback 기록을 출력 형식의 마크다운으로 만듭니다."""
+    return (
+        "### 학생 의견 분석 및 피드백\n\n"
+        f"* **주제 관련성:** {feedback.relevance}\n"
+        f"* **입장 구분:** {feedback.stance}\n"
+        f"* **더 생각해 볼 점 (건설적 피드백):** {feedback.suggestion}"
+    )
+
+
+# 템플릿 이름 → (응답을 읽는 함수, 기록을 마크다운으로 만드는 함수)
+SCHEMAS = {
+    RECOMMEND_TOPIC: (parse_recommendations, render_recommendations),
+    REPLACE_TOPIC: (parse_replacement_topic, render_recommendations),
+    ARGUMENT_IDEAS: (parse_argument_ideas, render_argument_ideas),
+    FEEDBACK: (parse_feedback, render_feedback),
+}
+
+
+def parse_response(template, text, **context):
+    """
+    템플릿에 맞는 스키마로 응답을 읽는 함수
+
+    매개변수:
+    - template (str): 템플릿 이름
+    - text (str): 응답
+    - context: 읽는 함수에 넘길 추가 정보 (예: 논거 아이디어의 topic)
+
+    반환값:
+    - 기록 (Topic 튜플, ArgumentIdeas, Feedback)
+    """
+    if not text:
+        raise FormatError("응답이 비어 있습니다.")
+    return SCHEMAS[template][0](text, **context)
+
+
+def render_response(template, records):
+    """parse_response()로 읽은 기록을 화면에 보여 줄 마크다운으로 만듭니다."""
+    return SCHEMAS[template][1](records)
+
+
+def output_format(prompt_template):
+    """
+    프롬프트 템플릿에서 "# 출력 형식:" 부분만 잘라 내는 함수 (형식 정리 요청에 넣음)
+
+    반환값:
+    - str: 출력 형식 마크다운 ({자리표시자}는 그대로 남음)
+    """
+    return prompt_template.split("# 출력 형식:", 1)[1].split("# 입력 정보:", 1)[0].strip()
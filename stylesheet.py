@@ -0,0 +1,90 @@
+"""
+화면 스타일시트 모듈
+
+예전에는 전체 테마, 제목 영역, 1번 탭의 <style> 블록(약 14KB)을 st.markdown으로 넣었기 때문에
+버튼을 누르거나 입력할 때마다(스크립트가 다시 실행될 때마다) 같은 CSS가 웹소켓으로 다시 전송되었습니다.
+이 모듈은 static/styles.css를 한 번 읽어 압축(minify)하고 내용 해시를 붙여 두며,
+화면 쪽에서는 세션마다 한 번만 <head>에 주입합니다. 주입된 <style>은 다시 실행되어도 페이지에 남습니다.
+"""
+
+import hashlib
+import json
+import re
+
+_COMMENT = re.compile(r"/\*.*?\*/", re.DOTALL)
+_WHITESPACE = re.compile(r"\s+")
+_AROUND_PUNCTUATION = re.compile(r"\s*([{};,>])\s*")
+# @import 규칙 전체 (url(...)이나 따옴표 안의 ";"은 규칙의 끝이 아님 - 예: Google Fonts의 wght@400;700)
+_IMPORT = re.compile(r"""@import\s+(?:url\([^)]*\)|"[^"]*"|'[^']*')[^;]*;""")
+
+
+def minify_css(css):
+    """
+    CSS에서 주석과 불필요한 공백을 지우는 함수
+    @import 규칙은 스타일시트 맨 앞에 있어야 적용되므로 앞으로 모으고, 주소가 바뀌지 않도록 공백 정리 전에 떼어 둡니다.
+
+    매개변수:
+    - css (str): 원본 CSS
+
+    반환값:
+    - str: 압축된 CSS
+    """
+    css = _COMMENT.sub("", css)
+    imports = [_WHITESPACE.sub(" ", rule) for rule in _IMPORT.findall(css)]
+    body = _IMPORT.sub("", css)
+    body = _WHITESPACE.sub(" ", body)
+    body = _AROUND_PUNCTUATION.sub(r"\1", body)
+    body = body.replace(";}", "}")
+    return ("".join(imports) + body.strip()).strip()
+
+
+class Stylesheet:
+    """
+    압축된 스타일시트와 내용 해시
+
+    매개변수:
+    - css (str): 압축된 CSS
+    """
+
+    def __init__(self, css):
+        self.css = css
+        self.digest = hashlib.sha256(css.encode("utf-8")).hexdigest()[:12]
+        self.element_id = f"toronbugi-style-{self.digest}"
+
+    @classmethod
+    def load(cls, path):
+        """CSS 파일을 읽어 압축한 스타일시트를 만듭니다."""
+        with open(path, encoding="utf-8") as f:
+            return cls(minify_css(f.read()))
+
+    def injection_html(self):
+        """
+        부모 페이지의 <head>에 스타일시트를 넣는 HTML 조각을 만드는 함수
+        (streamlit.components.v1.html로 높이 0인 iframe에 넣어 실행)
+        같은 해시의 <style>이 이미 있으면 아무것도 하지 않고, 이전 버전의 <style>은 지웁니다.
+
+        반환값:
+        - str: <script> 태그
+        """
+        css_literal = json.dumps(self.css).replace("</", "<\\/")
+        return (
+            "<script>(function(){"
+            "var doc=window.parent.document;"
+            f"if(doc.getElementById('{self.element_id}'))return;"
+            "doc.querySelectorAll('style[data-toronbugi]').forEach(function(el){el.remove();});"
+            "var style=doc.createElement('style');"
+            f"style.id='{self.element_id}';"
+            "style.setAttribute('data-toronbugi','');"
+            f"style.textContent={css_literal};"
+            "doc.head.appendChild(style);"
+            "})();</script>"
+        )
+
+    def stats(self):
+        """
+        스타일시트 정보를 반환하는 함수
+
+        반환값:
+        - dict: digest(내용 해시), bytes(압축 후 크기)
+        """
+        return {"digest": self.digest, "bytes": len(self.css.encode("utf-8"))}
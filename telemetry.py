@@ -0,0 +1,442 @@
+"""
+Gemini 호출 계측(telemetry) 모듈
+
+수업 중에 할당량이 얼마나 빨리 줄어드는지, 느린 응답(꼬리 지연)이 얼마나 있는지 보려면 숫자가 필요합니다.
+GeminiService가 호출마다 기록 하나(dict)를 남기면, 이 모듈이 템플릿·모델별로 모아 둡니다.
+
+- 누적 횟수: 결과(캐시 적중, 디스크 캐시 적중, 합쳐짐, 실제 호출)별 호출 수, 오류 종류별 수, 재시도 수, 토큰 수
+- 최근 구간 히스토그램: 전체 지연, 첫 글자까지의 시간, 속도 제한 대기 시간, 입력/출력 토큰 수
+  (구간을 1분 칸으로 나눠 오래된 칸은 버리므로 "최근 10분" 같은 분포를 봄)
+- 할당량 사용량: 최근 1분 동안 실제로 보낸 요청 수와 토큰 수
+- 응답 형식 검사: 템플릿별로 응답을 기록으로 읽은 결과(바로 읽음, 형식 정리 후 읽음, 실패) 횟수
+- 버튼 요청 처리: 동작별로 새로 시작한 생성, 진행 중인 생성에 이어 붙은 중복 요청, 입력이 바뀌어 버린 결과,
+  입력이 바뀌어 중간에 멈춘 생성 횟수
+- 생성 취소: 템플릿별로 멈춘 생성 수(요청 전/받는 도중/멈추지 못하고 기다리지만 않음)와 그 덕분에 아낀 생성 시간(추정)
+
+운영자 화면은 snapshot()을, 수집기(Prometheus textfile 등)는 render_text()의 텍스트 형식을 씁니다.
+MetricsFileWriter는 그 텍스트를 일정한 간격으로 파일에 써 둡니다.
+"""
+
+import os
+import threading
+import time
+from collections import Counter, deque
+
+# 히스토그램 칸 경계
+SECONDS_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2, 4, 8, 15, 30, 60, 120)
+TOKEN_BUCKETS = (50, 100, 200, 400, 800, 1600, 3200, 6400)
+
+# 호출 결과 (GeminiService.generate()가 남기는 outcome 값)
+# - rejected: 회로 차단기나 속도 제한 대기열이 막아 요청을 보내지 못함, cancelled: 보내기 전에 멈춤
+#   (둘 다 할당량을 쓰지 않으므로 upstream과 따로 셈)
+OUTCOMES = ("cache_hit", "disk_hit", "coalesced", "upstream", "rejected", "cancelled")
+# 응답 형식 검사 결과 (record_parse()의 outcome 값)
+PARSE_OUTCOMES = ("ok", "repaired", "failed")
+# 버튼 요청 처리 결과 (record_submission()의 outcome 값)
+SUBMISSION_OUTCOMES = ("started", "attached", "stale", "cancelled")
+# 생성을 멈춘 단계 (record_cancel()의 stage 값)
+CANCEL_STAGES = ("queued", "streaming", "abandoned")
+METRIC_PREFIX = "toronbugi_gemini"
+
+
+class RollingHistogram:
+    """
+    최근 window_seconds 동안의 값만 담는 히스토그램 (slot_seconds 단위 칸으로 나눠 오래된 칸을 버림)
+
+    매개변수:
+    - bounds (tuple): 칸 경계 (오름차순, 마지막 칸 뒤에는 무한대 칸이 하나 더 있음)
+    - window_seconds (float): 보관 기간(초)
+    - slot_seconds (float): 칸 하나가 맡는 기간(초)
+    """
+
+    def __init__(self, bounds, window_seconds=600, slot_seconds=60):
+        self.bounds = tuple(bounds)
+        self.slot_seconds = slot_seconds
+        self.slots = max(1, int(window_seconds // slot_seconds))
+        self._slots = deque()  # [칸 번호, 칸별 개수, 합계, 개수]
+
+    def observe(self, value, now=None):
+        slot = int((time.monotonic() if now is None else now) // self.slot_seconds)
+        if not self._slots or self._slots[-1][0] != slot:
+            self._slots.append([slot, [0] * (len(self.bounds) + 1), 0.0, 0])
+        current = self._slots[-1]
+        index = next((i for i, bound in enumerate(self.bounds) if value <= bound), len(self.bounds))
+        current[1][index] += 1
+        current[2] += value
+        current[3] += 1
+        self._expire(slot)
+
+    def _expire(self, slot):
+        while self._slots and self._slots[0][0] <= slot - self.slots:
+            self._slots.popleft()
+
+    def merged(self, now=None):
+        """
+        보관 기간 안의 칸을 합친 결과를 반환하는 함수
+
+        반환값:
+        - tuple: (칸별 개수 list, 합계, 개수)
+        """
+        self._expire(int((time.monotonic() if now is None else now) // self.slot_seconds))
+        counts = [0] * (len(self.bounds) + 1)
+        total = 0.0
+        count = 0
+        for _slot, slot_counts, slot_sum, slot_count in self._slots:
+            counts = [a + b for a, b in zip(counts, slot_counts)]
+            total += slot_sum
+            count += slot_count
+        return counts, total, count
+
+    def quantile(self, q, now=None):
+        """
+        칸 안에서 고르게 퍼져 있다고 보고 분위수를 추정하는 함수 (값이 없으면 None)
+
+        매개변수:
+        - q (float): 0~1 (예: 0.95)
+        """
+        counts, _total, count = self.merged(now)
+        if not count:
+            return None
+        rank = q * count
+        seen = 0
+        for index, bucket_count in enumerate(counts):
+            if bucket_count and seen + bucket_count >= rank:
+                lower = self.bounds[index - 1] if index > 0 else 0.0
+                if index == len(self.bounds):
+                    # 마지막 경계를 넘는 값은 마지막 경계로 보고함
+                    return self.bounds[-1]
+                return lower + (self.bounds[index] - lower) * (rank - seen) / bucket_count
+            seen += bucket_count
+        return self.bounds[-1]
+
+
+class _Series:
+    """템플릿·모델 한 쌍의 누적 횟수와 히스토그램"""
+
+    def __init__(self, window_seconds, slot_seconds):
+        self.outcomes = Counter()
+        self.errors = Counter()
+        self.retries = 0
+        self.prompt_chars = 0
+        self.prompt_tokens = 0
+        self.output_tokens = 0
+        self.histograms = {
+            "latency_seconds": RollingHistogram(SECONDS_BUCKETS, window_seconds, slot_seconds),
+            "first_token_seconds": RollingHistogram(SECONDS_BUCKETS, window_seconds, slot_seconds),
+            "queue_wait_seconds": RollingHistogram(SECONDS_BUCKETS, window_seconds, slot_seconds),
+            "prompt_tokens": RollingHistogram(TOKEN_BUCKETS, window_seconds, slot_seconds),
+            "output_tokens": RollingHistogram(TOKEN_BUCKETS, window_seconds, slot_seconds),
+        }
+
+
+class Telemetry:
+    """
+    Gemini 호출 기록을 모아 두는 클래스 (프로세스당 하나, 여러 스레드에서 함께 씀)
+
+    매개변수:
+    - window_seconds (float): 히스토그램이 보여 줄 최근 기간(초)
+    - slot_seconds (float): 히스토그램 칸 하나의 기간(초)
+    - limits (dict): 할당량 대비 사용량을 보여 줄 한도 (예: {"rpm": 15, "tpm": 1000000})
+    """
+
+    def __init__(self, window_seconds=600, slot_seconds=60, limits=None):
+        self.window_seconds = window_seconds
+        self.slot_seconds = slot_seconds
+        self.limits = dict(limits or {})
+        self._lock = threading.Lock()
+        self._series = {}  # (template, model) → _Series
+        self._upstream = deque()  # 최근 1분 동안 실제 요청의 (시각, 요청 수(재시도 포함), 토큰 수)
+        self._parses = Counter()  # (template, 형식 검사 결과) → 횟수
+        self._submissions = Counter()  # (action, 요청 처리 결과) → 횟수
+        self._cancels = Counter()  # (template, 멈춘 단계) → 횟수
+        self._cancel_saved = Counter()  # template → 아낀 생성 시간(초, 추정)
+
+    def record(self, call):
+        """
+        호출 기록 하나를 반영하는 함수
+
+        매개변수:
+        - call (dict): template, model, prompt_chars, prompt_tokens, output_tokens, queue_wait,
+          first_token, latency, outcome, retries, error(오류 클래스 이름 또는 None)
+        """
+        now = time.monotonic()
+        key = (call.get("template") or "unknown", call.get("model") or "unknown")
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = _Series(self.window_seconds, self.slot_seconds)
+            series.outcomes[call["outcome"]] += 1
+            if call.get("error"):
+                series.errors[call["error"]] += 1
+            series.retries += call.get("retries", 0)
+            series.histograms["latency_seconds"].observe(call["latency"], now)
+            if call.get("first_token") is not None:
+                series.histograms["first_token_seconds"].observe(call["first_token"], now)
+            if call["outcome"] == "upstream":
+                # 할당량을 쓰는 것은 실제로 보낸 요청뿐 (재시도도 요청 하나씩 씀)
+                attempts = 1 + call.get("retries", 0)
+                tokens = call.get("prompt_tokens", 0) * attempts + call.get("output_tokens", 0)
+                series.prompt_chars += call.get("prompt_chars", 0)
+                series.prompt_tokens += call.get("prompt_tokens", 0)
+                series.output_tokens += call.get("output_tokens", 0)
+                series.histograms["queue_wait_seconds"].observe(call.get("queue_wait", 0.0), now)
+                series.histograms["prompt_tokens"].observe(call.get("prompt_tokens", 0), now)
+                if not call.get("error"):
+                    series.histograms["output_tokens"].observe(call.get("output_tokens", 0), now)
+                self._upstream.append((now, attempts, tokens))
+            while self._upstream and self._upstream[0][0] < now - 60:
+                self._upstream.popleft()
+
+    def record_parse(self, template, outcome):
+        """
+        응답 형식 검사 결과 하나를 반영하는 함수
+
+        매개변수:
+        - template (str): 템플릿 이름
+        - outcome (str): "ok"(바로 읽음), "repaired"(형식 정리 후 읽음), "failed"(읽지 못함)
+        """
+        with self._lock:
+            self._parses[(template, outcome)] += 1
+
+    def parse_stats(self):
+        """
+        템플릿별 응답 형식 검사 결과를 반환하는 함수
+
+        반환값:
+        - dict: 템플릿 이름 → {ok, repaired, failed, failure_rate(처음 읽기에 실패한 비율)}
+        """
+        with self._lock:
+            parses = Counter(self._parses)
+        stats = {}
+        for template in sorted({template for template, _outcome in parses}):
+            row = {outcome: parses[(template, outcome)] for outcome in PARSE_OUTCOMES}
+            total = sum(row.values())
+            row["failure_rate"] = (row["repaired"] + row["failed"]) / total if total else 0.0
+            stats[template] = row
+        return stats
+
+    def record_submission(self, action, outcome):
+        """
+        버튼 요청 처리 결과 하나를 반영하는 함수 (inflight.InflightGuard가 호출)
+
+        매개변수:
+        - action (str): 동작 이름
+        - outcome (str): "started"(새로 시작), "attached"(진행 중인 생성에 이어 붙음), "stale"(입력이 바뀌어 버림),
+          "cancelled"(입력이 바뀌어 중간에 멈춤)
+        """
+        with self._lock:
+            self._submissions[(action, outcome)] += 1
+
+    def submission_stats(self):
+        """
+        동작별 버튼 요청 처리 결과를 반환하는 함수
+
+        반환값:
+        - dict: 동작 이름 → {started, attached, stale, cancelled}
+        """
+        with self._lock:
+            submissions = Counter(self._submissions)
+        return {
+            action: {outcome: submissions[(action, outcome)] for outcome in SUBMISSION_OUTCOMES}
+            for action in sorted({action for action, _outcome in submissions})
+        }
+
+    def record_cancel(self, template, stage, saved_seconds):
+        """
+        멈춘 생성 하나를 반영하는 함수 (GeminiService가 호출)
+
+        매개변수:
+        - template (str): 템플릿 이름
+        - stage (str): "queued"(요청을 보내기 전), "streaming"(응답을 받는 도중),
+          "abandoned"(스트리밍하지 않는 호출이라 멈추지 못하고 기다리지만 않음, 아낀 시간 없음)
+        - saved_seconds (float): 멈춘 덕분에 아낀 생성 시간(초, 추정)
+        """
+        template = template or "unknown"
+        with self._lock:
+            self._cancels[(template, stage)] += 1
+            self._cancel_saved[template] += saved_seconds
+
+    def cancel_stats(self):
+        """
+        템플릿별 생성 취소 결과를 반환하는 함수
+
+        반환값:
+        - dict: 템플릿 이름 → {queued, streaming, abandoned, saved_seconds}
+        """
+        with self._lock:
+            cancels = Counter(self._cancels)
+            saved = dict(self._cancel_saved)
+        stats = {}
+        for template in sorted({template for template, _stage in cancels}):
+            row = {stage: cancels[(template, stage)] for stage in CANCEL_STAGES}
+            row["saved_seconds"] = saved.get(template, 0.0)
+            stats[template] = row
+        return stats
+
+    def quota_burn(self):
+        """
+        최근 1분 동안 실제로 보낸 요청 수와 토큰 수를 반환하는 함수
+
+        반환값:
+        - dict: requests, tokens, rpm_limit, tpm_limit (한도가 없으면 None)
+        """
+        since = time.monotonic() - 60
+        with self._lock:
+            recent = [(attempts, tokens) for t, attempts, tokens in self._upstream if t >= since]
+        return {
+            "requests": sum(attempts for attempts, _tokens in recent),
+            "tokens": sum(tokens for _attempts, tokens in recent),
+            "rpm_limit": self.limits.get("rpm"),
+            "tpm_limit": self.limits.get("tpm"),
+        }
+
+    def snapshot(self):
+        """
+        운영자 화면에 보여 줄 템플릿·모델별 요약을 반환하는 함수
+
+        반환값:
+        - list[dict]: template, model, calls, outcomes, errors, retries, prompt_chars, prompt_tokens, output_tokens,
+          그리고 히스토그램마다 {이름}_p50 / _p95 / _p99 (최근 window_seconds초, 값이 없으면 None)
+        """
+        rows = []
+        with self._lock:
+            for (template, model), series in sorted(self._series.items()):
+                row = {
+                    "template": template,
+                    "model": model,
+                    "calls": sum(series.outcomes.values()),
+                    "outcomes": dict(series.outcomes),
+                    "errors": dict(series.errors),
+                    "retries": series.retries,
+                    "prompt_chars": series.prompt_chars,
+                    "prompt_tokens": series.prompt_tokens,
+                    "output_tokens": series.output_tokens,
+                }
+                for name, histogram in series.histograms.items():
+                    for q in (50, 95, 99):
+                        row[f"{name}_p{q}"] = histogram.quantile(q / 100)
+                rows.append(row)
+        return rows
+
+    def render_text(self):
+        """
+        수집기가 읽을 수 있는 텍스트 형식(Prometheus exposition)으로 지표를 만드는 함수
+        누적 횟수는 counter, 최근 구간 분위수와 할당량 사용량은 gauge로 냅니다.
+
+        반환값:
+        - str: 지표 텍스트
+        """
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append(f"# HELP {METRIC_PREFIX}_{name} {help_text}")
+            lines.append(f"# TYPE {METRIC_PREFIX}_{name} {kind}")
+            for labels, value in samples:
+                label_text = ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items())
+                lines.append(f"{METRIC_PREFIX}_{name}{{{label_text}}} {_number(value)}" if label_text
+                             else f"{METRIC_PREFIX}_{name} {_number(value)}")
+
+        with self._lock:
+            series_items = sorted(self._series.items())
+            calls, errors, retries, chars, tokens, quantiles, windows = [], [], [], [], [], [], []
+            for (template, model), series in series_items:
+                base = {"template": template, "model": model}
+                for outcome in OUTCOMES:
+                    calls.append(({**base, "outcome": outcome}, series.outcomes[outcome]))
+                for error, count in sorted(series.errors.items()):
+                    errors.append(({**base, "error": error}, count))
+                retries.append((base, series.retries))
+                chars.append((base, series.prompt_chars))
+                tokens.append(({**base, "kind": "prompt"}, series.prompt_tokens))
+                tokens.append(({**base, "kind": "output"}, series.output_tokens))
+                for name, histogram in series.histograms.items():
+                    _counts, _total, count = histogram.merged()
+                    windows.append(({**base, "histogram": name}, count))
+                    for q in ("0.5", "0.95", "0.99"):
+                        value = histogram.quantile(float(q))
+                        if value is not None:
+                            quantiles.append((name, {**base, "quantile": q}, value))
+        metric("calls_total", "counter", "Gemini calls by outcome", calls)
+        metric("errors_total", "counter", "Gemini call errors by exception class", errors)
+        metric("retries_total", "counter", "Retried upstream attempts", retries)
+        metric("prompt_chars_total", "counter", "Prompt characters sent upstream", chars)
+        metric("tokens_total", "counter", "Estimated tokens sent and received upstream", tokens)
+        for name in ("latency_seconds", "first_token_seconds", "queue_wait_seconds", "prompt_tokens", "output_tokens"):
+            metric(f"{name}_recent", "gauge", f"Quantiles of {name} over the last {self.window_seconds:g}s",
+                   [(labels, value) for metric_name, labels, value in quantiles if metric_name == name])
+        metric("parse_total", "counter", "Structured output parses by template and outcome",
+               [({"template": template, "outcome": outcome}, row[outcome])
+                for template, row in self.parse_stats().items() for outcome in PARSE_OUTCOMES])
+        metric("submissions_total", "counter", "Button submissions by action and outcome",
+               [({"action": action, "outcome": outcome}, row[outcome])
+                for action, row in self.submission_stats().items() for outcome in SUBMISSION_OUTCOMES])
+        cancels = self.cancel_stats()
+        metric("cancelled_total", "counter", "Generations stopped early by template and stage",
+               [({"template": template, "stage": stage}, row[stage])
+                for template, row in cancels.items() for stage in CANCEL_STAGES])
+        metric("cancel_saved_seconds_total", "counter", "Estimated upstream generation time saved by cancelling",
+               [({"template": template}, row["saved_seconds"]) for template, row in cancels.items()])
+        metric("recent_samples", "gauge", f"Samples in each histogram over the last {self.window_seconds:g}s",
+               windows)
+        burn = self.quota_burn()
+        metric("requests_last_minute", "gauge", "Upstream requests in the last 60s", [({}, burn["requests"])])
+        metric("tokens_last_minute", "gauge", "Estimated upstream tokens in the last 60s", [({}, burn["tokens"])])
+        if burn["rpm_limit"] is not None:
+            metric("rpm_limit", "gauge", "Configured requests-per-minute limit", [({}, burn["rpm_limit"])])
+        if burn["tpm_limit"] is not None:
+            metric("tpm_limit", "gauge", "Configured tokens-per-minute limit", [({}, burn["tpm_limit"])])
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _number(value):
+    return f"{value:.6g}" if isinstance(value, float) else str(value)
+
+
+class MetricsFileWriter:
+    """
+    지표 텍스트를 일정한 간격으로 파일에 써 두는 백그라운드 스레드
+    (임시 파일에 쓴 뒤 바꿔치기하므로, 읽는 쪽이 반쯤 쓴 파일을 보지 않음)
+
+    매개변수:
+    - path (str): 지표 파일 경로 (예: /var/lib/node_exporter/toronbugi.prom)
+    - render (callable): 인자 없이 호출하면 지표 텍스트를 돌려주는 함수
+    - interval (float): 쓰는 간격(초)
+    """
+
+    def __init__(self, path, render, interval=15.0):
+        self.path = path
+        self.render = render
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="metrics-writer", daemon=True)
+
+    def write_once(self):
+        """지금의 지표를 파일에 씁니다."""
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        temporary = f"{self.path}.{os.getpid()}.tmp"
+        with open(temporary, "w", encoding="utf-8") as f:
+            f.write(self.render())
+        os.replace(temporary, self.path)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.write_once()
+            except OSError:
+                # 디스크 문제로 못 써도 앱은 계속 동작 (다음 간격에 다시 시도)
+                pass
+            self._stop.wait(self.interval)
+
+    def start(self):
+        """백그라운드 스레드에서 쓰기 시작합니다."""
+        self._thread.start()
+        return self
+
+    def close(self):
+        """쓰기를 멈춥니다."""
+        self._stop.set()
@@ -0,0 +1,82 @@
+"""
+Gemini 클라이언트 준비 비용 마이크로 벤치마크
+
+예전 방식(재실행마다 genai.configure() + 호출마다 GenerativeModel 생성)과
+프로세스당 한 번 구성한 뒤 ModelPool에서 모델을 꺼내 쓰는 방식의 호출당 준비 시간을 비교합니다.
+실제 API 요청은 보내지 않으므로 네트워크 없이 실행할 수 있습니다.
+
+실행 방법 (저장소 루트에서):
+    python tools/bench_client_setup.py --iterations 200
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import google.generativeai as genai
+from google.generativeai import client as genai_client
+
+from gemini_service import ModelPool
+
+MODEL_NAME = "gemini-2.0-flash"
+DUMMY_API_KEY = "benchmark-key"
+
+
+def setup_per_call():
+    """예전 방식: 재실행마다 구성하고, 호출마다 모델과 기본 클라이언트를 새로 만듦"""
+    genai.configure(api_key=DUMMY_API_KEY)
+    genai.GenerativeModel(MODEL_NAME)
+    # generate_content() 첫 호출 시 만들어지는 클라이언트(gRPC 채널)까지 포함
+    genai_client.get_default_generative_client()
+
+
+def make_pooled_setup():
+    """새 방식: 한 번만 구성하고, 풀에서 미리 만든 모델을 꺼냄"""
+    pool = ModelPool(api_key=DUMMY_API_KEY)
+    pool.warm([MODEL_NAME])
+
+    def setup_pooled():
+        pool.get(MODEL_NAME)
+        genai_client.get_default_generative_client()
+
+    return setup_pooled
+
+
+def measure(fn, iterations):
+    """fn을 iterations번 실행하며 호출당 소요 시간(마이크로초) 목록을 반환"""
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1_000_000)
+    return samples
+
+
+def report(name, samples):
+    """측정 결과를 한 줄로 출력"""
+    samples = sorted(samples)
+    p95 = samples[int(len(samples) * 0.95) - 1]
+    print(f"{name:<28} 평균 {statistics.mean(samples):>10.1f}µs  "
+          f"중앙값 {statistics.median(samples):>10.1f}µs  p95 {p95:>10.1f}µs")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=200, help="측정 반복 횟수")
+    args = parser.parse_args()
+
+    before = measure(setup_per_call, args.iterations)
+    after = measure(make_pooled_setup(), args.iterations)
+
+    print(f"호출당 클라이언트 준비 시간 ({args.iterations}회)")
+    report("이전: 호출마다 생성", before)
+    report("이후: 프로세스 공유 풀", after)
+    print(f"개선: {statistics.mean(before) / max(statistics.mean(after), 1e-9):.0f}배")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+콜드 스타트 측정: 라이브러리 가져오기 시간과 첫 화면까지의 시간
+
+호스팅 환경에서 잠들어 있던 앱이 깨어나는 상황을 흉내 내려고, 측정마다 새 파이썬 프로세스를 띄웁니다.
+- google.generativeai 가져오기: 새 프로세스에서 `import google.generativeai`에 걸린 시간
+- 첫 화면: 새 프로세스에서 Streamlit AppTest로 app.py를 처음 실행해 화면이 다 그려질 때까지의 시간
+- 준비 완료: 첫 실행을 시작한 뒤 google.generativeai가 (백그라운드에서) 가져와질 때까지의 시간
+
+이전 버전과 비교하려면 그 버전을 다른 폴더에 꺼내(git worktree) --app으로 지정하세요.
+
+실행 방법 (저장소 루트에서):
+    python tools/bench_cold_start.py --runs 5
+    python tools/bench_cold_start.py --runs 5 --app /tmp/old/app.py
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def child_import():
+    """새 프로세스 안에서 google.generativeai 가져오기 시간(초)을 잽니다."""
+    started = time.perf_counter()
+    import google.generativeai  # noqa: F401
+    return {"import_seconds": time.perf_counter() - started}
+
+
+def child_first_paint(app_path):
+    """새 프로세스 안에서 첫 실행 시간과 준비 완료까지의 시간(초)을 잽니다."""
+    from streamlit.testing.v1 import AppTest
+
+    sys.path.insert(0, os.path.dirname(app_path))
+    at = AppTest.from_file(app_path, default_timeout=120)
+    at.secrets["GEMINI_API_KEY"] = "offline"
+    at.secrets["DISK_CACHE_PATH"] = os.path.join(tempfile.mkdtemp(), "responses.sqlite3")
+    started = time.perf_counter()
+    at.run()
+    first_paint = time.perf_counter() - started
+    if at.exception:
+        raise SystemExit(f"앱 실행 중 오류 - {at.exception}")
+    while "google.generativeai" not in sys.modules and time.perf_counter() - started < 60:
+        time.sleep(0.01)
+    return {
+        "first_paint_seconds": first_paint,
+        "ready_seconds": time.perf_counter() - started,
+    }
+
+
+def run_child(*args):
+    """이 파일을 새 파이썬 프로세스로 실행하고 결과 JSON을 돌려받습니다."""
+    output = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--child", *args],
+        check=True, capture_output=True, text=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--app", default=os.path.join(ROOT, "app.py"), help="측정할 app.py 경로")
+    parser.add_argument("--runs", type=int, default=5, help="새 프로세스를 띄워 측정할 횟수")
+    parser.add_argument("--child", nargs="+", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        result = child_import() if args.child[0] == "import" else child_first_paint(args.child[1])
+        print(json.dumps(result))
+        return
+
+    app_path = os.path.abspath(args.app)
+    imports = [run_child("import")["import_seconds"] for _ in range(args.runs)]
+    paints = [run_child("paint", app_path) for _ in range(args.runs)]
+    print(f"google.generativeai 가져오기: 중앙값 {statistics.median(imports) * 1000:.0f}ms ({args.runs}회)")
+    print(f"첫 화면: 중앙값 {statistics.median(p['first_paint_seconds'] for p in paints) * 1000:.0f}ms · "
+          f"준비 완료: 중앙값 {statistics.median(p['ready_seconds'] for p in paints) * 1000:.0f}ms")
+
+
+if __name__ == "__main__":
+    main()
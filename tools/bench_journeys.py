@@ -0,0 +1,284 @@
+"""
+학생 사용 흐름(journey) 벤치마크
+
+Streamlit AppTest로 app.py를 화면 없이 실행하면서, 학생 한 명이 거치는 흐름을 그대로 따라갑니다.
+    첫 화면 → 주제 추천 → (추천 주제 하나 바꾸기) → 추천 주제 고르기(또는 직접 입력) → 논거 아이디어 → 피드백 → 마무리 정리(다운로드 버튼 확인)
+Gemini는 지연을 설정할 수 있는 앱의 가짜 제공자(GEMINI_PROVIDER = "fake", fake_provider.FakeModelPool)로 바꿉니다.
+
+단계마다 다음을 기록합니다.
+- seconds: 스크립트 실행 시간 (버튼 클릭부터 화면이 다 그려질 때까지)
+- upstream_calls: 가짜 제공자 호출 횟수 (백그라운드 미리 생성 포함)
+- prompt_tokens: 가짜 제공자에 보낸 프롬프트의 추정 토큰 수
+- cache_hits / library_hits: 응답 캐시 적중, 주제 라이브러리 적중 횟수
+- elements: 화면에 그려진 요소 수
+
+결과를 JSON 기준선(baseline)으로 저장하고, 나중 실행을 기준선과 비교할 수 있습니다.
+횟수가 달라지거나 실행 시간이 기준선보다 --tolerance 이상 느려지면 종료 코드 1로 끝납니다.
+
+실행 방법 (저장소 루트에서):
+    python tools/bench_journeys.py --save tools/baselines/journeys.json
+    python tools/bench_journeys.py --compare tools/baselines/journeys.json
+    python tools/bench_journeys.py --latency 0.5 --chunk-delay 0.02 --repeat 3
+
+프롬프트 변형 A/B 비교 (--prefill-ms-per-1k로 프롬프트가 길수록 첫 글자가 늦어지는 것을 흉내 냄):
+    python tools/bench_journeys.py --prompt-variant full --prefill-ms-per-1k 150 --save /tmp/full.json
+    python tools/bench_journeys.py --prompt-variant compact --prefill-ms-per-1k 150 --compare /tmp/full.json
+
+논거 아이디어 생성 방식 비교 (한 번에 vs 찬성·반대 동시 생성, "직접 입력 주제 / 논거 아이디어" 단계의 시간을 봄):
+    python tools/bench_journeys.py --latency 0.3 --chunk-delay 0.05 --argument-mode single --save /tmp/single.json
+    python tools/bench_journeys.py --latency 0.3 --chunk-delay 0.05 --argument-mode split --compare /tmp/single.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+
+TOOLS = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(TOOLS)
+sys.path.insert(0, ROOT)
+sys.path.insert(0, TOOLS)
+
+import streamlit as st
+from streamlit.testing.v1.element_tree import Block
+
+from offline_app import fake_call_counts, make_app_test, track_fake_pools, track_instances
+from prefetch import Prefetcher
+from response_cache import ResponseCache
+from topic_library import TopicLibrary
+
+# 학생 흐름 시나리오: 처음 보는 관심사, 같은 관심사(캐시 적중), 라이브러리에 있는 관심사
+JOURNEYS = [
+    # 세 번째 추천 주제를 '다른 주제로 바꾸기'로 한 번 바꿈 (세 주제를 다시 받는 것과 호출·토큰 비교)
+    {"name": "새 관심사", "interest": "우주", "topic_index": 0, "replace_index": 2},
+    {"name": "같은 관심사", "interest": "우주", "topic_index": 0},
+    {"name": "라이브러리 관심사", "interest": "게임", "topic_index": 1},
+    # 추천 주제 대신 직접 입력한 주제: 미리 생성되지 않으므로 논거 아이디어 단계가 실제 생성 시간을 잼
+    {"name": "직접 입력 주제", "interest": "우주", "topic": "우주 엘리베이터를 만들어야 한다"},
+]
+OPINION = "저는 찬성합니다. 새로운 것을 배울 수 있고 친구들과 함께 탐구할 수 있기 때문이에요."
+WRAPUP = {
+    "topic_input": "학교에서 스마트폰 사용 허용",
+    "pro_opinion": "수업 정보를 빠르게 찾을 수 있어요.",
+    "pro_good_points": "정보 접근성",
+    "con_opinion": "수업 집중을 방해해요.",
+    "con_good_points": "집중력 유지",
+    "new_solution": "필요할 때만 선생님 허락을 받고 사용해요.",
+    "reflection": "다른 의견도 중요하다는 것을 배웠어요.",
+}
+COUNT_FIELDS = ("upstream_calls", "prompt_tokens", "cache_hits", "library_hits", "elements")
+
+
+POOLS = track_fake_pools()
+CACHES = track_instances(ResponseCache)
+LIBRARIES = track_instances(TopicLibrary)
+PREFETCHERS = track_instances(Prefetcher)
+
+
+def count_elements(node):
+    """화면 요소 트리에서 블록(컨테이너)이 아닌 요소의 수를 셉니다."""
+    if not isinstance(node, Block):
+        return 1
+    return sum(count_elements(child) for child in node.children.values())
+
+
+def wait_for_background(timeout=30.0):
+    """백그라운드 미리 생성 작업이 모두 끝날 때까지 기다립니다 (호출 횟수를 결정적으로 만들기 위함)."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if all(p.stats()["pending"] == 0 for p in PREFETCHERS):
+            return
+        time.sleep(0.01)
+
+
+def counters():
+    """지금까지의 누적 횟수를 모읍니다."""
+    calls, prompt_tokens = fake_call_counts(POOLS)
+    return {
+        "upstream_calls": calls,
+        "prompt_tokens": prompt_tokens,
+        "cache_hits": sum(c.stats()["hits"] for c in CACHES),
+        "library_hits": sum(lib.stats()["hits"] for lib in LIBRARIES),
+    }
+
+
+def run_journey(journey, args):
+    """
+    학생 흐름 하나를 새 세션으로 실행하고 단계별 결과를 반환하는 함수
+
+    반환값:
+    - dict: 단계 이름 → {seconds, upstream_calls, prompt_tokens, cache_hits, library_hits, elements}
+    """
+    navigation_mode = args.navigation
+    at = make_app_test(timeout=120, latency=args.latency, chunk_delay=args.chunk_delay,
+                       prefill_ms_per_1k=args.prefill_ms_per_1k, NAVIGATION_MODE=navigation_mode,
+                       GEMINI_RPM_LIMIT=args.rpm, PROMPT_VARIANT=args.prompt_variant, ARGUMENT_MODE=args.argument_mode)
+
+    def show(label):
+        # 섹션 모드에서는 해당 섹션을 먼저 고름 (탭 모드에서는 모든 탭이 이미 그려져 있음)
+        if navigation_mode == "sections":
+            at.radio(key="nav_section").set_value(label)
+
+    def recommend():
+        show("🔍 토론 주제 추천")
+        at.text_input(key="topic_interest_input").input(journey["interest"])
+        at.button(key="topic_recommend_button").click()
+
+    def replace_topic():
+        at.button(key=f"replace_topic_{journey['replace_index']}").click()
+
+    def pick_topic():
+        show("💡 찬반 논거 아이디어")
+        if "topic" in journey:
+            at.text_input(key="argument_topic_input").input(journey["topic"])
+        else:
+            at.button(key=f"use_topic_{journey['topic_index']}").click()
+
+    def ideas():
+        at.button(key="argument_idea_button").click()
+
+    def feedback():
+        show("📝 의견 피드백 받기")
+        at.text_area(key="feedback_argument_input").input(OPINION)
+        at.button(key="feedback_button").click()
+
+    def wrapup():
+        show("🤝 토론 마무리하기")
+        at.text_input(key="topic_input").input(WRAPUP["topic_input"])
+        for key, value in WRAPUP.items():
+            if key != "topic_input":
+                at.text_area(key=key).input(value)
+        at.button(key="summary_button").click()
+
+    steps = [("첫 화면", None), ("주제 추천", recommend)]
+    if "replace_index" in journey:
+        steps.append(("주제 바꾸기", replace_topic))
+    steps += [("주제 고르기", pick_topic), ("논거 아이디어", ideas), ("피드백", feedback), ("마무리 정리", wrapup)]
+    results = {}
+    for name, prepare in steps:
+        before = counters()
+        if prepare is not None:
+            prepare()
+        started = time.perf_counter()
+        at.run()
+        seconds = time.perf_counter() - started
+        if at.exception:
+            raise SystemExit(f"{journey['name']} / {name}: 앱 실행 중 오류 - {at.exception[0].value}")
+        wait_for_background()
+        after = counters()
+        results[name] = {"seconds": seconds, "elements": count_elements(at._tree.root)}
+        results[name].update({field: after[field] - before[field] for field in after})
+    if not at.get("download_button"):
+        raise SystemExit(f"{journey['name']}: 마무리 정리 후 다운로드 버튼이 보이지 않습니다.")
+    return results
+
+
+def run_benchmark(args):
+    """모든 흐름을 --repeat번 실행하고, 시간은 중앙값, 횟수는 첫 실행 값을 모읍니다."""
+    runs = []
+    for _ in range(args.repeat):
+        # 매번 빈 캐시·새 속도 제한기·새 가짜 제공자에서 시작하도록 공유 리소스를 비움
+        st.cache_resource.clear()
+        runs.append({j["name"]: run_journey(j, args) for j in JOURNEYS})
+    journeys = {}
+    for journey in JOURNEYS:
+        name = journey["name"]
+        journeys[name] = {}
+        for step, first in runs[0][name].items():
+            result = {field: first[field] for field in COUNT_FIELDS}
+            result["seconds"] = statistics.median(run[name][step]["seconds"] for run in runs)
+            journeys[name][step] = result
+    return {
+        "meta": {
+            "latency": args.latency,
+            "chunk_delay": args.chunk_delay,
+            "prefill_ms_per_1k": args.prefill_ms_per_1k,
+            "prompt_variant": args.prompt_variant,
+            "argument_mode": args.argument_mode,
+            "navigation": args.navigation,
+            "rpm": args.rpm,
+            "repeat": args.repeat,
+            "python": platform.python_version(),
+            "streamlit": st.__version__,
+        },
+        "journeys": journeys,
+    }
+
+
+def print_results(results):
+    for journey, steps in results["journeys"].items():
+        print(f"[{journey}]")
+        for step, r in steps.items():
+            print(f"  {step:<8} {r['seconds'] * 1000:8.1f}ms  호출 {r['upstream_calls']:2d}  "
+                  f"토큰 {r['prompt_tokens']:5d}  "
+                  f"캐시 적중 {r['cache_hits']:2d}  라이브러리 {r['library_hits']:2d}  요소 {r['elements']:4d}")
+
+
+def compare(results, baseline, tolerance, min_delta):
+    """
+    기준선과 비교해 달라진 점을 출력하는 함수
+
+    반환값:
+    - int: 문제로 본 차이의 수 (횟수가 달라졌거나 시간이 tolerance 이상 느려짐)
+    """
+    for key in ("latency", "chunk_delay", "prefill_ms_per_1k", "prompt_variant", "argument_mode", "rpm", "navigation"):
+        if baseline["meta"].get(key) != results["meta"][key]:
+            print(f"주의: 기준선과 {key} 설정이 다릅니다 ({baseline['meta'].get(key)} → {results['meta'][key]}).")
+    problems = 0
+    for journey, steps in results["journeys"].items():
+        for step, r in steps.items():
+            base = baseline["journeys"].get(journey, {}).get(step)
+            if base is None:
+                print(f"  {journey} / {step}: 기준선에 없음")
+                continue
+            for field in COUNT_FIELDS:
+                if r[field] != base.get(field):
+                    problems += 1
+                    print(f"  {journey} / {step}: {field} {base.get(field)} → {r[field]}")
+            delta = r["seconds"] - base["seconds"]
+            ratio = r["seconds"] / base["seconds"] if base["seconds"] else float("inf")
+            if ratio > 1 + tolerance and delta > min_delta:
+                problems += 1
+                print(f"  {journey} / {step}: 느려짐 {base['seconds'] * 1000:.1f}ms → "
+                      f"{r['seconds'] * 1000:.1f}ms ({ratio - 1:+.0%})")
+    print("기준선과 같습니다." if problems == 0 else f"기준선과 다른 점 {problems}개")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latency", type=float, default=0.0, help="가짜 제공자의 첫 조각 지연(초)")
+    parser.add_argument("--chunk-delay", type=float, default=0.0, help="가짜 제공자의 조각 사이 지연(초)")
+    parser.add_argument("--rpm", type=int, default=1000,
+                        help="GEMINI_RPM_LIMIT (기본값은 속도 제한 대기가 결과를 가리지 않도록 크게 잡음)")
+    parser.add_argument("--navigation", choices=("tabs", "sections"), default="tabs", help="NAVIGATION_MODE")
+    parser.add_argument("--prompt-variant", choices=("full", "compact"), default="full", help="PROMPT_VARIANT")
+    parser.add_argument("--argument-mode", choices=("single", "split"), default="single", help="ARGUMENT_MODE")
+    parser.add_argument("--prefill-ms-per-1k", type=float, default=0.0,
+                        help="프롬프트 1000토큰마다 첫 조각 전에 더 기다릴 시간(ms)")
+    parser.add_argument("--repeat", type=int, default=3, help="전체 흐름 반복 횟수 (시간은 중앙값)")
+    parser.add_argument("--save", help="결과를 저장할 JSON 기준선 경로")
+    parser.add_argument("--compare", help="비교할 JSON 기준선 경로")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="느려짐으로 볼 비율 (0.25 = 25%%)")
+    parser.add_argument("--min-delta", type=float, default=0.02, help="느려짐으로 볼 최소 차이(초)")
+    args = parser.parse_args()
+
+    results = run_benchmark(args)
+    print_results(results)
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save)), exist_ok=True)
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"기준선 저장: {args.save}")
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if compare(results, baseline, args.tolerance, args.min_delta):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
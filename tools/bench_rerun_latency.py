@@ -0,0 +1,64 @@
+"""
+화면 구성 방식별 다시 실행(rerun) 시간 비교
+
+4번 탭(의견 피드백)의 의견 입력칸에 글을 고쳐 쓸 때마다 스크립트가 다시 실행됩니다.
+탭 모드(NAVIGATION_MODE="tabs")는 다섯 탭의 코드를 모두 실행하고,
+섹션 모드(NAVIGATION_MODE="sections")는 고른 섹션의 코드만 실행합니다.
+이 도구는 두 방식에서 같은 입력을 반복하며 다시 실행 1회에 걸리는 시간을 잽니다.
+(Streamlit AppTest로 실행하므로 절대값에는 테스트 도구의 비용이 포함되고, 두 방식의 차이를 보는 용도입니다.)
+
+실행 방법 (저장소 루트에서):
+    python tools/bench_rerun_latency.py --iterations 30
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from offline_app import make_app_test
+
+FEEDBACK_SECTION_LABEL = "📝 의견 피드백 받기"
+
+
+def measure(mode, iterations):
+    """
+    한 가지 화면 구성 방식에서 다시 실행 시간을 재는 함수
+
+    반환값:
+    - list: 다시 실행 1회마다 걸린 시간(ms)
+    """
+    at = make_app_test(NAVIGATION_MODE=mode)
+    at.run()
+    if mode == "sections":
+        at.radio(key="nav_section").set_value(FEEDBACK_SECTION_LABEL).run()
+    samples = []
+    for i in range(iterations):
+        at.text_area(key="feedback_argument_input").input(f"저는 찬성합니다. 이유는 {i}가지예요.")
+        started = time.perf_counter()
+        at.run()
+        samples.append((time.perf_counter() - started) * 1000)
+        if at.exception:
+            raise SystemExit(f"{mode}: 앱 실행 중 오류 - {at.exception}")
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=30, help="방식마다 다시 실행할 횟수")
+    args = parser.parse_args()
+
+    results = {}
+    for mode in ("tabs", "sections"):
+        samples = sorted(measure(mode, args.iterations))
+        results[mode] = statistics.median(samples)
+        p95 = samples[max(0, int(len(samples) * 0.95) - 1)]
+        print(f"{mode:<9} 다시 실행 중앙값 {results[mode]:6.1f}ms · p95 {p95:6.1f}ms ({len(samples)}회)")
+    print(f"섹션 모드는 탭 모드 시간의 {results['sections'] / results['tabs']:.0%}")
+
+
+if __name__ == "__main__":
+    main()
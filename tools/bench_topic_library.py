@@ -0,0 +1,71 @@
+"""
+로컬 주제 라이브러리 검색 벤치마크
+
+data/topic_library.json을 불러와 색인을 만드는 시간과,
+자주 나오는 관심사·주제 입력(적중)과 라이브러리에 없는 입력(미스)의 검색 시간을 잽니다.
+
+실행 방법 (저장소 루트에서):
+    python tools/bench_topic_library.py --iterations 2000
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from topic_library import TopicLibrary
+
+LIBRARY_PATH = os.path.join(ROOT, "data", "topic_library.json")
+
+# (검색 종류, 학생 입력) - 실제 수업에서 자주 나온 입력과 라이브러리에 없는 입력
+QUERIES = [
+    ("recommendations", "게임"),
+    ("recommendations", "온라인 게임!"),
+    ("recommendations", "핸드폰"),
+    ("recommendations", "환경 보호"),
+    ("recommendations", "우주 여행"),
+    ("arguments", "학교에서 스마트폰 사용 금지"),
+    ("arguments", "로봇 반려동물"),
+    ("arguments", "교복"),
+    ("arguments", "교복 의무화"),
+    ("arguments", "종이책 vs 디지털 기기"),
+    ("arguments", "급식 메뉴를 학생이 정하기"),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=2000, help="입력마다 검색을 반복할 횟수")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    library = TopicLibrary.load(LIBRARY_PATH)
+    build_ms = (time.perf_counter() - started) * 1000
+    stats = library.stats()
+    print(f"라이브러리 v{stats['version']}: 주제 추천 {stats['recommendations']}개, "
+          f"논거 아이디어 {stats['arguments']}개 · 불러오기+색인 {build_ms:.2f}ms")
+
+    all_samples = []
+    for kind, query in QUERIES:
+        find = library.find_recommendations if kind == "recommendations" else library.find_arguments
+        result = find(query, record=False)
+        samples = []
+        for _ in range(args.iterations):
+            t = time.perf_counter()
+            find(query, record=False)
+            samples.append((time.perf_counter() - t) * 1_000_000)
+        all_samples.extend(samples)
+        title = result.splitlines()[0] if result else "(없음 → API 호출)"
+        print(f"{query:<24} 중앙값 {statistics.median(samples):7.1f}µs  → {title}")
+
+    all_samples.sort()
+    p99 = all_samples[int(len(all_samples) * 0.99) - 1]
+    print(f"전체 검색 {len(all_samples)}회: 평균 {statistics.mean(all_samples):.1f}µs, p99 {p99:.1f}µs")
+
+
+if __name__ == "__main__":
+    main()
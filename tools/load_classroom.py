@@ -0,0 +1,512 @@
+"""
+교실 동시 접속 부하 시험
+
+실행 중인 Streamlit 서버에 학생 N명이 동시에 접속한 것처럼 웹소켓 세션을 열고,
+각 학생이 생각하는 시간(think time)을 두며 다섯 탭을 차례로 지나가게 합니다.
+    첫 화면(안내 읽기) → 주제 추천 → 추천 주제 고르기 → 논거 아이디어 → 피드백 → 마무리 정리
+실제 교실처럼 관심사는 몇 가지에 몰리도록(지프 분포) 고릅니다. 같은 관심사가 많을수록 캐시가 잘 맞습니다.
+
+보고 내용:
+- 동작별 끝에서 끝까지(버튼 클릭을 보낸 때부터 화면 갱신이 끝날 때까지) 지연의 p50/p95/p99
+- 동작별 오류율 (화면의 오류 메시지, 앱 예외, 연결 실패, 시간 초과)
+- 서버 프로세스의 CPU 사용률(평균/최대)과 메모리(RSS, 최대) - 리눅스의 /proc을 읽음
+- --sessions에 여러 규모를 주면, --slo-p95와 --max-error-rate를 지키는 최대 동시 학생 수와
+  --school-size명 학교에 필요한 프로세스(복제본) 수
+
+--start를 주면 가짜 Gemini 제공자(GEMINI_PROVIDER = "fake")로 서버를 직접 띄우므로 API 키가 필요 없습니다.
+이때 분당 요청 한도는 --rpm(기본 1000)으로 크게 잡아, 프로세스 자체가 감당하는 양을 잽니다.
+실제 한도는 API 키 단위라서 복제본을 늘려도 늘지 않으니, 한도의 영향은 --rpm 15 등으로 따로 확인하세요.
+
+실행 방법 (저장소 루트에서):
+    python tools/load_classroom.py --start --sessions 30
+    python tools/load_classroom.py --start --sessions 10,20,40 --think 5 --slo-p95 3 --school-size 600
+    python tools/load_classroom.py --url http://localhost:8501 --server-pid 12345 --sessions 25 --json load.json
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+from tornado.httpclient import AsyncHTTPClient
+from tornado.websocket import websocket_connect
+
+from streamlit.proto.Alert_pb2 import Alert
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 실제 교실에서 자주 나오는 관심사 (앞쪽일수록 많이 고름)
+INTERESTS = ["우주", "게임", "동물", "환경", "스마트폰", "급식", "로봇", "축구", "유튜브", "미술"]
+# 추천 주제 세 개 중 몇 번째를 고르는지 (첫 번째 주제를 가장 많이 고름)
+TOPIC_WEIGHTS = [0.5, 0.3, 0.2]
+OPINIONS = [
+    "저는 찬성합니다. 새로운 것을 배울 수 있고 친구들과 함께 탐구할 수 있기 때문이에요.",
+    "저는 반대합니다. 시간이 많이 들고 모든 친구에게 공평하지 않을 수 있어요.",
+    "저는 찬성해요. 우리 생활이 더 편리해지고 안전해질 수 있어서예요.",
+]
+WRAPUP = {
+    "topic_input": "학교에서 스마트폰 사용 허용",
+    "pro_opinion": "수업 정보를 빠르게 찾을 수 있어요.",
+    "pro_good_points": "정보 접근성",
+    "con_opinion": "수업 집중을 방해해요.",
+    "con_good_points": "집중력 유지",
+    "new_solution": "필요할 때만 선생님 허락을 받고 사용해요.",
+    "reflection": "다른 의견도 중요하다는 것을 배웠어요.",
+}
+# 섹션 모드(NAVIGATION_MODE = "sections")에서 고를 섹션 이름
+SECTION_LABELS = {
+    "recommend": "🔍 토론 주제 추천",
+    "arguments": "💡 찬반 논거 아이디어",
+    "feedback": "📝 의견 피드백 받기",
+    "wrapup": "🤝 토론 마무리하기",
+}
+ACTIONS = ["첫 화면", "섹션 이동", "주제 추천", "주제 고르기", "논거 아이디어", "피드백", "마무리 정리"]
+
+# 위젯 종류 → WidgetState에 값을 담는 필드
+VALUE_FIELDS = {"text_input": "string_value", "text_area": "string_value", "radio": "int_value"}
+WIDGET_ID_PREFIX = "$$WIDGET_ID-"
+# 스크립트 실행이 끝났다고 볼 상태 (FINISHED_EARLY_FOR_RERUN이면 이어서 다시 실행됨)
+FINISHED = {
+    ForwardMsg.FINISHED_SUCCESSFULLY,
+    ForwardMsg.FINISHED_WITH_COMPILE_ERROR,
+    ForwardMsg.FINISHED_FRAGMENT_RUN_SUCCESSFULLY,
+}
+
+
+class ActionFailed(Exception):
+    """학생 세션에서 동작을 이어 갈 수 없을 때 (연결 끊김, 시간 초과, 필요한 버튼 없음)"""
+
+
+class StudentSession:
+    """
+    브라우저 대신 Streamlit 웹소켓 프로토콜을 직접 주고받는 학생 세션 하나
+
+    매개변수:
+    - base_url (str): 서버 주소 (예: http://localhost:8501)
+    - timeout (float): 동작 하나를 기다릴 최대 시간(초)
+    """
+
+    def __init__(self, base_url, timeout):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.connection = None
+        self.page_script_hash = ""
+        self.widgets = {}  # 위젯 키 → (위젯 id, 종류, 조각(fragment) id, 요소 proto)
+        self.values = {}  # 위젯 키 → 보낼 값 (브라우저처럼 실행마다 모든 값을 보냄)
+
+    async def connect(self):
+        ws_url = self.base_url.replace("http", "ws", 1) + "/_stcore/stream"
+        self.connection = await asyncio.wait_for(websocket_connect(ws_url), self.timeout)
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+
+    def has(self, key):
+        return key in self.widgets
+
+    def set_value(self, key, value):
+        self.values[key] = value
+
+    def radio_index(self, key, label):
+        """라디오 위젯에서 label 선택지의 위치를 찾습니다."""
+        options = list(self.widgets[key][3].options)
+        return options.index(label)
+
+    async def run(self, trigger=None):
+        """
+        스크립트를 다시 실행하게 하고, 화면 갱신이 끝날 때까지 기다리는 함수
+
+        매개변수:
+        - trigger (str): 누른 버튼의 위젯 키 (없으면 값만 보내고 다시 실행)
+
+        반환값:
+        - int: 이번 실행에서 화면에 나온 오류(st.error, 앱 예외) 수
+        """
+        message = BackMsg()
+        client_state = message.rerun_script
+        client_state.page_script_hash = self.page_script_hash
+        for key, value in self.values.items():
+            if key in self.widgets:
+                widget_id, kind, _, _ = self.widgets[key]
+                state = client_state.widget_states.widgets.add()
+                state.id = widget_id
+                setattr(state, VALUE_FIELDS[kind], value)
+        if trigger is not None:
+            if trigger not in self.widgets:
+                raise ActionFailed(f"화면에 {trigger} 버튼이 없습니다.")
+            widget_id, _, fragment_id, _ = self.widgets[trigger]
+            state = client_state.widget_states.widgets.add()
+            state.id = widget_id
+            state.trigger_value = True
+            # 조각(fragment) 안의 버튼은 브라우저처럼 그 조각만 다시 실행
+            if fragment_id:
+                client_state.fragment_id = fragment_id
+        await self.connection.write_message(message.SerializeToString(), binary=True)
+        return await self._read_until_finished()
+
+    async def _read_until_finished(self):
+        errors = 0
+        deadline = time.monotonic() + self.timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise ActionFailed("시간 초과")
+            try:
+                payload = await asyncio.wait_for(self.connection.read_message(), remaining)
+            except asyncio.TimeoutError:
+                raise ActionFailed("시간 초과")
+            if payload is None:
+                raise ActionFailed("연결이 끊겼습니다.")
+            msg = ForwardMsg()
+            msg.ParseFromString(payload)
+            if msg.WhichOneof("type") == "ref_hash":
+                # 큰 메시지는 서버 캐시의 해시만 오므로 HTTP로 받아 옴
+                msg = await self._fetch_cached(msg.ref_hash)
+            kind = msg.WhichOneof("type")
+            if kind == "new_session":
+                self.page_script_hash = msg.new_session.main_script_hash
+            elif kind == "delta":
+                errors += self._apply_delta(msg.delta)
+            elif kind == "script_finished" and msg.script_finished in FINISHED:
+                return errors
+
+    async def _fetch_cached(self, ref_hash):
+        response = await AsyncHTTPClient().fetch(f"{self.base_url}/_stcore/message?hash={ref_hash}")
+        msg = ForwardMsg()
+        msg.ParseFromString(response.body)
+        return msg
+
+    def _apply_delta(self, delta):
+        """위젯 id를 기억하고, 오류 요소면 1을 반환합니다."""
+        if delta.WhichOneof("type") != "new_element":
+            return 0
+        element = delta.new_element
+        kind = element.WhichOneof("type")
+        if kind == "exception":
+            return 1
+        if kind == "alert":
+            return int(element.alert.format == Alert.ERROR)
+        proto = getattr(element, kind)
+        widget_id = getattr(proto, "id", "")
+        if widget_id.startswith(WIDGET_ID_PREFIX):
+            # 위젯 id는 "$$WIDGET_ID-<해시>-<키>" 모양
+            key = widget_id.split("-", 2)[2]
+            self.widgets[key] = (widget_id, kind, delta.fragment_id, proto)
+        return 0
+
+
+class Recorder:
+    """동작별 지연과 오류를 모으는 기록기"""
+
+    def __init__(self):
+        self.seconds = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.failures = defaultdict(int)
+
+    async def timed(self, action, coroutine):
+        """동작 하나를 실행하며 걸린 시간과 오류를 기록합니다."""
+        started = time.perf_counter()
+        try:
+            errors = await coroutine
+        except ActionFailed:
+            self.failures[action] += 1
+            raise
+        finally:
+            self.seconds[action].append(time.perf_counter() - started)
+        if errors:
+            self.errors[action] += 1
+
+    def summary(self):
+        """동작별 {count, p50, p95, p99, error_rate}"""
+        result = {}
+        for action in ACTIONS:
+            samples = self.seconds.get(action)
+            if not samples:
+                continue
+            failed = self.errors[action] + self.failures[action]
+            result[action] = {
+                "count": len(samples),
+                "p50": percentile(samples, 50),
+                "p95": percentile(samples, 95),
+                "p99": percentile(samples, 99),
+                "error_rate": failed / len(samples),
+            }
+        return result
+
+
+def percentile(samples, p):
+    """가장 가까운 순위(nearest-rank) 방식의 백분위수"""
+    ordered = sorted(samples)
+    rank = max(1, math.ceil(p / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+async def student_journey(number, args, recorder, rng):
+    """
+    학생 한 명의 흐름: 생각하는 시간을 두며 다섯 탭을 차례로 지나감
+
+    매개변수:
+    - number (int): 학생 번호 (접속 시작 시각을 고르게 퍼뜨리는 데 씀)
+    - rng (random.Random): 이 학생의 선택(관심사, 주제, 생각하는 시간)에 쓰는 난수 생성기
+    """
+    await asyncio.sleep(args.ramp * number / max(1, args.current_sessions))
+    weights = [1 / (rank + 1) ** args.zipf for rank in range(len(INTERESTS))]
+    interest = rng.choices(INTERESTS, weights)[0]
+    topic_index = rng.choices(range(len(TOPIC_WEIGHTS)), TOPIC_WEIGHTS)[0]
+
+    async def think(scale=1.0):
+        if args.think:
+            await asyncio.sleep(rng.lognormvariate(0, 0.5) * args.think * scale)
+
+    session = StudentSession(args.url, args.timeout)
+    try:
+        await session.connect()
+        await recorder.timed("첫 화면", session.run())
+
+        async def show(section):
+            # 섹션 모드에서는 해당 섹션을 먼저 고름 (탭 모드에서는 모든 탭이 이미 그려져 있음)
+            if session.has("nav_section"):
+                session.set_value("nav_section", session.radio_index("nav_section", SECTION_LABELS[section]))
+                await recorder.timed("섹션 이동", session.run())
+
+        await think(0.5)  # 안내 탭 읽기
+        await show("recommend")
+        session.set_value("topic_interest_input", interest)
+        await recorder.timed("주제 추천", session.run("topic_recommend_button"))
+
+        await think()
+        await show("arguments")
+        await recorder.timed("주제 고르기", session.run(f"use_topic_{topic_index}"))
+        await recorder.timed("논거 아이디어", session.run("argument_idea_button"))
+
+        await think(2.0)  # 논거를 읽고 의견 쓰기
+        await show("feedback")
+        session.set_value("feedback_argument_input", rng.choice(OPINIONS))
+        await recorder.timed("피드백", session.run("feedback_button"))
+
+        await think(2.0)
+        await show("wrapup")
+        for key, value in WRAPUP.items():
+            session.set_value(key, value)
+        await recorder.timed("마무리 정리", session.run("summary_button"))
+    except (ActionFailed, OSError):
+        # 이 학생의 남은 흐름은 건너뜀 (실패는 Recorder에 기록됨)
+        pass
+    finally:
+        session.close()
+
+
+class ProcessSampler:
+    """
+    서버 프로세스의 CPU 사용률과 메모리(RSS)를 /proc에서 주기적으로 읽는 도구 (리눅스 전용)
+
+    매개변수:
+    - pid (int): 서버 프로세스 번호 (없으면 아무것도 재지 않음)
+    - interval (float): 읽는 간격(초)
+    """
+
+    def __init__(self, pid, interval=0.5):
+        self.pid = pid
+        self.interval = interval
+        self.cpu_percent = []
+        self.rss_bytes = []
+        self._ticks = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+
+    def _read(self):
+        with open(f"/proc/{self.pid}/stat") as f:
+            # 두 번째 필드(프로세스 이름)에 공백이 있을 수 있으므로 ')' 뒤부터 나눔
+            fields = f.read().rsplit(")", 1)[1].split()
+        cpu_ticks = int(fields[11]) + int(fields[12])  # utime + stime
+        with open(f"/proc/{self.pid}/status") as f:
+            rss_kb = next(int(line.split()[1]) for line in f if line.startswith("VmRSS:"))
+        return cpu_ticks, rss_kb * 1024
+
+    async def run(self, stop):
+        if not self.pid or not os.path.exists(f"/proc/{self.pid}"):
+            return
+        last_ticks, _ = self._read()
+        last_time = time.monotonic()
+        while not stop.is_set():
+            try:
+                await asyncio.wait_for(stop.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+            ticks, rss = self._read()
+            now = time.monotonic()
+            self.cpu_percent.append((ticks - last_ticks) / self._ticks / (now - last_time) * 100)
+            self.rss_bytes.append(rss)
+            last_ticks, last_time = ticks, now
+
+    def summary(self):
+        if not self.cpu_percent:
+            return None
+        return {
+            "cpu_percent_mean": sum(self.cpu_percent) / len(self.cpu_percent),
+            "cpu_percent_max": max(self.cpu_percent),
+            "rss_mb_max": max(self.rss_bytes) / 1024 / 1024,
+        }
+
+
+async def run_level(sessions, args):
+    """동시 학생 수 한 단계를 실행하고 결과를 반환합니다."""
+    args.current_sessions = sessions
+    recorder = Recorder()
+    sampler = ProcessSampler(args.server_pid)
+    stop = asyncio.Event()
+    sampling = asyncio.ensure_future(sampler.run(stop))
+    started = time.perf_counter()
+    await asyncio.gather(*(
+        student_journey(number, args, recorder, random.Random(f"{args.seed}-{sessions}-{number}"))
+        for number in range(sessions)
+    ))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await sampling
+    actions = recorder.summary()
+    total = sum(a["count"] for a in actions.values())
+    failed = sum(a["error_rate"] * a["count"] for a in actions.values())
+    return {
+        "sessions": sessions,
+        "seconds": elapsed,
+        "actions": actions,
+        "error_rate": failed / total if total else 1.0,
+        "p95_max": max((a["p95"] for a in actions.values()), default=0.0),
+        "server": sampler.summary(),
+    }
+
+
+def print_level(level):
+    print(f"[동시 학생 {level['sessions']}명] 전체 {level['seconds']:.1f}초 · 오류율 {level['error_rate']:.1%}")
+    for action, a in level["actions"].items():
+        print(f"  {action:<8} {a['count']:4d}회  p50 {a['p50'] * 1000:7.0f}ms  p95 {a['p95'] * 1000:7.0f}ms  "
+              f"p99 {a['p99'] * 1000:7.0f}ms  오류 {a['error_rate']:.1%}")
+    server = level["server"]
+    if server:
+        print(f"  서버 CPU 평균 {server['cpu_percent_mean']:.0f}% · 최대 {server['cpu_percent_max']:.0f}% · "
+              f"RSS 최대 {server['rss_mb_max']:.0f}MB")
+
+
+def sizing(levels, args):
+    """
+    목표(SLO)를 지킨 가장 큰 동시 학생 수로 학교에 필요한 프로세스 수를 계산하는 함수
+
+    반환값:
+    - dict 또는 None: {students_per_process, school_size, replicas}
+    """
+    passed = [lv["sessions"] for lv in levels
+              if lv["p95_max"] <= args.slo_p95 and lv["error_rate"] <= args.max_error_rate]
+    if not passed:
+        return None
+    per_process = max(passed)
+    result = {"students_per_process": per_process}
+    if args.school_size:
+        result["school_size"] = args.school_size
+        result["replicas"] = math.ceil(args.school_size / per_process)
+    return result
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(args):
+    """가짜 제공자로 app.py 서버를 띄우고, 응답할 때까지 기다린 뒤 프로세스를 반환합니다."""
+    port = free_port()
+    workdir = tempfile.mkdtemp()
+    env = dict(
+        os.environ,
+        GEMINI_PROVIDER="fake",
+        FAKE_LATENCY=args.fake_latency,
+        FAKE_CHUNK_DELAY=str(args.fake_chunk_delay),
+        GEMINI_RPM_LIMIT=str(args.rpm),
+        NAVIGATION_MODE=args.navigation,
+        DISK_CACHE_PATH=os.path.join(workdir, "responses.sqlite3"),
+    )
+    # 작업 폴더를 임시 폴더로 두어 저장소의 .streamlit/secrets.toml(실제 API 키)을 읽지 않게 함
+    process = subprocess.Popen(
+        [sys.executable, "-m", "streamlit", "run", os.path.join(ROOT, "app.py"),
+         "--server.headless", "true", "--server.port", str(port),
+         "--browser.gatherUsageStats", "false", "--server.fileWatcherType", "none"],
+        cwd=workdir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    args.url = f"http://127.0.0.1:{port}"
+    args.server_pid = process.pid
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=1):
+                return process
+        except OSError:
+            time.sleep(0.2)
+    process.kill()
+    raise SystemExit("서버가 60초 안에 뜨지 않았습니다.")
+
+
+async def main_async(args):
+    levels = []
+    for sessions in args.sessions:
+        level = await run_level(sessions, args)
+        print_level(level)
+        levels.append(level)
+    return levels
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8501", help="부하를 줄 서버 주소")
+    parser.add_argument("--server-pid", type=int, help="CPU·메모리를 잴 서버 프로세스 번호")
+    parser.add_argument("--start", action="store_true", help="가짜 제공자로 서버를 직접 띄워서 시험")
+    parser.add_argument("--sessions", default="20",
+                        type=lambda text: [int(n) for n in text.split(",")],
+                        help="동시 학생 수 (쉼표로 여러 단계, 예: 10,20,40)")
+    parser.add_argument("--think", type=float, default=10.0, help="생각하는 시간의 중앙값(초, 0이면 쉬지 않음)")
+    parser.add_argument("--ramp", type=float, default=10.0, help="모든 학생이 접속을 마치는 데 걸리는 시간(초)")
+    parser.add_argument("--zipf", type=float, default=1.2, help="관심사 쏠림 정도 (클수록 같은 관심사가 많음)")
+    parser.add_argument("--timeout", type=float, default=180.0, help="동작 하나를 기다릴 최대 시간(초)")
+    parser.add_argument("--seed", default="classroom", help="학생 선택에 쓰는 난수 시드")
+    parser.add_argument("--slo-p95", type=float, default=5.0, help="모든 동작의 p95 목표(초)")
+    parser.add_argument("--max-error-rate", type=float, default=0.01, help="허용할 오류율 (0.01 = 1%%)")
+    parser.add_argument("--school-size", type=int, help="동시에 쓸 학교 학생 수 (필요한 프로세스 수 계산용)")
+    parser.add_argument("--json", help="결과를 저장할 JSON 경로")
+    group = parser.add_argument_group("--start로 띄우는 서버 설정")
+    group.add_argument("--fake-latency", default="lognormal:1.5:0.4", help="FAKE_LATENCY (첫 조각까지의 지연 분포)")
+    group.add_argument("--fake-chunk-delay", type=float, default=0.02, help="FAKE_CHUNK_DELAY (조각 사이 지연)")
+    group.add_argument("--rpm", type=int, default=1000, help="GEMINI_RPM_LIMIT")
+    group.add_argument("--navigation", choices=("tabs", "sections"), default="tabs", help="NAVIGATION_MODE")
+    args = parser.parse_args()
+
+    process = start_server(args) if args.start else None
+    try:
+        levels = asyncio.run(main_async(args))
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+    result = sizing(levels, args)
+    if result is None:
+        print(f"어떤 규모도 목표(p95 ≤ {args.slo_p95}초, 오류율 ≤ {args.max_error_rate:.0%})를 지키지 못했습니다.")
+    else:
+        print(f"목표를 지킨 최대 동시 학생 수: 프로세스당 {result['students_per_process']}명")
+        if "replicas" in result:
+            print(f"학생 {result['school_size']}명 학교: 프로세스 {result['replicas']}개 필요")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"levels": levels, "sizing": result}, f, ensure_ascii=False, indent=2)
+        print(f"결과 저장: {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+다시 실행(rerun)할 때마다 브라우저로 보내는 화면 데이터 크기 측정
+
+Streamlit은 스크립트가 다시 실행될 때마다 모든 화면 요소를 웹소켓으로 다시 보냅니다.
+이 도구는 Streamlit AppTest로 app.py를 가짜 제공자로 실제 Gemini 호출 없이 실행하고,
+첫 화면과 그 뒤의 다시 실행(관심사 입력, 버튼 클릭)마다 만들어진 화면 요소의 protobuf 크기를 더해
+웹소켓으로 보내는 양을 어림합니다. <style>이 들어 있는 요소의 크기는 따로 셉니다.
+먼저 static/styles.css를 압축한 결과에 글꼴 @import 주소가 하나도 잘리지 않고 남았는지 확인합니다
+(잘렸으면 오류로 끝남).
+
+이전 버전과 비교하려면 그 버전을 다른 폴더에 꺼내(git worktree) --app으로 지정하세요.
+(가짜 제공자(GEMINI_PROVIDER = "fake")로 실행하므로 fake_provider.py가 있는 버전이어야 합니다.)
+
+실행 방법 (저장소 루트에서):
+    python tools/measure_rerun_payload.py
+    python tools/measure_rerun_payload.py --app /tmp/old/app.py
+"""
+
+import argparse
+import os
+import re
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from offline_app import ROOT, make_app_test
+from stylesheet import Stylesheet
+
+# 스타일시트를 담은 요소를 알아보는 표시 (st.markdown의 <style>, 한 번만 주입하는 iframe)
+STYLE_MARKERS = ("<style", "toronbugi-style")
+
+
+# 원본 CSS의 @import 주소
+IMPORT_URL = re.compile(r"""@import\s+(?:url\(\s*)?['"]?([^'")\s]+)""")
+
+
+def missing_import_urls(css_path):
+    """
+    원본 CSS의 @import 주소 중 압축한 스타일시트에 그대로 남지 않은 주소를 찾는 함수
+
+    반환값:
+    - tuple: (원본의 @import 주소 목록, 그중 압축 결과에 없는 주소 목록)
+    """
+    with open(css_path, encoding="utf-8") as f:
+        urls = IMPORT_URL.findall(re.sub(r"/\*.*?\*/", "", f.read(), flags=re.DOTALL))
+    css = Stylesheet.load(css_path).css
+    return urls, [url for url in urls if url not in css]
+
+
+def payload_bytes(node):
+    """
+    화면 요소 트리에 들어 있는 protobuf 크기를 더하는 함수
+
+    반환값:
+    - tuple: (전체 바이트, <style>이 들어 있는 요소의 바이트)
+    """
+    total = style = 0
+    proto = getattr(node, "proto", None)
+    if proto is not None and hasattr(proto, "ByteSize"):
+        size = proto.ByteSize()
+        total += size
+        if any(marker in str(proto) for marker in STYLE_MARKERS):
+            style += size
+    for child in getattr(node, "children", {}).values():
+        child_total, child_style = payload_bytes(child)
+        total += child_total
+        style += child_style
+    return total, style
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--app", default=os.path.join(ROOT, "app.py"), help="측정할 app.py 경로")
+    args = parser.parse_args()
+
+    css_path = os.path.join(os.path.dirname(os.path.abspath(args.app)), "static", "styles.css")
+    if os.path.exists(css_path):
+        urls, missing = missing_import_urls(css_path)
+        if missing:
+            raise SystemExit("압축한 스타일시트에서 잘린 @import 주소: " + ", ".join(missing))
+        print(f"글꼴 @import {len(urls)}개 모두 압축 결과에 그대로 있음")
+
+    at = make_app_test(args.app)
+
+    steps = [
+        ("첫 화면", lambda: at.run()),
+        ("관심사 입력", lambda: at.text_input(key="topic_interest_input").input("우주").run()),
+        ("주제 추천 클릭", lambda: at.button(key="topic_recommend_button").click().run()),
+        ("다시 실행", lambda: at.run()),
+    ]
+    reruns = []
+    for name, step in steps:
+        step()
+        if at.exception:
+            raise SystemExit(f"{name}: 앱 실행 중 오류 - {at.exception}")
+        total, style = payload_bytes(at._tree)
+        if name != "첫 화면":
+            reruns.append(total)
+        print(f"{name:<12} 화면 데이터 {total / 1024:7.1f}KB  (그중 스타일 {style / 1024:5.1f}KB)")
+    print(f"다시 실행 1회 평균: {sum(reruns) / len(reruns) / 1024:.1f}KB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+도구들이 함께 쓰는 오프라인 앱 실행 도우미
+
+Streamlit AppTest로 app.py를 실행하되, 앱의 가짜 제공자(GEMINI_PROVIDER = "fake", fake_provider.FakeModelPool)를
+켜서 네트워크 없이 결정적(deterministic) 응답을 받고 디스크 캐시는 임시 폴더에 둡니다.
+가짜 제공자의 지연·오류 설정은 FAKE_* 값(app.py의 FAKE_PROVIDER_SETTINGS 참고)으로 넘기고,
+호출 횟수와 프롬프트 토큰 수는 앱이 만든 FakeModelPool의 stats()로 읽습니다 (track_fake_pools()).
+"""
+
+import os
+import sys
+import tempfile
+
+from streamlit.testing.v1 import AppTest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from fake_provider import FakeModelPool
+
+
+def track_instances(cls):
+    """cls로 만들어지는 객체를 모아 두는 목록을 반환합니다 (앱 안의 공유 리소스 통계를 읽기 위함)."""
+    instances = []
+    original_init = cls.__init__
+
+    def __init__(self, *args, **kwargs):
+        original_init(self, *args, **kwargs)
+        instances.append(self)
+
+    cls.__init__ = __init__
+    return instances
+
+
+def track_fake_pools():
+    """
+    앱이 만드는 FakeModelPool을 모아 두는 목록을 반환하는 함수 (make_app_test()로 앱을 실행하기 전에 호출)
+
+    반환값:
+    - list: 지금부터 만들어지는 FakeModelPool 목록
+    """
+    return track_instances(FakeModelPool)
+
+
+def fake_call_counts(pools):
+    """
+    가짜 제공자들이 지금까지 받은 호출 수와 프롬프트 토큰 수를 더하는 함수
+
+    반환값:
+    - tuple: (호출 수, 프롬프트의 추정 토큰 수)
+    """
+    stats = [pool.stats() for pool in pools]
+    return sum(sum(s["calls"].values()) for s in stats), sum(s["prompt_tokens"] for s in stats)
+
+
+def make_app_test(app_path=None, timeout=30, latency=0.0, chunk_delay=0.0, prefill_ms_per_1k=0.0, **secrets):
+    """
+    가짜 제공자로 실행할 AppTest를 만드는 함수
+
+    매개변수:
+    - app_path (str): 실행할 app.py 경로 (기본: 저장소의 app.py)
+    - timeout (float): 실행 1회의 최대 시간(초)
+    - latency (float): 호출마다 첫 조각이 나오기까지 기다릴 시간(초) (FAKE_LATENCY)
+    - chunk_delay (float): 조각 사이에 기다릴 시간(초) (FAKE_CHUNK_DELAY)
+    - prefill_ms_per_1k (float): 프롬프트 1000토큰마다 첫 조각 전에 더 기다릴 시간(ms) (FAKE_PREFILL_MS_PER_1K)
+    - secrets: st.secrets에 넣을 추가 값 (예: NAVIGATION_MODE="sections")
+
+    반환값:
+    - AppTest: 아직 실행하지 않은 앱
+    """
+    app_path = os.path.abspath(app_path or os.path.join(ROOT, "app.py"))
+    sys.path.insert(0, os.path.dirname(app_path))
+    at = AppTest.from_file(app_path, default_timeout=timeout)
+    at.secrets["GEMINI_PROVIDER"] = "fake"
+    at.secrets["FAKE_LATENCY"] = f"fixed:{latency:g}"
+    at.secrets["FAKE_CHUNK_DELAY"] = chunk_delay
+    at.secrets["FAKE_PREFILL_MS_PER_1K"] = prefill_ms_per_1k
+    at.secrets["DISK_CACHE_PATH"] = os.path.join(tempfile.mkdtemp(), "responses.sqlite3")
+    for name, value in secrets.items():
+        at.secrets[name] = value
+    return at
@@ -0,0 +1,193 @@
+"""
+프롬프트 템플릿 토큰 예산 분석
+
+app.py의 프롬프트 템플릿을 (앱을 실행하지 않고) 읽어, 변형(PROMPT_VARIANTS)과 템플릿마다 다음을 보여 줍니다.
+- static: 학생 입력을 뺀 고정 부분의 토큰 수 (모든 호출이 매번 내는 비용)
+- dynamic: 예시 학생 입력이 차지하는 토큰 수
+- total: 예시 입력을 넣은 전체 프롬프트의 토큰 수와 글자 수
+- 출처 표기("Source 31" 등) 개수
+- 출력 형식 확인: 제목·항목 이름이 "full" 변형과 같은지 (다르면 화면의 주제 추출 등이 깨질 수 있음)
+  다른 템플릿의 출력 형식을 옮겨 쓰는 템플릿(주제 하나 바꾸기, 찬반 논거 절반)은 그 원본 형식에 들어 있는지도 확인
+
+토큰 수는 속도 제한기와 같은 추정식(rate_limiter.estimate_tokens)을 씁니다.
+--api를 주면 GEMINI_API_KEY 환경 변수의 키로 Gemini의 count_tokens를 불러 실제 토큰 수도 함께 보여 줍니다.
+
+지연 시간까지 비교하려면 오프라인 벤치마크를 변형별로 실행하세요.
+    python tools/bench_journeys.py --prompt-variant full --prefill-ms-per-1k 150 --save /tmp/full.json
+    python tools/bench_journeys.py --prompt-variant compact --prefill-ms-per-1k 150 --compare /tmp/full.json
+
+실행 방법 (저장소 루트에서):
+    python tools/prompt_tokens.py
+    python tools/prompt_tokens.py --api --model gemini-2.0-flash
+"""
+
+import argparse
+import ast
+import json
+import os
+import re
+import string
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from rate_limiter import estimate_tokens
+
+# PROMPT_VARIANTS의 각 튜플에 들어 있는 템플릿 순서
+TEMPLATE_NAMES = ("recommend_topic", "argument_ideas", "feedback", "argument_side", "replace_topic")
+# 토큰 수를 잴 때 넣는 예시 학생 입력
+SAMPLE_INPUTS = {
+    "interest_input": "우주 탐사",
+    "side": "찬성",
+    "topic_input": "학교에서 스마트폰 사용을 금지해야 한다",
+    "student_argument_input": "저는 찬성합니다. 쉬는 시간에 친구들과 대화를 더 많이 할 수 있고 수업에도 더 집중할 수 있기 때문이에요.",
+    "excluded_topics": "- 우주 탐사에 나라 예산을 더 써야 한다\n- 우주 여행을 누구나 할 수 있어야 한다\n- 우주 쓰레기를 줄이는 규칙을 만들어야 한다",
+}
+# 다른 템플릿의 출력 형식을 옮겨 쓰는 템플릿 → (원본 템플릿, 원본 형식과 비교할 때 채울 {자리표시자} 값들)
+# 앱은 이 응답들을 원본 템플릿과 같은 방식으로 읽으므로(parse_recommended_topics, merge_argument_halves)
+# 채운 형식의 줄들이 원본 형식 안에 그대로 이어져 있어야 함
+DERIVED_FORMATS = {
+    "argument_side": ("argument_ideas", [{"side": "찬성"}, {"side": "반대"}]),
+    "replace_topic": ("recommend_topic", [{}]),
+}
+CITATION = re.compile(r"Source \d+")
+
+
+def load_variants(app_path):
+    """
+    app.py를 실행하지 않고 구문 트리에서 PROMPT_VARIANTS를 읽는 함수
+
+    반환값:
+    - dict: 변형 이름 → {템플릿 이름: 템플릿 문자열}
+    """
+    with open(app_path, encoding="utf-8") as f:
+        tree = ast.parse(f.read(), app_path)
+    strings = {}
+    variants_node = None
+    for node in tree.body:
+        if not isinstance(node, ast.Assign) or len(node.targets) != 1 or not isinstance(node.targets[0], ast.Name):
+            continue
+        name = node.targets[0].id
+        if isinstance(node.value, ast.Constant) and isinstance(node.value.value, str):
+            strings[name] = node.value.value
+        elif name == "PROMPT_VARIANTS":
+            variants_node = node.value
+    if variants_node is None:
+        raise SystemExit(f"{app_path}에서 PROMPT_VARIANTS를 찾지 못했습니다.")
+    variants = {}
+    for key, value in zip(variants_node.keys, variants_node.values):
+        variants[key.value] = {
+            template: strings[element.id] for template, element in zip(TEMPLATE_NAMES, value.elts)
+        }
+    return variants
+
+
+def output_format_skeleton(template, values=None):
+    """
+    "# 출력 형식:"부터 "# 입력 정보:" 전까지의 제목·항목 이름
+    ([설명] 부분은 모델에게 주는 안내라서 비교하지 않고, {자리표시자}는 values로 채우거나 그대로 둠)
+    """
+    block = template.split("# 출력 형식:", 1)[1].split("# 입력 정보:", 1)[0]
+    for field, value in (values or {}).items():
+        block = block.replace("{" + field + "}", value)
+    return [re.sub(r"\[(?!\{)[^\]]*\]", "[…]", line).rstrip() for line in block.splitlines() if line.strip()]
+
+
+def follows_format(name, template, sources):
+    """
+    DERIVED_FORMATS에 있는 템플릿의 출력 형식이 원본 템플릿 형식 안에 이어진 줄들로 들어 있는지 확인하는 함수
+
+    매개변수:
+    - name (str): 템플릿 이름
+    - template (str): 확인할 템플릿
+    - sources (dict): 템플릿 이름 → 원본으로 삼을 템플릿 문자열 ("full" 변형)
+
+    반환값:
+    - bool: 원본 형식과 맞거나 DERIVED_FORMATS에 없는 템플릿이면 True
+    """
+    if name not in DERIVED_FORMATS:
+        return True
+    source_name, fillings = DERIVED_FORMATS[name]
+    source = output_format_skeleton(sources[source_name])
+    for values in fillings:
+        part = output_format_skeleton(template, values)
+        if not any(source[start:start + len(part)] == part for start in range(len(source) - len(part) + 1)):
+            return False
+    return True
+
+
+def analyze(template):
+    """템플릿 하나의 고정/입력 토큰 수 등을 계산합니다."""
+    fields = [field for _text, field, _spec, _conv in string.Formatter().parse(template) if field]
+    static = template.format(**{field: "" for field in fields})
+    prompt = template.format(**{field: SAMPLE_INPUTS[field] for field in fields})
+    total = estimate_tokens(prompt)
+    static_tokens = estimate_tokens(static)
+    return {
+        "prompt": prompt,
+        "chars": len(prompt),
+        "static_tokens": static_tokens,
+        "dynamic_tokens": total - static_tokens,
+        "total_tokens": total,
+        "citations": len(CITATION.findall(template)),
+    }
+
+
+def count_with_api(prompts, model_name):
+    """Gemini count_tokens로 실제 토큰 수를 셉니다 (GEMINI_API_KEY 환경 변수 필요)."""
+    import google.generativeai as genai
+
+    api_key = os.environ.get("GEMINI_API_KEY")
+    if not api_key:
+        raise SystemExit("--api를 쓰려면 GEMINI_API_KEY 환경 변수가 필요합니다.")
+    genai.configure(api_key=api_key)
+    model = genai.GenerativeModel(model_name)
+    return [model.count_tokens(prompt).total_tokens for prompt in prompts]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--app", default=os.path.join(ROOT, "app.py"), help="분석할 app.py 경로")
+    parser.add_argument("--api", action="store_true", help="Gemini count_tokens로 실제 토큰 수도 셈")
+    parser.add_argument("--model", default="gemini-2.0-flash", help="--api에서 쓸 모델명")
+    parser.add_argument("--json", help="결과를 저장할 JSON 경로")
+    args = parser.parse_args()
+
+    variants = load_variants(args.app)
+    results = {variant: {name: analyze(text) for name, text in templates.items()}
+               for variant, templates in variants.items()}
+    if args.api:
+        for variant, templates in results.items():
+            counts = count_with_api([r["prompt"] for r in templates.values()], args.model)
+            for r, count in zip(templates.values(), counts):
+                r["api_tokens"] = count
+
+    baseline = results.get("full")
+    problems = 0
+    print(f"{'변형':<8} {'템플릿':<16} {'고정':>6} {'입력':>6} {'전체':>6} {'글자':>6} {'출처':>4}  출력 형식")
+    for variant, templates in results.items():
+        for name, r in templates.items():
+            same_format = output_format_skeleton(variants[variant][name]) == output_format_skeleton(variants["full"][name])
+            derived = ""
+            if name in DERIVED_FORMATS:
+                same_format = same_format and follows_format(name, variants[variant][name], variants["full"])
+                derived = f" ({DERIVED_FORMATS[name][0]} 형식)"
+            problems += not same_format
+            api = f"  (API {r['api_tokens']})" if "api_tokens" in r else ""
+            saved = ""
+            if baseline is not None and variant != "full":
+                saved = f"  고정 부분 {1 - r['static_tokens'] / baseline[name]['static_tokens']:.0%} 절약"
+            print(f"{variant:<8} {name:<16} {r['static_tokens']:6d} {r['dynamic_tokens']:6d} {r['total_tokens']:6d} "
+                  f"{r['chars']:6d} {r['citations']:4d}  {'같음' if same_format else '다름!'}{derived}{saved}{api}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({variant: {name: {k: v for k, v in r.items() if k != "prompt"} for name, r in templates.items()}
+                       for variant, templates in results.items()}, f, ensure_ascii=False, indent=2)
+        print(f"결과 저장: {args.json}")
+    if problems:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
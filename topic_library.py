@@ -0,0 +1,241 @@
+"""
+로컬 토론 주제 라이브러리 모듈
+
+학생들이 가장 많이 입력하는 관심사(스마트폰, 게임, 환경, 학교, 반려동물, 미래 기술)와
+그 추천 주제들의 찬반 논거 아이디어를 미리 만들어 data/topic_library.json에 넣어 두었습니다.
+프롬프트가 만들어 내는 것과 같은 마크다운 형식이므로 화면과 3번 탭의 주제 추출이 그대로 동작합니다.
+
+한글 글자 n-그램(2글자) 역색인으로 비슷한 입력("게임!", "온라인 게임", "학교에서 스마트폰 사용 금지")을
+몇 밀리초 안에 찾아 주고, 찾지 못했을 때만 Gemini API를 호출합니다.
+찬반 논거는 주제의 방향("허용"과 "금지" 등)이 바뀌면 찬성과 반대가 뒤집히므로,
+방향을 나타내는 말이 입력과 다르게 들어 있는 주제는 글자가 비슷해도 찾은 것으로 보지 않습니다.
+또 짧은 입력("반려동물")이 더 긴 주제("로봇 반려동물")에 들어 있기만 해서는 같은 주제로 보지 않고,
+입력이 주제를 거의 다 담고 있어야 찾은 것으로 봅니다.
+"""
+
+import json
+import threading
+import unicodedata
+from collections import defaultdict
+
+# 주제의 방향을 정하는 말 (입력과 미리 만든 주제에 들어 있는 말이 다르면 찬반이 뒤집힌 주제로 봄)
+# 방향 → 그 방향을 나타내는 표현들 ("숙제 없는 학교"와 "숙제 폐지"는 같은 방향)
+POLARITY_WORDS = {
+    "허용": ("허용",),
+    "금지": ("금지",),
+    "폐지": ("폐지", "없애", "없는"),
+    "반대": ("반대",),
+    "의무": ("의무",),
+}
+
+
+def normalize_query(text):
+    """
+    검색용으로 입력을 정규화하는 함수 (NFC, 공백·문장부호 제거, 영문 소문자)
+
+    매개변수:
+    - text (str): 학생 입력
+
+    반환값:
+    - str: 정규화된 문자열
+    """
+    text = unicodedata.normalize("NFC", text).casefold()
+    return "".join(
+        ch for ch in text
+        if not ch.isspace() and not unicodedata.category(ch).startswith(("P", "S"))
+    )
+
+
+def polarity(text):
+    """
+    주제에 들어 있는 방향을 나타내는 말의 집합을 반환하는 함수
+
+    매개변수:
+    - text (str): 토론 주제
+
+    반환값:
+    - frozenset: text에 들어 있는 표현의 방향(POLARITY_WORDS의 키)
+    """
+    text = normalize_query(text)
+    return frozenset(direction for direction, words in POLARITY_WORDS.items()
+                     if any(word in text for word in words))
+
+
+def char_ngrams(text, n=2):
+    """
+    정규화된 문자열의 글자 n-그램 집합을 만드는 함수 (n보다 짧으면 문자열 자체를 사용)
+
+    매개변수:
+    - text (str): normalize_query()로 정규화한 문자열
+    - n (int): n-그램 길이
+
+    반환값:
+    - set: n-그램 집합
+    """
+    if len(text) < n:
+        return {text} if text else set()
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+
+class NgramIndex:
+    """
+    글자 n-그램 역색인
+
+    문서마다 여러 개의 검색어(대표 이름 + 별칭)를 등록하고, 질의와 검색어의
+    다이스 계수(2|A∩B| / (|A|+|B|))가 가장 높은 문서를 찾습니다.
+    cover_key=True로 찾으면 질의가 검색어보다 짧을 때 검색어 n-그램 중 질의에 있는 비율(|A∩B| / |B|)을 점수로 씁니다
+    (짧은 질의가 긴 검색어 안에 들어 있기만 해도 높은 점수가 나오지 않도록).
+    """
+
+    def __init__(self, n=2):
+        self.n = n
+        self._postings = defaultdict(set)  # n-그램 → {검색어 번호}
+        self._keys = []  # 검색어 번호 → (문서 번호, n-그램 개수, 검색어)
+
+    def add(self, doc_id, key):
+        """문서에 검색어 하나를 등록합니다."""
+        grams = char_ngrams(normalize_query(key), self.n)
+        if not grams:
+            return
+        key_id = len(self._keys)
+        self._keys.append((doc_id, len(grams), key))
+        for gram in grams:
+            self._postings[gram].add(key_id)
+
+    def search(self, query, min_score=0.0, accept=None, cover_key=False):
+        """
+        질의와 가장 비슷한 문서를 찾는 함수
+
+        매개변수:
+        - query (str): 학생 입력
+        - min_score (float): 이 점수(0~1) 미만이면 찾지 못한 것으로 처리
+        - accept (callable): 검색어(str)를 받아 후보로 쓸지 판단하는 함수 (없으면 모든 검색어가 후보)
+        - cover_key (bool): 질의가 검색어를 얼마나 담고 있는지도 점수에 반영할지 여부
+
+        반환값:
+        - tuple: (문서 번호, 점수) 또는 찾지 못하면 (None, 가장 높은 점수)
+        """
+        grams = char_ngrams(normalize_query(query), self.n)
+        if not grams:
+            return None, 0.0
+        overlaps = defaultdict(int)
+        for gram in grams:
+            for key_id in self._postings.get(gram, ()):
+                overlaps[key_id] += 1
+        best_doc, best_score = None, 0.0
+        for key_id, overlap in overlaps.items():
+            doc_id, size, key = self._keys[key_id]
+            if accept is not None and not accept(key):
+                continue
+            score = 2 * overlap / (len(grams) + size)
+            if cover_key:
+                score = min(score, overlap / size)
+            if score > best_score:
+                best_doc, best_score = doc_id, score
+        if best_score < min_score:
+            return None, best_score
+        return best_doc, best_score
+
+
+class TopicLibrary:
+    """
+    미리 만들어 둔 주제 추천과 찬반 논거 아이디어 모음
+
+    매개변수:
+    - data (dict): topic_library.json의 내용
+    - min_score (float): 비슷한 입력으로 인정할 최소 점수 (0~1)
+    """
+
+    def __init__(self, data, min_score=0.75):
+        self.version = data.get("version", "unknown")
+        self.min_score = min_score
+        self._recommendations = [entry["markdown"] for entry in data.get("recommendations", [])]
+        self._arguments = [entry["markdown"] for entry in data.get("arguments", [])]
+        self._argument_topics = [entry["topic"] for entry in data.get("arguments", [])]
+        self._recommendation_index = self._build_index(data.get("recommendations", []), "interest")
+        self._argument_index = self._build_index(data.get("arguments", []), "topic")
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0}
+
+    @classmethod
+    def load(cls, path, **kwargs):
+        """JSON 파일에서 라이브러리를 불러옵니다."""
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f), **kwargs)
+
+    @staticmethod
+    def _build_index(entries, name_field):
+        index = NgramIndex()
+        for doc_id, entry in enumerate(entries):
+            index.add(doc_id, entry[name_field])
+            for alias in entry.get("aliases", []):
+                index.add(doc_id, alias)
+        return index
+
+    def find_recommendations(self, interest, record=True):
+        """
+        관심사와 비슷한 미리 만든 주제 추천을 찾는 함수
+
+        매개변수:
+        - interest (str): 학생이 입력한 관심사
+        - record (bool): 적중/미스 통계에 반영할지 여부
+
+        반환값:
+        - str: RECOMMEND_TOPIC_PROMPT_TEMPLATE 출력 형식의 마크다운 또는 없으면 None
+        """
+        return self._find(self._recommendation_index, self._recommendations, interest, record)
+
+    def find_arguments(self, topic, record=True):
+        """
+        토론 주제와 비슷한 미리 만든 찬반 논거 아이디어를 찾는 함수 (match_arguments()의 마크다운만 반환)
+
+        반환값:
+        - str: ARGUMENT_IDEAS_PROMPT_TEMPLATE 출력 형식의 마크다운 또는 없으면 None
+        """
+        match = self.match_arguments(topic, record)
+        return match[1] if match is not None else None
+
+    def match_arguments(self, topic, record=True):
+        """
+        토론 주제와 비슷한 미리 만든 찬반 논거 아이디어와 그 주제를 찾는 함수
+        방향을 나타내는 말(POLARITY_WORDS)이 입력과 똑같은 주제·별칭만 후보로 삼고
+        ("학교 스마트폰 사용 허용"으로 "학교에서 스마트폰 사용 금지"의 찬반을 보여 주지 않도록),
+        입력이 주제·별칭을 거의 다 담고 있을 때만 찾은 것으로 봅니다.
+        입력과 글자가 조금 다를 수 있으므로 화면에는 입력 대신 돌려준 주제를 보여 줘야 합니다.
+
+        매개변수:
+        - topic (str): 학생이 입력하거나 고른 토론 주제
+        - record (bool): 적중/미스 통계에 반영할지 여부
+
+        반환값:
+        - tuple: (라이브러리의 토론 주제, 마크다운) 또는 없으면 None
+        """
+        wanted = polarity(topic)
+        doc_id = self._search(self._argument_index, topic, record,
+                              accept=lambda key: polarity(key) == wanted, cover_key=True)
+        return (self._argument_topics[doc_id], self._arguments[doc_id]) if doc_id is not None else None
+
+    def _find(self, index, documents, query, record):
+        doc_id = self._search(index, query, record)
+        return documents[doc_id] if doc_id is not None else None
+
+    def _search(self, index, query, record, **options):
+        doc_id, _score = index.search(query, self.min_score, **options)
+        if record:
+            with self._lock:
+                self._stats["hits" if doc_id is not None else "misses"] += 1
+        return doc_id
+
+    def stats(self):
+        """
+        라이브러리 통계를 반환하는 함수
+
+        반환값:
+        - dict: version, recommendations, arguments(항목 수), hits, misses
+        """
+        with self._lock:
+            stats = dict(self._stats)
+        stats["version"] = self.version
+        stats["recommendations"] = len(self._recommendations)
+        stats["arguments"] = len(self._arguments)
+        return stats